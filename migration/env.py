@@ -37,6 +37,13 @@ port = os.getenv("POSTGRES_PORT", default=5432)
 url_db = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{name}"
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Секции bond_snapshots создаются приложением и в моделях не описаны"""
+    if type_ == "table" and reflected and name.startswith("bond_snapshots_"):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -53,6 +60,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -79,7 +87,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,83 @@
+"""Add bond_snapshots table
+
+Revision ID: 8c3e5b1f7a24
+Revises: 6d2a8f4c0e91
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c3e5b1f7a24"
+down_revision: Union[str, None] = "6d2a8f4c0e91"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Секции по месяцам создаются приложением при записи истории
+    op.create_table(
+        "bond_snapshots",
+        sa.Column("snapshot_date", sa.Date(), nullable=False),
+        sa.Column("secid", sa.String(), nullable=False),
+        sa.Column(
+            "captured_at",
+            sa.DateTime(),
+            server_default=sa.text("TIMEZONE('utc', now())"),
+            nullable=False,
+        ),
+        sa.Column("shortname", sa.String(), nullable=False),
+        sa.Column("matdate", sa.Date(), nullable=False),
+        sa.Column("face_unit", sa.String(), nullable=False),
+        sa.Column("list_level", sa.Integer(), nullable=False),
+        sa.Column("days_to_redemption", sa.Integer(), nullable=False),
+        sa.Column("face_value", sa.Float(), nullable=False),
+        sa.Column("coupon_frequency", sa.Integer(), nullable=False),
+        sa.Column("coupon_date", sa.Date(), nullable=False),
+        sa.Column("coupon_percent", sa.Float(), nullable=False),
+        sa.Column("coupon_value", sa.Float(), nullable=False),
+        sa.Column("highrisk", sa.Boolean(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("accint", sa.Float(), nullable=False),
+        sa.Column("accint_percent", sa.Float(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("moex_yield", sa.Float(), nullable=False),
+        sa.Column("amortizations", sa.Boolean(), nullable=False),
+        sa.Column("floater", sa.Boolean(), nullable=False),
+        sa.Column("sum_coupon", sa.Float(), nullable=False),
+        sa.Column("sum_coupon_percent", sa.Float(), nullable=False),
+        sa.Column("year_percent", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("snapshot_date", "secid"),
+        postgresql_partition_by="RANGE (snapshot_date)",
+    )
+    op.create_index(
+        "ix_bond_snapshots_secid",
+        "bond_snapshots",
+        ["secid", "snapshot_date"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_bond_snapshots_screener",
+        "bond_snapshots",
+        [
+            "snapshot_date",
+            "amortizations",
+            "floater",
+            sa.text("year_percent DESC"),
+        ],
+        unique=False,
+        postgresql_include=["list_level", "days_to_redemption", "face_unit", "type"],
+        postgresql_where=sa.text("highrisk IS false AND sum_coupon > 10"),
+    )
+
+
+def downgrade() -> None:
+    # Секции удаляются вместе с секционированной таблицей
+    op.drop_index("ix_bond_snapshots_screener", table_name="bond_snapshots")
+    op.drop_index("ix_bond_snapshots_secid", table_name="bond_snapshots")
+    op.drop_table("bond_snapshots")
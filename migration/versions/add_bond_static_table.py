@@ -0,0 +1,42 @@
+"""Add bond_static table for incremental ingestion
+
+Revision ID: 7c5bf281b370
+Revises: 680dac754176
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c5bf281b370"
+down_revision: Union[str, None] = "680dac754176"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bond_static",
+        sa.Column("secid", sa.String(), nullable=False),
+        sa.Column(
+            "description", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+        sa.Column("description_fetched_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "bondization", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+        sa.Column("bondization_fetched_at", sa.DateTime(), nullable=True),
+        sa.Column("listing_hash", sa.String(), nullable=True),
+        sa.Column("content_hash", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("secid"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bond_static")
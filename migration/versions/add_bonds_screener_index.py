@@ -0,0 +1,36 @@
+"""Add screener index on bonds
+
+Revision ID: 680dac754176
+Revises: 6bb3f81b7b4b
+Create Date: 2026-10-18 13:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "680dac754176"
+down_revision: Union[str, None] = "6bb3f81b7b4b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Частичный индекс под постоянные условия скринера с сортировкой
+    # по year_percent, остальные фильтруемые колонки в INCLUDE
+    op.create_index(
+        "ix_bonds_screener",
+        "bonds",
+        ["amortizations", "floater", sa.text("year_percent DESC")],
+        unique=False,
+        postgresql_include=["list_level", "days_to_redemption", "face_unit", "type"],
+        postgresql_where=sa.text("highrisk IS false AND sum_coupon > 10"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bonds_screener", table_name="bonds")
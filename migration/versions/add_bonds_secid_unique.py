@@ -0,0 +1,35 @@
+"""Add unique constraint on bonds.secid
+
+Revision ID: 6bb3f81b7b4b
+Revises: d3619cb8cd42
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6bb3f81b7b4b"
+down_revision: Union[str, None] = "d3619cb8cd42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Удаление дубликатов secid, остается последняя обновленная запись
+    op.execute(
+        """
+        DELETE FROM bonds a
+        USING bonds b
+        WHERE a.secid = b.secid
+          AND (a.last_updated, a.id) < (b.last_updated, b.id)
+        """
+    )
+    op.create_unique_constraint("uq_bonds_secid", "bonds", ["secid"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_bonds_secid", "bonds", type_="unique")
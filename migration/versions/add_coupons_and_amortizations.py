@@ -0,0 +1,56 @@
+"""Add coupons and amortizations tables
+
+Revision ID: 2f0d8c41a9e7
+Revises: 7c5bf281b370
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2f0d8c41a9e7"
+down_revision: Union[str, None] = "7c5bf281b370"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "coupons",
+        sa.Column("secid", sa.String(), nullable=False),
+        sa.Column("coupon_date", sa.Date(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=True),
+        sa.Column("valueprc", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("secid", "coupon_date"),
+    )
+    op.create_table(
+        "amortizations",
+        sa.Column("secid", sa.String(), nullable=False),
+        sa.Column("amort_date", sa.Date(), nullable=False),
+        sa.Column("face_value", sa.Float(), nullable=True),
+        sa.Column("value", sa.Float(), nullable=True),
+        sa.Column("valueprc", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("secid", "amort_date"),
+    )
+    # Графики купонов переносятся в отдельные таблицы, сохраненные в JSON
+    # графики не переносятся и будут загружены заново
+    op.drop_column("bond_static", "bondization")
+    op.execute("UPDATE bond_static SET bondization_fetched_at = NULL")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "bond_static",
+        sa.Column(
+            "bondization", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+    op.execute("UPDATE bond_static SET bondization_fetched_at = NULL")
+    op.drop_table("amortizations")
+    op.drop_table("coupons")
@@ -0,0 +1,44 @@
+"""Add ingestion_run_items table
+
+Revision ID: 6d2a8f4c0e91
+Revises: 4b7f2e9a1c35
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6d2a8f4c0e91"
+down_revision: Union[str, None] = "4b7f2e9a1c35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingestion_run_items",
+        sa.Column("run_id", sa.Integer(), nullable=False),
+        sa.Column("secid", sa.String(), nullable=False),
+        sa.Column("page", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("reason", sa.String(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("TIMEZONE('utc', now())"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["run_id"], ["ingestion_runs.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("run_id", "secid"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingestion_run_items")
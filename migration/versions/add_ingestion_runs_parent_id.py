@@ -0,0 +1,41 @@
+"""Add parent_id to ingestion_runs
+
+Revision ID: 3e7a1d9b6c42
+Revises: 8c3e5b1f7a24
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3e7a1d9b6c42"
+down_revision: Union[str, None] = "8c3e5b1f7a24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "ingestion_runs",
+        sa.Column("parent_id", sa.Integer(), nullable=True),
+    )
+    op.create_foreign_key(
+        "ingestion_runs_parent_id_fkey",
+        "ingestion_runs",
+        "ingestion_runs",
+        ["parent_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "ingestion_runs_parent_id_fkey", "ingestion_runs", type_="foreignkey"
+    )
+    op.drop_column("ingestion_runs", "parent_id")
@@ -0,0 +1,47 @@
+"""Add ingestion_runs table
+
+Revision ID: 9a4e1c7d2b60
+Revises: 2f0d8c41a9e7
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4e1c7d2b60"
+down_revision: Union[str, None] = "2f0d8c41a9e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingestion_runs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "started_at",
+            sa.DateTime(),
+            server_default=sa.text("TIMEZONE('utc', now())"),
+            nullable=False,
+        ),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("mode", sa.String(), nullable=False),
+        sa.Column("bonds", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("report", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_ingestion_runs_id"), "ingestion_runs", ["id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_ingestion_runs_id"), table_name="ingestion_runs")
+    op.drop_table("ingestion_runs")
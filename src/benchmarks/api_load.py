@@ -0,0 +1,128 @@
+"""Нагрузочный бенчмарк /bonds API скринера.
+
+Без --url API запускается в этом же процессе (uvicorn) поверх БД из
+настроек database.base, источник данных выбирается --backend.
+
+Запуск из каталога src:
+    python -m benchmarks.api_load --requests 2000 --concurrency 20
+    python -m benchmarks.api_load --url http://127.0.0.1:8000
+"""
+
+from pathlib import Path
+from statistics import quantiles
+from time import perf_counter
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+from aiohttp import ClientSession
+
+
+def _filters(rnd: random.Random) -> dict:
+    """Случайный набор фильтров скринера"""
+    min_year_percent = rnd.randint(0, 15)
+    min_days = rnd.choice((0, 180, 365, 500))
+    return {
+        "min_year_percent": min_year_percent,
+        "max_year_percent": min_year_percent + rnd.randint(5, 30),
+        "min_list_level": 1,
+        "max_list_level": rnd.randint(1, 3),
+        "amortizations": rnd.choice(("true", "false")),
+        "floater": "false",
+        "min_days_to_redemption": min_days,
+        "max_days_to_redemption": min_days + rnd.choice((365, 1000, 3000)),
+        "limit": rnd.choice((20, 50, 100)),
+    }
+
+
+async def _worker(
+    session: ClientSession, url: str, queue: asyncio.Queue, latencies: list
+):
+    while True:
+        params = await queue.get()
+        if params is None:
+            return
+        start = perf_counter()
+        async with session.get(url, params=params) as response:
+            await response.read()
+            response.raise_for_status()
+        latencies.append(perf_counter() - start)
+
+
+async def _load(base_url: str, args) -> dict:
+    rnd = random.Random(args.seed)
+    variants = [_filters(rnd) for _ in range(args.distinct)]
+    queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait(rnd.choice(variants))
+    for _ in range(args.concurrency):
+        queue.put_nowait(None)
+
+    latencies = []
+    url = f"{base_url}/bonds"
+    async with ClientSession() as session:
+        # Прогрев соединений и пула БД
+        async with session.get(url) as response:
+            await response.read()
+        start = perf_counter()
+        await asyncio.gather(
+            *[
+                _worker(session, url, queue, latencies)
+                for _ in range(args.concurrency)
+            ]
+        )
+        elapsed = perf_counter() - start
+
+    return {"latencies": latencies, "elapsed": elapsed}
+
+
+async def _serve_and_load(args) -> dict:
+    import uvicorn
+
+    # Приложение импортирует dependencies как модуль верхнего уровня
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "bond_screener_api"))
+    os.environ["SCREENER_BACKEND"] = args.backend
+    if args.no_cache:
+        os.environ["SCREENER_CACHE_SIZE"] = "0"
+    from main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        return await _load(f"http://127.0.0.1:{args.port}", args)
+    finally:
+        server.should_exit = True
+        await serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="адрес запущенного API")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--distinct", type=int, default=50, help="наборов фильтров")
+    parser.add_argument("--backend", default="sql", choices=("sql", "memory"))
+    parser.add_argument("--no-cache", action="store_true", help="без кэша скринера")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.url:
+        result = asyncio.run(_load(args.url.rstrip("/"), args))
+    else:
+        result = asyncio.run(_serve_and_load(args))
+
+    latencies = sorted(result["latencies"])
+    percentiles = quantiles(latencies, n=100)
+    print(f"запросов: {len(latencies)} за {result['elapsed']:.2f} сек")
+    print(f"запросов в сек: {len(latencies) / result['elapsed']:.0f}")
+    print(f"p50: {percentiles[49] * 1000:.1f} мс, p99: {percentiles[98] * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
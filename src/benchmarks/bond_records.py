@@ -0,0 +1,144 @@
+"""Замер CPU и памяти на одну облигацию при обработке ответов ISS.
+
+Сеть не используется: ответы ISS подставляются из заготовок, так что
+замеряется только разбор, проверка, расчет и сборка записей для БД.
+
+Запуск из каталога src:
+    python -m benchmarks.bond_records -n 2000
+"""
+
+from time import perf_counter, process_time
+import argparse
+import asyncio
+import json
+import tracemalloc
+
+from services.moex import Bond
+
+
+def _payloads() -> dict[str, bytes]:
+    """Заготовки ответов ISS для описания, рынка и графика купонов"""
+    description = {
+        "SECID": "SU00000",
+        "SHORTNAME": "ОФЗ 00000",
+        "ISIN": "RU000A000000",
+        "MATDATE": "2031-01-15",
+        "INITIALFACEVALUE": "1000",
+        "FACEUNIT": "SUR",
+        "LISTLEVEL": "1",
+        "DAYSTOREDEMPTION": "1550",
+        "FACEVALUE": "1000",
+        "ISQUALIFIEDINVESTORS": "0",
+        "COUPONFREQUENCY": "2",
+        "COUPONDATE": "2027-01-15",
+        "COUPONPERCENT": "11.5",
+        "COUPONVALUE": "57.34",
+        "HIGHRISK": "0",
+        "TYPE": "ofz_bond",
+        "NAME": "ОФЗ-ПД 00000",
+        "ISSUEDATE": "2021-01-20",
+        "LATNAME": "OFZ 00000",
+        "ISSUESIZE": "350000000000",
+        "TYPENAME": "Государственная облигация",
+        "GROUP": "stock_bonds",
+        "GROUPNAME": "Облигации",
+        "EMITTER_ID": "1",
+    }
+    coupons = [
+        [f"{year}-{month}-15", 57.34, 11.5]
+        for year in range(2021, 2031)
+        for month in ("01", "07")
+    ]
+    return {
+        "description": json.dumps(
+            {
+                "description": {
+                    "columns": ["name", "value"],
+                    "data": [list(i) for i in description.items()],
+                }
+            }
+        ).encode(),
+        "marketdata": json.dumps(
+            {
+                "securities": {"columns": ["ACCRUEDINT"], "data": [[12.3]]},
+                "marketdata": {
+                    "columns": ["LAST", "MARKETPRICE", "YIELD"],
+                    "data": [[98.7, 98.6, 12.4]],
+                },
+            }
+        ).encode(),
+        "bondization": json.dumps(
+            {
+                "amortizations": {
+                    "columns": ["amortdate", "facevalue", "value", "valueprc"],
+                    "data": [["2031-01-15", 1000, 1000, 100]],
+                },
+                "coupons": {
+                    "columns": ["coupondate", "value", "valueprc"],
+                    "data": coupons,
+                },
+            }
+        ).encode(),
+    }
+
+
+class CannedBond(Bond):
+    """Облигация с ответами ISS из заготовок вместо сети"""
+
+    def __init__(self, payloads: dict[str, bytes], concurrency: int) -> None:
+        super().__init__(concurrency=concurrency)
+        self.payloads = payloads
+
+    async def _fetch(self, session, url: str, params: dict, headers: dict) -> tuple:
+        """Подменяется только транспорт, ответ разбирается MoexStrategy._decode"""
+        if "/bondization" in url:
+            kind = "bondization"
+        elif "/engines/" in url:
+            kind = "marketdata"
+        else:
+            kind = "description"
+        return 200, {}, self.payloads[kind]
+
+
+async def _run(bond: Bond, secids: list[str], page: int) -> int:
+    count = 0
+    for start in range(0, len(secids), page):
+        count += len(await bond.process_data(list_bond=secids[start : start + page]))
+    return count
+
+
+async def _measure(bond: Bond, secids: list[str], page: int) -> dict:
+    # Прогрев: импорт, компиляция схем pydantic, кэши numpy
+    await _run(bond, secids[:page], page)
+
+    wall, cpu = perf_counter(), process_time()
+    count = await _run(bond, secids, page)
+    wall, cpu = perf_counter() - wall, process_time() - cpu
+
+    tracemalloc.start()
+    await _run(bond, secids[:page], page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"count": count, "cpu": cpu, "wall": wall, "peak": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=2000, help="число облигаций")
+    parser.add_argument("--page", type=int, default=100, help="размер страницы")
+    args = parser.parse_args()
+
+    bond = CannedBond(payloads=_payloads(), concurrency=20)
+    secids = [f"SU{i:05d}" for i in range(args.n)]
+    result = asyncio.run(_measure(bond, secids, args.page))
+
+    count = result["count"]
+    print(f"облигаций: {count}")
+    print(f"CPU на облигацию: {result['cpu'] / count * 1e6:.1f} мкс")
+    print(f"время на облигацию: {result['wall'] / count * 1e6:.1f} мкс")
+    print(f"пик памяти на страницу {args.page}: {result['peak'] / 1024:.1f} КиБ")
+
+
+if __name__ == "__main__":
+    main()
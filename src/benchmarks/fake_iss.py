@@ -0,0 +1,322 @@
+"""Локальная замена ISS Московской биржи для бенчмарков.
+
+Отдает синтетические (или записанные) ответы securities, description,
+marketdata и bondization с настраиваемой задержкой и долей ошибок.
+
+Отдельный запуск из каталога src:
+    python -m benchmarks.fake_iss --bonds 3000 --latency 0.02 --port 8765
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+import argparse
+import asyncio
+import random
+
+from aiohttp import web
+
+
+def _secids(bonds: int) -> list[str]:
+    return [f"RU{i:06d}" for i in range(bonds)]
+
+
+def _bond(secid: str) -> dict:
+    """Детерминированные параметры синтетической облигации"""
+    rnd = random.Random(secid)
+    today = date.today()
+    matdate = today + timedelta(days=rnd.randint(90, 3650))
+    frequency = rnd.choice((2, 4, 12))
+    period = 365 // frequency
+    rate = round(rnd.uniform(5, 25), 2)
+    face_value = 1000
+    # Флоатеры без известных значений будущих купонов
+    floater = rnd.random() < 0.1
+    coupons = []
+    coupon_date = matdate
+    while coupon_date > today - timedelta(days=3 * 365):
+        value = round(face_value * rate / 100 / frequency, 2)
+        future = coupon_date > today + timedelta(days=period)
+        if floater and future:
+            coupons.append([coupon_date.isoformat(), None, None])
+        else:
+            coupons.append([coupon_date.isoformat(), value, rate])
+        coupon_date -= timedelta(days=period)
+    coupons.reverse()
+    next_coupon = next(
+        (date.fromisoformat(i[0]) for i in coupons if i[0] > today.isoformat()),
+        matdate,
+    )
+    return {
+        "secid": secid,
+        "shortname": f"Обл {secid[-6:]}",
+        "matdate": matdate,
+        "face_value": face_value,
+        "list_level": rnd.randint(1, 3),
+        "frequency": frequency,
+        "period": period,
+        "rate": rate,
+        "next_coupon": next_coupon,
+        "coupon_value": round(face_value * rate / 100 / frequency, 2),
+        "accint": round(rnd.uniform(0, face_value * rate / 100 / frequency), 2),
+        "price": round(rnd.uniform(70, 105), 2),
+        "yield": round(rnd.uniform(5, 30), 2),
+        "type": rnd.choice(("corporate_bond", "exchange_bond", "ofz_bond")),
+        # Бумаги для квалифицированных инвесторов и с повышенным риском
+        "qualified": rnd.random() < 0.05,
+        "highrisk": rnd.random() < 0.05,
+        "coupons": coupons,
+    }
+
+
+def _description(bond: dict) -> dict:
+    description = {
+        "SECID": bond["secid"],
+        "NAME": f"Облигация {bond['secid']}",
+        "SHORTNAME": bond["shortname"],
+        "ISIN": bond["secid"],
+        "REGNUMBER": f"4B02-{bond['secid'][-6:]}",
+        "ISSUESIZE": "1000000",
+        "FACEVALUE": str(bond["face_value"]),
+        "FACEUNIT": "SUR",
+        "ISSUEDATE": "2020-01-15",
+        "MATDATE": bond["matdate"].isoformat(),
+        "INITIALFACEVALUE": str(bond["face_value"]),
+        "LATNAME": f"Bond {bond['secid']}",
+        "LISTLEVEL": str(bond["list_level"]),
+        "ISQUALIFIEDINVESTORS": str(int(bond["qualified"])),
+        "COUPONFREQUENCY": str(bond["frequency"]),
+        "COUPONDATE": bond["next_coupon"].isoformat(),
+        "COUPONPERCENT": str(bond["rate"]),
+        "COUPONVALUE": str(bond["coupon_value"]),
+        "DAYSTOREDEMPTION": str((bond["matdate"] - date.today()).days),
+        "HIGHRISK": str(int(bond["highrisk"])),
+        "TYPENAME": "Корпоративная облигация",
+        "GROUP": "stock_bonds",
+        "TYPE": bond["type"],
+        "GROUPNAME": "Облигации",
+        "EMITTER_ID": "1",
+    }
+    return {
+        "description": {
+            "columns": ["name", "value"],
+            "data": [list(i) for i in description.items()],
+        }
+    }
+
+
+def _market_row(bond: dict) -> dict:
+    return {
+        "SECID": bond["secid"],
+        "SHORTNAME": bond["shortname"],
+        "LATNAME": f"Bond {bond['secid']}",
+        "REGNUMBER": f"4B02-{bond['secid'][-6:]}",
+        "MATDATE": bond["matdate"].isoformat(),
+        "FACEVALUE": bond["face_value"],
+        "FACEUNIT": "SUR",
+        "LISTLEVEL": bond["list_level"],
+        "COUPONPERIOD": bond["period"],
+        "NEXTCOUPON": bond["next_coupon"].isoformat(),
+        "COUPONPERCENT": bond["rate"],
+        "COUPONVALUE": bond["coupon_value"],
+        "ACCRUEDINT": bond["accint"],
+        "ISSUESIZE": 1000000,
+    }
+
+
+def _marketdata_row(bond: dict) -> dict:
+    return {
+        "SECID": bond["secid"],
+        "LAST": bond["price"],
+        "MARKETPRICE": bond["price"],
+        "YIELD": bond["yield"],
+    }
+
+
+def _table(rows: list[dict], columns: str | None = None) -> dict:
+    """Блок columns/data, при заданном columns - только запрошенные колонки"""
+    names = list(rows[0]) if rows else []
+    if columns:
+        wanted = [i.strip().upper() for i in columns.split(",")]
+        names = [i for i in names if i.upper() in wanted]
+    return {"columns": names, "data": [[row[i] for i in names] for row in rows]}
+
+
+def _bondization(bond: dict) -> dict:
+    return {
+        "amortizations": {
+            "columns": ["amortdate", "facevalue", "value", "valueprc"],
+            "data": [
+                [
+                    bond["matdate"].isoformat(),
+                    bond["face_value"],
+                    bond["face_value"],
+                    100,
+                ]
+            ],
+        },
+        "coupons": {
+            "columns": ["coupondate", "value", "valueprc"],
+            "data": bond["coupons"],
+        },
+    }
+
+
+class FakeIss:
+    """Приложение aiohttp, имитирующее используемые методы ISS"""
+
+    def __init__(
+        self,
+        bonds: int = 3000,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        payload_dir: str | None = None,
+        seed: int = 0,
+    ) -> None:
+        self.secids = _secids(bonds)
+        self.bonds = {secid: _bond(secid) for secid in self.secids}
+        self.latency = latency
+        self.error_rate = error_rate
+        # Записанные ответы ISS: <payload_dir>/<тип>/<secid>.json
+        self.payload_dir = Path(payload_dir) if payload_dir else None
+        self.random = random.Random(seed)
+        self.counts = Counter()
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/iss/securities.json", self.listing)
+        app.router.add_get(
+            "/iss/securities/{secid}/bondization.json", self.bondization
+        )
+        app.router.add_get("/iss/securities/{secid}.json", self.description)
+        app.router.add_get(
+            "/iss/engines/stock/markets/bonds/securities/{secid}.json",
+            self.marketdata,
+        )
+        app.router.add_get(
+            "/iss/engines/stock/markets/bonds/securities.json", self.market
+        )
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.counts["requests"] += 1
+        if self.latency:
+            # Задержка с разбросом +-50%
+            await asyncio.sleep(self.latency * self.random.uniform(0.5, 1.5))
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.counts["errors"] += 1
+            return web.Response(status=self.random.choice((429, 500, 503)))
+        return await handler(request)
+
+    def _recorded(self, kind: str, secid: str) -> web.FileResponse | None:
+        if self.payload_dir is None:
+            return None
+        path = self.payload_dir / kind / f"{secid}.json"
+        if path.exists():
+            return web.FileResponse(path, headers={"Content-Type": "application/json"})
+        return None
+
+    async def listing(self, request: web.Request) -> web.Response:
+        self.counts["listing"] += 1
+        start = int(request.query.get("start", 0))
+        rows = [
+            {
+                "secid": secid,
+                "isin": secid,
+                "name": f"Облигация {secid}",
+                "type": self.bonds[secid]["type"],
+                "group": "stock_bonds",
+                "emitent_id": 1,
+            }
+            for secid in self.secids[start : start + 100]
+        ]
+        columns = request.query.get("securities.columns", "secid")
+        block = _table(rows, columns)
+        if not rows:
+            block["columns"] = [i.strip() for i in columns.split(",")]
+        return web.json_response({"securities": block})
+
+    async def description(self, request: web.Request) -> web.StreamResponse:
+        self.counts["description"] += 1
+        secid = request.match_info["secid"]
+        recorded = self._recorded("description", secid)
+        if recorded is not None:
+            return recorded
+        if secid not in self.bonds:
+            return web.json_response({"description": {"columns": [], "data": []}})
+        return web.json_response(_description(self.bonds[secid]))
+
+    async def marketdata(self, request: web.Request) -> web.StreamResponse:
+        self.counts["marketdata"] += 1
+        secid = request.match_info["secid"]
+        recorded = self._recorded("marketdata", secid)
+        if recorded is not None:
+            return recorded
+        bond = self.bonds[secid]
+        return web.json_response(
+            {
+                "securities": _table([_market_row(bond)]),
+                "marketdata": _table(
+                    [_marketdata_row(bond)],
+                    request.query.get("marketdata.columns"),
+                ),
+            }
+        )
+
+    async def market(self, request: web.Request) -> web.Response:
+        self.counts["market"] += 1
+        bonds = [self.bonds[secid] for secid in self.secids]
+        return web.json_response(
+            {
+                "securities": _table(
+                    [_market_row(i) for i in bonds],
+                    request.query.get("securities.columns"),
+                ),
+                "marketdata": _table(
+                    [_marketdata_row(i) for i in bonds],
+                    request.query.get("marketdata.columns"),
+                ),
+            }
+        )
+
+    async def bondization(self, request: web.Request) -> web.StreamResponse:
+        self.counts["bondization"] += 1
+        secid = request.match_info["secid"]
+        recorded = self._recorded("bondization", secid)
+        if recorded is not None:
+            return recorded
+        return web.json_response(_bondization(self.bonds[secid]))
+
+
+async def start(fake: FakeIss, host: str = "127.0.0.1", port: int = 0):
+    """Запуск сервера, возвращает runner и адрес для MOEX_ISS_URL"""
+    runner = web.AppRunner(fake.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bonds", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-dir")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    fake = FakeIss(
+        bonds=args.bonds,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        payload_dir=args.payload_dir,
+    )
+    web.run_app(fake.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
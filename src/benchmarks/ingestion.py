@@ -0,0 +1,111 @@
+"""Бенчмарк полного обновления: ContextStrategy -> MoexORM.update_data.
+
+ISS подменяется локальным сервером benchmarks.fake_iss, запись в БД
+выполняется в PostgreSQL из настроек database.base (флаг --db).
+
+Запуск из каталога src:
+    python -m benchmarks.ingestion --bonds 3000 --latency 0.02 --db
+"""
+
+from time import perf_counter
+import argparse
+import asyncio
+
+from benchmarks.fake_iss import FakeIss, start
+from services.moex import ContextStrategy, MoexStrategy
+
+
+class TimedWriter:
+    """Обертка над update_data с замером времени записи"""
+
+    def __init__(self, update_data=None) -> None:
+        self.update_data = update_data
+        self.seconds = 0.0
+        self.calls = 0
+        self.bonds = 0
+
+    def __call__(self, bonds: list):
+        start = perf_counter()
+        if self.update_data is not None:
+            self.update_data(bonds=bonds)
+        self.seconds += perf_counter() - start
+        self.calls += 1
+        self.bonds += len(bonds)
+
+
+async def run(args) -> dict:
+    fake = FakeIss(
+        bonds=args.bonds,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        payload_dir=args.payload_dir,
+    )
+    runner, url = await start(fake)
+    MoexStrategy._API_MOEX_URL = url
+
+    static_repository = None
+    update_data = None
+    if args.db:
+        from repositories.bond import MoexORM, MoexStaticORM
+
+        static_repository = MoexStaticORM
+        update_data = MoexORM.update_data
+    elif args.incremental:
+        raise SystemExit("Инкрементальный режим требует --db")
+    writer = TimedWriter(update_data=update_data)
+
+    context = ContextStrategy(
+        bulk=args.bulk,
+        incremental=args.incremental,
+        static_repository=static_repository,
+        processes=args.processes,
+    )
+    try:
+        start_time = perf_counter()
+        report = await context.execute_strategy(update_data=writer)
+        elapsed = perf_counter() - start_time
+    finally:
+        await runner.cleanup()
+
+    return {
+        "bonds": writer.bonds,
+        "elapsed": elapsed,
+        "requests": fake.counts["requests"],
+        "errors": fake.counts["errors"],
+        "db_seconds": writer.seconds,
+        "db_calls": writer.calls,
+        "counts": dict(fake.counts),
+        "report": report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bonds", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.02, help="сек")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-dir", help="каталог записанных ответов ISS")
+    parser.add_argument("--bulk", action="store_true")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--db", action="store_true", help="запись в PostgreSQL")
+    parser.add_argument("--processes", type=int, default=1, help="процессов обработки")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    elapsed = result["elapsed"]
+    print(f"облигаций записано: {result['bonds']}")
+    print(f"время обновления: {elapsed:.2f} сек")
+    print(
+        f"запросов к ISS: {result['requests']} "
+        f"({result['requests'] / elapsed:.0f} в сек), ошибок: {result['errors']}"
+    )
+    print(
+        f"запись в БД: {result['db_seconds']:.2f} сек за {result['db_calls']} вызовов"
+    )
+    print(f"запросы по типам: {result['counts']}")
+    print(f"этапы, сек: {result['report']['stages']}")
+    print(f"пропущено облигаций: {result['report']['skipped']}")
+
+
+if __name__ == "__main__":
+    main()
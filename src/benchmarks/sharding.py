@@ -0,0 +1,109 @@
+"""Бенчмарк масштабирования загрузки по процессам: ContextStrategy(processes=N).
+
+ISS подменяется benchmarks.fake_iss, запущенным в отдельных процессах на
+общем порту (SO_REUSEPORT), чтобы сервер не делил ядро с координатором.
+Запись в БД не выполняется, частота запросов не ограничивается.
+
+Запуск из каталога src:
+    python -m benchmarks.sharding --bonds 5000 --processes 1 2 4 8
+"""
+
+from time import perf_counter
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+
+from aiohttp import web
+
+from benchmarks.fake_iss import FakeIss
+from benchmarks.ingestion import TimedWriter
+from services.moex import ContextStrategy, MoexStrategy
+
+
+def _serve(bonds: int, latency: float, port: int):
+    """Процесс сервера ISS, все процессы слушают один порт"""
+    fake = FakeIss(bonds=bonds, latency=latency)
+    web.run_app(
+        fake.app(),
+        host="127.0.0.1",
+        port=port,
+        reuse_port=True,
+        access_log=None,
+        print=None,
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_port(port: int, timeout: float = 30):
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            pass
+    raise SystemExit(f"Сервер ISS не запустился на порту {port}")
+
+
+async def run(processes: int, bulk: bool) -> tuple[float, int]:
+    writer = TimedWriter()
+    context = ContextStrategy(bulk=bulk, processes=processes)
+    start = perf_counter()
+    await context.execute_strategy(update_data=writer)
+    return perf_counter() - start, writer.bonds
+
+
+def main():
+    cpu = os.cpu_count() or 1
+    default = sorted({1, *(2**i for i in range(1, 6) if 2**i <= cpu), cpu})
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bonds", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="сек")
+    parser.add_argument("--processes", type=int, nargs="+", default=default)
+    parser.add_argument(
+        "--iss-processes", type=int, default=cpu, help="процессов сервера ISS"
+    )
+    parser.add_argument("--bulk", action="store_true")
+    args = parser.parse_args()
+
+    # Лимит частоты запросов к настоящему ISS в замере не нужен
+    os.environ["MOEX_RATE_LIMIT"] = "0"
+    port = _free_port()
+    context = multiprocessing.get_context("spawn")
+    servers = [
+        context.Process(
+            target=_serve, args=(args.bonds, args.latency, port), daemon=True
+        )
+        for _ in range(args.iss_processes)
+    ]
+    for server in servers:
+        server.start()
+    _wait_port(port)
+    MoexStrategy._API_MOEX_URL = f"http://127.0.0.1:{port}"
+
+    print(f"ядер: {cpu}, облигаций: {args.bonds}, процессов ISS: {len(servers)}")
+    print("процессов  время, сек  облигаций/сек  ускорение")
+    try:
+        base = None
+        for processes in args.processes:
+            elapsed, bonds = asyncio.run(run(processes, args.bulk))
+            base = base or elapsed
+            print(
+                f"{processes:>9}  {elapsed:>10.2f}  {bonds / elapsed:>13.0f}"
+                f"  {base / elapsed:>9.2f}"
+            )
+    finally:
+        for server in servers:
+            server.terminate()
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,35 @@
-from repositories.bond import MoexORM
+import os
+from datetime import date
+from time import perf_counter
 
+from fastapi import Query
 
-def fastapi_service(
+from repositories.bond import AbstractRepository, MoexAsyncHistoryORM, MoexAsyncORM
+from services.calc import COMMISSION, TAX
+from services.fastapi import api_metrics, screener_cache
+
+
+# Наибольшее число облигаций в ответе скринера
+MAX_LIMIT = 1000
+# Границы комиссии брокера и налога, %
+MAX_COMMISSION = 10
+MAX_TAX = 100
+
+
+def get_repository() -> type[AbstractRepository]:
+    """Выбор источника данных скринера: sql (PostgreSQL) или memory (снимок)"""
+    backend = os.getenv("SCREENER_BACKEND", default="sql")
+    if backend == "memory":
+        from repositories.snapshot import MoexSnapshotORM
+
+        return MoexSnapshotORM
+    return MoexAsyncORM
+
+
+repository = get_repository()
+
+
+async def fastapi_service(
     fields: str | None = None,
     max_year_percent: int | None = None,
     min_year_percent: int | None = None,
@@ -13,7 +41,16 @@ def fastapi_service(
     min_days_to_redemption: int | None = None,
     ofz_bonds: bool | None = None,
     face_unit: str | None = None,
-    limit: int | None = None,
+    # Проверка на входе: PostgreSQL и снимок в памяти по-разному
+    # обрабатывают недопустимый LIMIT
+    limit: int | None = Query(None, ge=1, le=MAX_LIMIT),
+    # При отрицательной комиссии цена покупки в расчете доходности
+    # может стать нулевой
+    commission: float | None = Query(
+        None, ge=0, le=MAX_COMMISSION, allow_inf_nan=False
+    ),
+    tax: float | None = Query(None, ge=0, le=MAX_TAX, allow_inf_nan=False),
+    as_of: date | None = None,
 ):
     if fields is None:
         fields_list = [
@@ -52,21 +89,48 @@ def fastapi_service(
         min_days_to_redemption = 500
     if limit is None:
         limit = 50
+    if commission is None:
+        commission = COMMISSION
+    if tax is None:
+        tax = TAX
 
     between_year_percent = (min_year_percent, max_year_percent)
     between_list_level = (min_list_level, max_list_level)
     between_days_to_redemption = (min_days_to_redemption, max_days_to_redemption)
 
-    result = MoexORM.select_bonds(
+    filters = dict(
         fields=fields_list,
         year_percent=between_year_percent,
         list_level=between_list_level,
         amortizations=amortizations,
         floater=floater,
         days_to_redemption=between_days_to_redemption,
-        ofz_bonds=ofz_bonds,
-        face_unit=face_unit,
+        ofz_bonds=bool(ofz_bonds),
+        face_unit=None if face_unit == "all" else face_unit,
         limit=limit,
+        commission=commission,
+        tax=tax,
+    )
+    key = tuple(
+        tuple(value) if isinstance(value, list) else value
+        for value in filters.values()
+    ) + (as_of,)
+
+    async def loader():
+        start = perf_counter()
+        if as_of is not None:
+            # Скринер по истории на дату
+            result = await MoexAsyncHistoryORM.select_bonds_as_of(as_of, **filters)
+        else:
+            result = await repository.select_bonds(**filters)
+        api_metrics.observe_query(perf_counter() - start, filters)
+        return result
+
+    result = await screener_cache.get_or_load(
+        key=key,
+        loader=loader,
+        # Версия того же источника, из которого загружается результат
+        version_loader=repository.data_version,
     )
 
     return result
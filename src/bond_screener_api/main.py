@@ -1,17 +1,55 @@
+from contextlib import asynccontextmanager
+from datetime import date
+from time import perf_counter
 from typing import Annotated
 from fastapi import FastAPI, Depends, Query, Request
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from database.base import async_engine
+from repositories.bond import MoexAsyncHistoryORM
 from schemas.bond import ColumnGroupModel
+from services.fastapi import api_metrics, screener_cache
 import uvicorn
 
 # from api import router as api_router
 from dependencies import fastapi_service
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Закрытие пула соединений при остановке процесса
+    await async_engine.dispose()
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSON-ответ с замером времени сериализации"""
+
+    def render(self, content) -> bytes:
+        with api_metrics.stage("serialize"):
+            return super().render(content)
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
 templates = Jinja2Templates(directory="templates")
 
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """Время ответа по шаблону пути, а не по фактическому URL"""
+    start = perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        api_metrics.observe_request(
+            request.method, path, status, perf_counter() - start
+        )
+
 # app.include_router(api_router.router)
 
 
@@ -25,6 +63,35 @@ async def get_bonds(fastapi_service: Annotated[dict, Depends(fastapi_service)]):
     return fastapi_service
 
 
+@app.get("/bonds/{secid}/history")
+async def get_bond_history(
+    secid: str, date_from: date | None = None, date_to: date | None = None
+):
+    """Цена и доходность облигации по датам загрузки"""
+    start = perf_counter()
+    result = await MoexAsyncHistoryORM.select_history(
+        secid=secid, date_from=date_from, date_to=date_to
+    )
+    api_metrics.observe_query(
+        perf_counter() - start,
+        {"secid": secid, "date_from": date_from, "date_to": date_to},
+    )
+    return result
+
+
+@app.get("/cache_stats")
+async def get_cache_stats():
+    return screener_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(
+        api_metrics.render(cache=screener_cache, pool=async_engine.pool),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 @app.get("/view_bonds", response_class=HTMLResponse)
 async def get_view_bonds(
     request: Request,
@@ -42,24 +109,26 @@ async def get_view_bonds(
 ):
     columns = fastapi_service.columns
     data = fastapi_service.data
-    return templates.TemplateResponse(
-        request=request,
-        name="index.html",
-        context={
-            "columns": columns,
-            "data": data,
-            "max_year_percent": max_year_percent,
-            "min_year_percent": min_year_percent,
-            "max_list_level": max_list_level,
-            "min_list_level": min_list_level,
-            "amortizations": amortizations,
-            "floater": floater,
-            "ofz_bonds": ofz_bonds,
-            "max_days_to_redemption": max_days_to_redemption,
-            "min_days_to_redemption": min_days_to_redemption,
-            "face_unit": face_unit,
-        },
-    )
+    # Шаблон отрисовывается при создании ответа
+    with api_metrics.stage("render"):
+        return templates.TemplateResponse(
+            request=request,
+            name="index.html",
+            context={
+                "columns": columns,
+                "data": data,
+                "max_year_percent": max_year_percent,
+                "min_year_percent": min_year_percent,
+                "max_list_level": max_list_level,
+                "min_list_level": min_list_level,
+                "amortizations": amortizations,
+                "floater": floater,
+                "ofz_bonds": ofz_bonds,
+                "max_days_to_redemption": max_days_to_redemption,
+                "min_days_to_redemption": min_days_to_redemption,
+                "face_unit": face_unit,
+            },
+        )
 
 
 if __name__ == "__main__":
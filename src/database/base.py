@@ -1,5 +1,6 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 
@@ -8,9 +9,26 @@ password = os.getenv("POSTGRES_PASSWORD", default="password")
 host = os.getenv("POSTGRES_HOST", default="localhost")
 db = os.getenv("POSTGRES_DB", default="moex")
 port = os.getenv("POSTGRES_PORT", default=5432)
+# Пул соединений асинхронного движка (на один процесс uvicorn)
+pool_size = int(os.getenv("POSTGRES_POOL_SIZE", default=10))
+max_overflow = int(os.getenv("POSTGRES_MAX_OVERFLOW", default=10))
 
 url = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{db}"
 
 engine = create_engine(url=url, echo=False)
 
 session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_url = f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{db}"
+
+async_engine = create_async_engine(
+    url=async_url,
+    echo=False,
+    pool_size=pool_size,
+    max_overflow=max_overflow,
+    pool_pre_ping=True,
+)
+
+async_session_factory = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
@@ -1,6 +1,7 @@
 from datetime import datetime, date
 from typing import Annotated
-from sqlalchemy import text
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, desc, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
@@ -15,6 +16,23 @@ class Base(DeclarativeBase):
 
 class MoexBonds(Base):
     __tablename__ = "bonds"
+    __table_args__ = (
+        UniqueConstraint("secid", name="uq_bonds_secid"),
+        # Индекс под запрос скринера MoexORM.select_bonds
+        Index(
+            "ix_bonds_screener",
+            "amortizations",
+            "floater",
+            desc("year_percent"),
+            postgresql_include=[
+                "list_level",
+                "days_to_redemption",
+                "face_unit",
+                "type",
+            ],
+            postgresql_where=text("highrisk IS false AND sum_coupon > 10"),
+        ),
+    )
 
     id: Mapped[intpk]
     shortname: Mapped[str]
@@ -51,3 +69,156 @@ class MoexBonds(Base):
     #         author_id=self.author_id,
     #         assignee_id=self.assignee_id,
     #     )
+
+
+class MoexBondSnapshots(Base):
+    """История облигаций: копия строк bonds на дату загрузки
+
+    Таблица секционирована по месяцам snapshot_date, секции создаются
+    при записи (MoexHistoryORM.ensure_partition) и удаляются целиком
+    по сроку хранения.
+    """
+
+    __tablename__ = "bond_snapshots"
+    __table_args__ = (
+        # Доходность бумаги за период
+        Index("ix_bond_snapshots_secid", "secid", "snapshot_date"),
+        # Скринер на дату, условие совпадает с ix_bonds_screener
+        Index(
+            "ix_bond_snapshots_screener",
+            "snapshot_date",
+            "amortizations",
+            "floater",
+            desc("year_percent"),
+            postgresql_include=[
+                "list_level",
+                "days_to_redemption",
+                "face_unit",
+                "type",
+            ],
+            postgresql_where=text("highrisk IS false AND sum_coupon > 10"),
+        ),
+        {"postgresql_partition_by": "RANGE (snapshot_date)"},
+    )
+
+    snapshot_date: Mapped[date] = mapped_column(primary_key=True)
+    secid: Mapped[str] = mapped_column(primary_key=True)
+    captured_at: Mapped[datetime] = mapped_column(
+        server_default=text("TIMEZONE('utc', now())"),
+    )
+    shortname: Mapped[str]
+    matdate: Mapped[date]
+    face_unit: Mapped[str]
+    list_level: Mapped[int]
+    days_to_redemption: Mapped[int]
+    face_value: Mapped[float]
+    coupon_frequency: Mapped[int]
+    coupon_date: Mapped[date]
+    coupon_percent: Mapped[float]
+    coupon_value: Mapped[float]
+    highrisk: Mapped[bool]
+    type: Mapped[str]
+    accint: Mapped[float]
+    accint_percent: Mapped[float]
+    price: Mapped[float]
+    moex_yield: Mapped[float]
+    amortizations: Mapped[bool]
+    floater: Mapped[bool]
+    sum_coupon: Mapped[float]
+    sum_coupon_percent: Mapped[float]
+    year_percent: Mapped[float]
+
+
+class MoexBondStatic(Base):
+    """Сохраненные описания и графики купонов для инкрементальной загрузки"""
+
+    __tablename__ = "bond_static"
+
+    secid: Mapped[str] = mapped_column(primary_key=True)
+    description: Mapped[dict | None] = mapped_column(JSONB)
+    description_fetched_at: Mapped[datetime | None]
+    bondization_fetched_at: Mapped[datetime | None]
+    listing_hash: Mapped[str | None]
+    content_hash: Mapped[str | None]
+
+
+class MoexCoupons(Base):
+    """График купонов облигации"""
+
+    __tablename__ = "coupons"
+
+    secid: Mapped[str] = mapped_column(primary_key=True)
+    coupon_date: Mapped[date] = mapped_column(primary_key=True)
+    value: Mapped[float | None]
+    valueprc: Mapped[float | None]
+
+
+class MoexAmortizations(Base):
+    """График амортизации (погашения номинала) облигации"""
+
+    __tablename__ = "amortizations"
+
+    secid: Mapped[str] = mapped_column(primary_key=True)
+    amort_date: Mapped[date] = mapped_column(primary_key=True)
+    face_value: Mapped[float | None]
+    value: Mapped[float | None]
+    valueprc: Mapped[float | None]
+
+
+class MoexIngestionRuns(Base):
+    """Запуски загрузки облигаций с отчетом по этапам"""
+
+    __tablename__ = "ingestion_runs"
+
+    id: Mapped[intpk]
+    started_at: Mapped[datetime] = mapped_column(
+        server_default=text("TIMEZONE('utc', now())"),
+    )
+    finished_at: Mapped[datetime | None]
+    # running, success, failed
+    status: Mapped[str]
+    mode: Mapped[str]
+    bonds: Mapped[int] = mapped_column(server_default=text("0"))
+    report: Mapped[dict | None] = mapped_column(JSONB)
+    # Запуск, облигации с ошибкой которого загружаются повторно (mode retry)
+    parent_id: Mapped[int | None] = mapped_column(
+        ForeignKey("ingestion_runs.id", ondelete="SET NULL")
+    )
+
+
+class MoexIngestionRunItems(Base):
+    """Контрольные точки запуска загрузки по облигациям
+
+    Запуск, прерванный сбоем или перезапуском, продолжается с облигаций
+    без записи, облигации со статусом failed загружаются повторно.
+    """
+
+    __tablename__ = "ingestion_run_items"
+
+    run_id: Mapped[int] = mapped_column(
+        ForeignKey("ingestion_runs.id", ondelete="CASCADE"), primary_key=True
+    )
+    secid: Mapped[str] = mapped_column(primary_key=True)
+    # Номер страницы списка бумаг, на которой получена облигация
+    page: Mapped[int | None]
+    # done - записана, skipped - отброшена фильтрами, failed - ошибка запроса
+    status: Mapped[str]
+    reason: Mapped[str | None]
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=text("TIMEZONE('utc', now())"),
+    )
+
+
+class MoexJobRuns(Base):
+    """Последний запуск задач планировщика"""
+
+    __tablename__ = "job_runs"
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    # Время запуска по расписанию (UTC), по нему догоняются пропущенные запуски
+    scheduled_at: Mapped[datetime]
+    started_at: Mapped[datetime]
+    finished_at: Mapped[datetime | None]
+    # running, success, failed
+    status: Mapped[str]
+    error: Mapped[str | None]
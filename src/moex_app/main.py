@@ -1,21 +1,103 @@
-from repositories.bond import MoexORM
+from repositories.bond import (
+    MoexHistoryORM,
+    MoexJobORM,
+    MoexORM,
+    MoexRunORM,
+    MoexScheduleORM,
+    MoexStaticORM,
+)
+from services.history import HistoryMaintenance
+from services.intraday import PriceRefresh
 from services.moex import ContextStrategy
-from services.task_manager import task_schedule
+from services.moex_client import MoexClient
+from services.recalc import BondRecalc
+from services.task_manager import Scheduler
 import asyncio
+import os
+import sys
 
 
 # Найминг функции
-async def update_task():
-    context = ContextStrategy()
+async def update_task(client: MoexClient | None = None):
+    context = ContextStrategy(
+        static_repository=MoexStaticORM,
+        run_repository=MoexRunORM,
+        history_repository=MoexHistoryORM,
+        client=client,
+    )
     update_data = MoexORM.update_data
     await context.execute_strategy(update_data=update_data)
 
 
-@task_schedule(hour=0, minute=0)
+async def retry_task():
+    """Повторная загрузка облигаций, не загруженных из-за ошибок запросов"""
+    context = ContextStrategy(
+        static_repository=MoexStaticORM,
+        run_repository=MoexRunORM,
+        history_repository=MoexHistoryORM,
+    )
+    await context.retry_failed(update_data=MoexORM.update_data)
+
+
+async def history_task(client: MoexClient | None = None):
+    """Прореживание и удаление устаревшей истории облигаций"""
+    await asyncio.to_thread(HistoryMaintenance(repository=MoexHistoryORM).execute)
+
+
+def recalc_task():
+    """Пересчет доходности по сохраненным графикам купонов без запросов к MOEX"""
+    BondRecalc(repository=MoexORM, schedule_repository=MoexScheduleORM).execute()
+
+
+async def intraday_task():
+    """Обновление цен во время торговой сессии по таблице marketdata"""
+    refresh = PriceRefresh(repository=MoexORM, schedule_repository=MoexScheduleORM)
+    await refresh.run()
+
+
 def main():
-    asyncio.run(update_task())
+    scheduler = Scheduler(run_repository=MoexJobORM)
+    scheduler.add_job(
+        "full_refresh",
+        update_task,
+        cron=os.getenv("SCHEDULE_FULL_REFRESH", default="0 0 * * *"),
+        trading_days=True,
+        catch_up=True,
+    )
+
+    scheduler.add_job(
+        "history_maintenance",
+        history_task,
+        cron=os.getenv("SCHEDULE_HISTORY_MAINTENANCE", default="30 1 * * *"),
+        catch_up=True,
+    )
+
+    refresh = PriceRefresh(repository=MoexORM, schedule_repository=MoexScheduleORM)
+
+    async def intraday_prices(client: MoexClient):
+        # Торговый день проверяет планировщик, время сессии - PriceRefresh
+        if refresh.in_window():
+            refresh.strategy.client = client
+            updated = await refresh.execute()
+            refresh.log.info("Обновлено цен: %d", updated)
+
+    # Пустое расписание отключает обновление цен
+    intraday_cron = os.getenv("SCHEDULE_INTRADAY", default="* 10-18 * * *")
+    if intraday_cron:
+        scheduler.add_job(
+            "intraday_prices", intraday_prices, cron=intraday_cron, trading_days=True
+        )
+
+    asyncio.run(scheduler.run())
 
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == ["recalc"]:
+        recalc_task()
+    elif sys.argv[1:] == ["retry"]:
+        asyncio.run(retry_task())
+    elif sys.argv[1:] == ["intraday"]:
+        asyncio.run(intraday_task())
+    else:
+        main()
     # asyncio.run(update_task())
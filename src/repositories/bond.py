@@ -1,9 +1,50 @@
 # TODO Добавление динамических фильтров к запросу по образцу
 from abc import ABC, abstractmethod
 
-from database.base import session_factory
-from models.bond import MoexBonds
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import (
+    Float,
+    Numeric,
+    Select,
+    cast,
+    delete,
+    func,
+    literal_column,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import asyncpg
+from sqlalchemy.dialects.postgresql import insert
+
+from database.base import async_session_factory, session_factory
+from models.bond import (
+    MoexAmortizations,
+    MoexBonds,
+    MoexBondSnapshots,
+    MoexBondStatic,
+    MoexCoupons,
+    MoexIngestionRunItems,
+    MoexIngestionRuns,
+    MoexJobRuns,
+)
 from schemas.bond import ColumnGroupModel
+from services.calc import COMMISSION, TAX, YEAR
+
+
+def year_percent_expr(commission: float, tax: float, table=MoexBonds):
+    """Годовая доходность выражением SQL (аналог calc.calc_year_percent)"""
+    buy_price = table.price + table.accint_percent
+    final_price = buy_price + buy_price * commission / 100
+    sold_delta = 100 - final_price
+    sold_tax = func.greatest(0, sold_delta * tax / 100)
+    coupon_tax = table.sum_coupon_percent * tax / 100
+    income = (sold_delta + table.sum_coupon_percent) - (sold_tax + coupon_tax)
+    profit = income / final_price * 100
+    day_percent = profit / table.days_to_redemption
+
+    return cast(func.round(cast(day_percent * YEAR, Numeric), 2), Float)
 
 
 class AbstractRepository(ABC):
@@ -23,6 +64,24 @@ class AbstractRepository(ABC):
 class MoexORM(AbstractRepository):
     """Класс работы с таблицей bonds"""
 
+    # Поля, обновляемые у существующей записи
+    _UPDATE_FIELDS = (
+        "list_level",
+        "days_to_redemption",
+        "face_value",
+        "coupon_date",
+        "coupon_percent",
+        "coupon_value",
+        "sum_coupon",
+        "sum_coupon_percent",
+        "highrisk",
+        "price",
+        "accint",
+        "accint_percent",
+        "moex_yield",
+        "year_percent",
+    )
+
     @staticmethod
     def insert_data(bonds: list):
         with session_factory() as session:
@@ -30,47 +89,64 @@ class MoexORM(AbstractRepository):
             session.add_all(moex_bond)
             session.commit()
 
+    @staticmethod
+    def _upsert_statement(bonds: list):
+        """INSERT ... ON CONFLICT по secid и параметры для executemany.
+
+        Запрос один на все строки и компилируется один раз, пачки VALUES
+        по строкам собирает драйвер (insertmanyvalues SQLAlchemy).
+        """
+        # Повтор secid в одном INSERT ... ON CONFLICT недопустим
+        bonds = list({bond["secid"]: bond for bond in bonds}.values())
+        stmt = insert(MoexBonds)
+        set_ = {field: stmt.excluded[field] for field in MoexORM._UPDATE_FIELDS}
+        set_["last_updated"] = text("TIMEZONE('utc', now())")
+        stmt = stmt.on_conflict_do_update(constraint="uq_bonds_secid", set_=set_)
+
+        return stmt, bonds
+
     @staticmethod
     def update_data(bonds: list):
-        moex_bond = [MoexBonds(**i) for i in bonds]
+        """Вставка новых и обновление существующих облигаций по secid"""
+        if not bonds:
+            return
+
+        bonds, schedules = MoexScheduleORM.split_schedules(bonds)
         with session_factory() as session:
-            for bond in moex_bond:
-                existing_record = (
-                    session.query(MoexBonds)
-                    .filter(MoexBonds.secid == bond.secid)
-                    .first()
-                )
+            session.execute(*MoexORM._upsert_statement(bonds))
+            for stmt, params in MoexScheduleORM._replace_statements(schedules):
+                session.execute(stmt, params)
+            session.commit()
+
+    @staticmethod
+    def select_calc_data() -> list[dict]:
+        """Данные облигаций, необходимые для пересчета доходности"""
+        query = select(
+            MoexBonds.id,
+            MoexBonds.secid,
+            MoexBonds.matdate,
+            MoexBonds.face_value,
+            MoexBonds.coupon_frequency,
+            MoexBonds.price,
+            MoexBonds.moex_yield,
+        )
+        with session_factory() as session:
+            rows = session.execute(query).mappings().all()
+
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def update_calculated(rows: list[dict]):
+        """Обновление расчетных полей по id одним пакетом"""
+        if not rows:
+            return
+
+        with session_factory() as session:
+            session.execute(update(MoexBonds), rows)
+            session.commit()
 
-                if existing_record:
-                    # Если запись найдена, обновляем ее
-                    fields_to_update = [
-                        "list_level",
-                        "days_to_redemption",
-                        "face_value",
-                        "coupon_date",
-                        "coupon_percent",
-                        "coupon_value",
-                        "sum_coupon",
-                        "sum_coupon_percent",
-                        "highrisk",
-                        "price",
-                        "accint",
-                        "accint_percent",
-                        "moex_yield",
-                        "year_percent",
-                    ]
-
-                    for field in fields_to_update:
-                        setattr(existing_record, field, getattr(bond, field))
-
-                    session.commit()
-                else:
-                    # Если запись не найдена, создаем новую запись
-                    session.add(bond)
-                    session.commit()
-
-    @staticmethod
-    def select_bonds(
+    @staticmethod
+    def _select_bonds_query(
         fields: list,
         year_percent: tuple,
         list_level: tuple,
@@ -80,36 +156,682 @@ class MoexORM(AbstractRepository):
         ofz_bonds: bool,
         face_unit: str | None,
         limit: int,
-    ):
-        with session_factory() as session:
-            query = session.query()
+        commission: float = COMMISSION,
+        tax: float = TAX,
+        table=MoexBonds,
+    ) -> Select:
+        """Запрос скринера облигаций.
 
-            for column_name in fields:
-                query = query.add_columns(getattr(MoexBonds, column_name))
+        Постоянные условия (highrisk, sum_coupon) совпадают с условием
+        частичных индексов ix_bonds_screener и ix_bond_snapshots_screener,
+        менять их нужно вместе. При commission и tax, отличных от параметров
+        загрузки, доходность пересчитывается выражением SQL из сохраненных
+        цены и купонов. Для истории table - MoexBondSnapshots.
+        """
+        year_percent_column = table.year_percent
+        if (commission, tax) != (COMMISSION, TAX):
+            year_percent_column = year_percent_expr(
+                commission=commission, tax=tax, table=table
+            ).label("year_percent")
 
-            query_filter = [
-                MoexBonds.year_percent.between(*year_percent),
-                MoexBonds.list_level.between(*list_level),
-                MoexBonds.highrisk.is_(False),
-                MoexBonds.amortizations.is_(amortizations),
-                MoexBonds.floater.is_(floater),
-                MoexBonds.sum_coupon > 10,
-                MoexBonds.days_to_redemption.between(*days_to_redemption),
+        query = select(
+            *[
+                year_percent_column
+                if column_name == "year_percent"
+                else getattr(table, column_name)
+                for column_name in fields
             ]
+        )
 
-            if ofz_bonds:
-                query_filter.append(MoexBonds.type == "ofz_bond")
+        query_filter = [
+            year_percent_column.between(*year_percent),
+            table.list_level.between(*list_level),
+            table.highrisk.is_(False),
+            table.amortizations.is_(amortizations),
+            table.floater.is_(floater),
+            # Литерал, а не параметр: по обобщенному плану с $n PostgreSQL
+            # не доказывает условие частичного индекса
+            table.sum_coupon > literal_column("10"),
+            table.days_to_redemption.between(*days_to_redemption),
+        ]
 
-            if face_unit and face_unit != "all":
-                query_filter.append(MoexBonds.face_unit == face_unit)
+        if ofz_bonds:
+            query_filter.append(table.type == "ofz_bond")
 
-            query = (
-                query.filter(*query_filter)
-                .order_by(MoexBonds.year_percent.desc())
-                .limit(limit)
-                .all()
-            )
+        if face_unit and face_unit != "all":
+            query_filter.append(table.face_unit == face_unit)
+
+        return (
+            query.filter(*query_filter)
+            .order_by(year_percent_column.desc())
+            .limit(limit)
+        )
+
+    @staticmethod
+    def select_bonds(**filters):
+        query = MoexORM._select_bonds_query(**filters)
+        with session_factory() as session:
+            rows = session.execute(query).all()
 
-        result = ColumnGroupModel(columns=fields, data=[list(i) for i in query])
+        result = ColumnGroupModel(
+            columns=filters["fields"], data=[list(i) for i in rows]
+        )
 
         return result
+
+    @staticmethod
+    def explain_select_bonds(**filters) -> list[str]:
+        """План запроса скринера в том виде, в каком его выполняет asyncpg.
+
+        asyncpg передает значения фильтров параметрами $n и переиспользует
+        подготовленные запросы, поэтому запрос объясняется через PREPARE
+        при обобщенном плане: условие частичного индекса должно следовать
+        из текста запроса без значений параметров. На таблице в несколько
+        тысяч строк планировщик может предпочесть полный просмотр, поэтому
+        seq scan отключается в рамках транзакции.
+        """
+        query = MoexORM._select_bonds_query(**filters)
+        compiled = query.compile(
+            dialect=asyncpg.dialect(), compile_kwargs={"render_postcompile": True}
+        )
+        args = {
+            f"arg_{i}": compiled.params[name]
+            for i, name in enumerate(compiled.positiontup)
+        }
+        execute = ", ".join(f":{name}" for name in args)
+        with session_factory() as session:
+            session.execute(text("SET LOCAL enable_seqscan = off"))
+            session.execute(text("SET LOCAL plan_cache_mode = force_generic_plan"))
+            connection = session.connection()
+            connection.exec_driver_sql(f"PREPARE screener AS {compiled.string}")
+            plan = session.execute(
+                text(f"EXPLAIN EXECUTE screener({execute})"), args
+            ).scalars().all()
+            connection.exec_driver_sql("DEALLOCATE screener")
+
+        return plan
+
+    @staticmethod
+    def uses_screener_index(**filters) -> bool:
+        """Проверка, что запрос скринера обслуживается индексом ix_bonds_screener"""
+        plan = MoexORM.explain_select_bonds(**filters)
+        return any("ix_bonds_screener" in line for line in plan)
+
+
+class MoexAsyncORM(AbstractRepository):
+    """Асинхронный класс работы с таблицей bonds"""
+
+    @staticmethod
+    async def insert_data(bonds: list):
+        async with async_session_factory() as session:
+            moex_bond = [MoexBonds(**i) for i in bonds]
+            session.add_all(moex_bond)
+            await session.commit()
+
+    @staticmethod
+    async def update_data(bonds: list):
+        """Вставка новых и обновление существующих облигаций по secid"""
+        if not bonds:
+            return
+
+        bonds, schedules = MoexScheduleORM.split_schedules(bonds)
+        async with async_session_factory() as session:
+            await session.execute(*MoexORM._upsert_statement(bonds))
+            for stmt, params in MoexScheduleORM._replace_statements(schedules):
+                await session.execute(stmt, params)
+            await session.commit()
+
+    @staticmethod
+    async def select_bonds(**filters):
+        query = MoexORM._select_bonds_query(**filters)
+        async with async_session_factory() as session:
+            rows = (await session.execute(query)).all()
+
+        result = ColumnGroupModel(
+            columns=filters["fields"], data=[list(i) for i in rows]
+        )
+
+        return result
+
+    @staticmethod
+    async def data_version():
+        """Версия данных таблицы bonds, меняется после каждой загрузки"""
+        query = select(func.max(MoexBonds.last_updated), func.count(MoexBonds.id))
+        async with async_session_factory() as session:
+            row = (await session.execute(query)).one()
+
+        return tuple(row)
+
+
+class MoexStaticORM:
+    """Класс работы с таблицей bond_static"""
+
+    @staticmethod
+    def select_static(secids: list) -> dict[str, dict]:
+        """Сохраненные описания и графики купонов (в формате ответа ISS)"""
+        query = select(MoexBondStatic).where(MoexBondStatic.secid.in_(secids))
+        with session_factory() as session:
+            rows = session.execute(query).scalars().all()
+        schedules = MoexScheduleORM.select_schedules(secids=secids)
+
+        return {
+            row.secid: {
+                "description": row.description,
+                "description_fetched_at": row.description_fetched_at,
+                "bondization": schedules.get(row.secid),
+                "bondization_fetched_at": row.bondization_fetched_at,
+                "listing_hash": row.listing_hash,
+                "content_hash": row.content_hash,
+            }
+            for row in rows
+        }
+
+    @staticmethod
+    def update_static(rows: list):
+        if not rows:
+            return
+
+        # График купонов сохраняется в coupons/amortizations вместе с облигацией
+        columns = MoexBondStatic.__table__.columns.keys()
+        rows = [{key: row[key] for key in columns} for row in rows]
+        stmt = insert(MoexBondStatic).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MoexBondStatic.secid],
+            set_={
+                column: stmt.excluded[column] for column in columns if column != "secid"
+            },
+        )
+        with session_factory() as session:
+            session.execute(stmt)
+            session.commit()
+
+
+class MoexScheduleORM:
+    """Класс работы с таблицами coupons и amortizations"""
+
+    _SCHEDULE_KEYS = ("coupon_schedule", "amortization_schedule")
+
+    @staticmethod
+    def split_schedules(bonds: list) -> tuple[list, dict[str, tuple[list, list]]]:
+        """Отделение графиков купонов и амортизации от полей облигации"""
+        rows = []
+        schedules = {}
+        for bond in bonds:
+            if "coupon_schedule" in bond:
+                schedules[bond["secid"]] = (
+                    bond["coupon_schedule"],
+                    bond["amortization_schedule"],
+                )
+            rows.append(
+                {
+                    key: value
+                    for key, value in bond.items()
+                    if key not in MoexScheduleORM._SCHEDULE_KEYS
+                }
+            )
+
+        return rows, schedules
+
+    @staticmethod
+    def _replace_statements(schedules: dict[str, tuple[list, list]]):
+        """Замена графиков облигаций: удаление и пакетная вставка"""
+        if not schedules:
+            return
+
+        coupons = {}
+        amortizations = {}
+        for secid, (coupon_rows, amortization_rows) in schedules.items():
+            # Повтор даты в графике ISS - остается последняя запись
+            for coupon_date, value, valueprc in coupon_rows:
+                if coupon_date is None:
+                    continue
+                coupons[(secid, coupon_date)] = {
+                    "secid": secid,
+                    "coupon_date": date.fromisoformat(coupon_date),
+                    "value": value,
+                    "valueprc": valueprc,
+                }
+            for amort_date, face_value, value, valueprc in amortization_rows:
+                if amort_date is None:
+                    continue
+                amortizations[(secid, amort_date)] = {
+                    "secid": secid,
+                    "amort_date": date.fromisoformat(amort_date),
+                    "face_value": face_value,
+                    "value": value,
+                    "valueprc": valueprc,
+                }
+
+        secids = list(schedules)
+        yield delete(MoexCoupons).where(MoexCoupons.secid.in_(secids)), None
+        yield delete(MoexAmortizations).where(MoexAmortizations.secid.in_(secids)), None
+        if coupons:
+            yield insert(MoexCoupons), list(coupons.values())
+        if amortizations:
+            yield insert(MoexAmortizations), list(amortizations.values())
+
+    @staticmethod
+    def select_schedules(secids: list | None = None) -> dict[str, dict]:
+        """Графики купонов и амортизации в формате ответа bondization ISS"""
+        coupons_query = select(
+            MoexCoupons.secid,
+            MoexCoupons.coupon_date,
+            MoexCoupons.value,
+            MoexCoupons.valueprc,
+        ).order_by(MoexCoupons.secid, MoexCoupons.coupon_date)
+        amortizations_query = select(
+            MoexAmortizations.secid,
+            MoexAmortizations.amort_date,
+            MoexAmortizations.face_value,
+            MoexAmortizations.value,
+            MoexAmortizations.valueprc,
+        ).order_by(MoexAmortizations.secid, MoexAmortizations.amort_date)
+        if secids is not None:
+            coupons_query = coupons_query.where(MoexCoupons.secid.in_(secids))
+            amortizations_query = amortizations_query.where(
+                MoexAmortizations.secid.in_(secids)
+            )
+
+        with session_factory() as session:
+            coupon_rows = session.execute(coupons_query).all()
+            amortization_rows = session.execute(amortizations_query).all()
+
+        schedules = {}
+
+        def schedule(secid: str) -> dict:
+            if secid not in schedules:
+                schedules[secid] = {
+                    "amortizations": {
+                        "columns": ["amortdate", "facevalue", "value", "valueprc"],
+                        "data": [],
+                    },
+                    "coupons": {
+                        "columns": ["coupondate", "value", "valueprc"],
+                        "data": [],
+                    },
+                }
+            return schedules[secid]
+
+        for secid, coupon_date, value, valueprc in coupon_rows:
+            schedule(secid)["coupons"]["data"].append(
+                [coupon_date.isoformat(), value, valueprc]
+            )
+        for secid, amort_date, face_value, value, valueprc in amortization_rows:
+            schedule(secid)["amortizations"]["data"].append(
+                [amort_date.isoformat(), face_value, value, valueprc]
+            )
+
+        return schedules
+
+
+class MoexRunORM:
+    """Класс работы с таблицей ingestion_runs"""
+
+    @staticmethod
+    def start_run(mode: str, parent_id: int | None = None) -> int:
+        """Запись о начале запуска загрузки, возвращает id запуска"""
+        with session_factory() as session:
+            run_id = session.execute(
+                insert(MoexIngestionRuns)
+                .values(status="running", mode=mode, parent_id=parent_id)
+                .returning(MoexIngestionRuns.id)
+            ).scalar_one()
+            session.commit()
+
+        return run_id
+
+    @staticmethod
+    def finish_run(run_id: int, status: str, bonds: int, report: dict):
+        with session_factory() as session:
+            session.execute(
+                update(MoexIngestionRuns)
+                .where(MoexIngestionRuns.id == run_id)
+                .values(
+                    status=status,
+                    bonds=bonds,
+                    report=report,
+                    finished_at=text("TIMEZONE('utc', now())"),
+                )
+            )
+            session.commit()
+
+    @staticmethod
+    def select_resumable(mode: str, since: datetime) -> int | None:
+        """Незавершенный запуск режима mode, начатый после since
+
+        Запуск продолжается, только если после него не было успешного.
+        """
+        with session_factory() as session:
+            row = session.execute(
+                select(MoexIngestionRuns.id, MoexIngestionRuns.status)
+                .where(
+                    MoexIngestionRuns.mode == mode,
+                    MoexIngestionRuns.started_at >= since,
+                )
+                .order_by(MoexIngestionRuns.id.desc())
+                .limit(1)
+            ).first()
+
+        if row is None or row.status == "success":
+            return None
+        return row.id
+
+    @staticmethod
+    def resume_run(run_id: int) -> datetime:
+        """Возобновление запуска после сбоя, возвращает время начала запуска"""
+        with session_factory() as session:
+            started_at = session.execute(
+                update(MoexIngestionRuns)
+                .where(MoexIngestionRuns.id == run_id)
+                .values(status="running", finished_at=None)
+                .returning(MoexIngestionRuns.started_at)
+            ).scalar_one()
+            session.commit()
+
+        return started_at
+
+    @staticmethod
+    def select_started_at(run_id: int) -> datetime:
+        """Время начала запуска"""
+        with session_factory() as session:
+            return session.execute(
+                select(MoexIngestionRuns.started_at).where(
+                    MoexIngestionRuns.id == run_id
+                )
+            ).scalar_one()
+
+    @staticmethod
+    def select_items(run_id: int) -> dict[str, str]:
+        """Статусы облигаций запуска по secid"""
+        with session_factory() as session:
+            rows = session.execute(
+                select(MoexIngestionRunItems.secid, MoexIngestionRunItems.status)
+                .where(MoexIngestionRunItems.run_id == run_id)
+            ).all()
+
+        return {row.secid: row.status for row in rows}
+
+    @staticmethod
+    def select_failed(run_id: int | None = None) -> tuple[int | None, list[str]]:
+        """Облигации с ошибкой запроса в запуске run_id или в последнем запуске
+        с такими облигациями"""
+        with session_factory() as session:
+            if run_id is None:
+                run_id = session.execute(
+                    select(func.max(MoexIngestionRunItems.run_id)).where(
+                        MoexIngestionRunItems.status == "failed"
+                    )
+                ).scalar()
+            if run_id is None:
+                return None, []
+            secids = session.execute(
+                select(MoexIngestionRunItems.secid)
+                .where(
+                    MoexIngestionRunItems.run_id == run_id,
+                    MoexIngestionRunItems.status == "failed",
+                )
+                .order_by(MoexIngestionRunItems.secid)
+            ).scalars().all()
+
+        return run_id, list(secids)
+
+    @staticmethod
+    def save_items(run_id: int, items: list[dict]):
+        """Контрольная точка: статусы облигаций обработанной страницы
+
+        Номер страницы сохраняется при первой записи, повторная загрузка
+        обновляет только статус.
+        """
+        if not items:
+            return
+        stmt = insert(MoexIngestionRunItems).values(
+            [{"run_id": run_id, **item} for item in items]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MoexIngestionRunItems.run_id, MoexIngestionRunItems.secid],
+            set_={
+                "status": stmt.excluded.status,
+                "reason": stmt.excluded.reason,
+                "updated_at": text("TIMEZONE('utc', now())"),
+            },
+        )
+        with session_factory() as session:
+            session.execute(stmt)
+            session.commit()
+
+
+class MoexJobORM:
+    """Класс работы с таблицей job_runs"""
+
+    @staticmethod
+    def select_runs() -> dict[str, dict]:
+        """Последние запуски задач по имени"""
+        with session_factory() as session:
+            rows = session.execute(select(MoexJobRuns.__table__)).mappings().all()
+
+        return {row["name"]: dict(row) for row in rows}
+
+    @staticmethod
+    def save_run(name: str, **values):
+        """Запись состояния запуска задачи"""
+        stmt = insert(MoexJobRuns).values(name=name, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MoexJobRuns.name],
+            set_={key: stmt.excluded[key] for key in values},
+        )
+        with session_factory() as session:
+            session.execute(stmt)
+            session.commit()
+
+
+class MoexHistoryORM:
+    """Класс работы с историей облигаций bond_snapshots"""
+
+    # Колонки bonds, копируемые в историю
+    _COLUMNS = (
+        "secid",
+        "shortname",
+        "matdate",
+        "face_unit",
+        "list_level",
+        "days_to_redemption",
+        "face_value",
+        "coupon_frequency",
+        "coupon_date",
+        "coupon_percent",
+        "coupon_value",
+        "highrisk",
+        "type",
+        "accint",
+        "accint_percent",
+        "price",
+        "moex_yield",
+        "amortizations",
+        "floater",
+        "sum_coupon",
+        "sum_coupon_percent",
+        "year_percent",
+    )
+    # Колонки ответа "доходность бумаги за период"
+    HISTORY_FIELDS = ["snapshot_date", "price", "accint", "moex_yield", "year_percent"]
+
+    @staticmethod
+    def _partition(day: date) -> tuple[str, date, date]:
+        """Имя и границы месячной секции для даты"""
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return f"bond_snapshots_{start:%Y_%m}", start, end
+
+    @staticmethod
+    def ensure_partition(session, day: date):
+        name, start, end = MoexHistoryORM._partition(day)
+        session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF bond_snapshots "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        )
+
+    @staticmethod
+    def append_snapshot(
+        snapshot_date: date, since: datetime, secids: list[str] | None = None
+    ) -> int:
+        """Копирование облигаций, обновленных после since, в историю за дату
+
+        Строки копируются одним INSERT ... SELECT на стороне БД, повторная
+        запись за ту же дату заменяет снимок бумаги. secids ограничивает
+        снимок бумагами запуска повторной загрузки.
+        """
+        columns = MoexHistoryORM._COLUMNS
+        source = select(
+            text(":snapshot_date").bindparams(snapshot_date=snapshot_date),
+            *[getattr(MoexBonds, column) for column in columns],
+        ).where(MoexBonds.last_updated >= since, MoexBonds.days_to_redemption > 0)
+        if secids is not None:
+            source = source.where(MoexBonds.secid.in_(secids))
+        stmt = insert(MoexBondSnapshots).from_select(
+            ["snapshot_date", *columns], source
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MoexBondSnapshots.snapshot_date, MoexBondSnapshots.secid],
+            set_={
+                "captured_at": text("TIMEZONE('utc', now())"),
+                **{column: stmt.excluded[column] for column in columns[1:]},
+            },
+        )
+        with session_factory() as session:
+            MoexHistoryORM.ensure_partition(session, snapshot_date)
+            rowcount = session.execute(stmt).rowcount
+            session.commit()
+
+        return rowcount
+
+    @staticmethod
+    def compact(before: date) -> int:
+        """Прореживание истории до before: остается последний снимок недели"""
+        week = func.date_trunc("week", MoexBondSnapshots.snapshot_date)
+        last_in_week = func.max(MoexBondSnapshots.snapshot_date).over(partition_by=week)
+        dates = (
+            select(MoexBondSnapshots.snapshot_date, last_in_week.label("last"))
+            .where(MoexBondSnapshots.snapshot_date < before)
+            .distinct()
+            .subquery()
+        )
+        with session_factory() as session:
+            removed = session.execute(
+                select(dates.c.snapshot_date).where(
+                    dates.c.snapshot_date != dates.c.last
+                )
+            ).scalars().all()
+            rowcount = 0
+            if removed:
+                rowcount = session.execute(
+                    delete(MoexBondSnapshots).where(
+                        MoexBondSnapshots.snapshot_date.in_(removed)
+                    )
+                ).rowcount
+            session.commit()
+
+        return rowcount
+
+    @staticmethod
+    def drop_expired(before: date) -> list[str]:
+        """Удаление истории старше before: целые секции и начало граничной"""
+        with session_factory() as session:
+            partitions = session.execute(
+                text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE parent.relname = 'bond_snapshots'"
+                )
+            ).scalars().all()
+            boundary, _, _ = MoexHistoryORM._partition(before)
+            dropped = sorted(name for name in partitions if name < boundary)
+            for name in dropped:
+                session.execute(text(f"DROP TABLE {name}"))
+            session.execute(
+                delete(MoexBondSnapshots).where(
+                    MoexBondSnapshots.snapshot_date < before
+                )
+            )
+            session.commit()
+
+        return dropped
+
+    @staticmethod
+    def _history_query(
+        secid: str, date_from: date | None = None, date_to: date | None = None
+    ) -> Select:
+        fields = MoexHistoryORM.HISTORY_FIELDS
+        query = select(
+            *[getattr(MoexBondSnapshots, name) for name in fields]
+        ).where(MoexBondSnapshots.secid == secid)
+        # Границы дат отсекают секции при планировании запроса
+        if date_from is not None:
+            query = query.where(MoexBondSnapshots.snapshot_date >= date_from)
+        if date_to is not None:
+            query = query.where(MoexBondSnapshots.snapshot_date <= date_to)
+
+        return query.order_by(MoexBondSnapshots.snapshot_date)
+
+    @staticmethod
+    def _as_of_query(as_of: date, **filters) -> Select:
+        """Скринер по последнему снимку не позже as_of"""
+        snapshot_date = (
+            select(func.max(MoexBondSnapshots.snapshot_date))
+            .where(MoexBondSnapshots.snapshot_date <= as_of)
+            .scalar_subquery()
+        )
+        query = MoexORM._select_bonds_query(**filters, table=MoexBondSnapshots)
+
+        return query.where(MoexBondSnapshots.snapshot_date == snapshot_date)
+
+    @staticmethod
+    def select_history(
+        secid: str, date_from: date | None = None, date_to: date | None = None
+    ) -> ColumnGroupModel:
+        """Цена и доходность бумаги по датам"""
+        query = MoexHistoryORM._history_query(secid, date_from, date_to)
+        with session_factory() as session:
+            rows = session.execute(query).all()
+
+        return ColumnGroupModel(
+            columns=MoexHistoryORM.HISTORY_FIELDS, data=[list(i) for i in rows]
+        )
+
+    @staticmethod
+    def select_bonds_as_of(as_of: date, **filters) -> ColumnGroupModel:
+        query = MoexHistoryORM._as_of_query(as_of, **filters)
+        with session_factory() as session:
+            rows = session.execute(query).all()
+
+        return ColumnGroupModel(
+            columns=filters["fields"], data=[list(i) for i in rows]
+        )
+
+
+class MoexAsyncHistoryORM:
+    """Асинхронные запросы к истории облигаций для API"""
+
+    @staticmethod
+    async def select_history(
+        secid: str, date_from: date | None = None, date_to: date | None = None
+    ) -> ColumnGroupModel:
+        query = MoexHistoryORM._history_query(secid, date_from, date_to)
+        async with async_session_factory() as session:
+            rows = (await session.execute(query)).all()
+
+        return ColumnGroupModel(
+            columns=MoexHistoryORM.HISTORY_FIELDS, data=[list(i) for i in rows]
+        )
+
+    @staticmethod
+    async def select_bonds_as_of(as_of: date, **filters) -> ColumnGroupModel:
+        query = MoexHistoryORM._as_of_query(as_of, **filters)
+        async with async_session_factory() as session:
+            rows = (await session.execute(query)).all()
+
+        return ColumnGroupModel(
+            columns=filters["fields"], data=[list(i) for i in rows]
+        )
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+from time import monotonic
+
+import numpy as np
+from sqlalchemy import select
+
+from database.base import async_session_factory
+from models.bond import MoexBonds
+from repositories.bond import AbstractRepository, MoexAsyncORM
+from schemas.bond import ColumnGroupModel
+from services.calc import COMMISSION, TAX, calc_year_percent
+
+
+class BondSnapshot:
+    """Колоночный снимок таблицы bonds в массивах NumPy"""
+
+    def __init__(self, columns: dict[str, np.ndarray], version=None) -> None:
+        self.columns = columns
+        self.version = version
+        self.size = len(columns["secid"]) if columns else 0
+        self._year_percent: dict[tuple, np.ndarray] = {}
+
+    def year_percent(self, commission: float, tax: float) -> np.ndarray:
+        """Доходность для заданных комиссии и налога"""
+        if (commission, tax) == (COMMISSION, TAX):
+            return self.columns["year_percent"]
+
+        key = (commission, tax)
+        values = self._year_percent.get(key)
+        if values is None:
+            values = calc_year_percent(
+                price=self.columns["price"],
+                accint_percent=self.columns["accint_percent"],
+                days_to_redemption=self.columns["days_to_redemption"],
+                sum_coupon_percent=self.columns["sum_coupon_percent"],
+                commission=commission,
+                tax=tax,
+            )
+            # Ограничение числа сохраненных вариантов параметров
+            if len(self._year_percent) >= 32:
+                self._year_percent.clear()
+            self._year_percent[key] = values
+
+        return values
+
+    @classmethod
+    def from_rows(
+        cls, names: list[str], rows: list, version=None
+    ) -> "BondSnapshot":
+        """Сборка снимка из строк запроса"""
+        columns = {}
+        for i, name in enumerate(names):
+            values = [row[i] for row in rows]
+            column = getattr(MoexBonds, name).type.python_type
+            if column is bool:
+                columns[name] = np.array(values, dtype=bool)
+            elif column is int:
+                columns[name] = np.array(values, dtype=np.int64)
+            elif column is float:
+                columns[name] = np.array(values, dtype=np.float64)
+            else:
+                columns[name] = np.array(values, dtype=object)
+
+        return cls(columns=columns, version=version)
+
+    def mask(
+        self,
+        year_percent: tuple,
+        list_level: tuple,
+        amortizations: bool,
+        floater: bool,
+        days_to_redemption: tuple,
+        ofz_bonds: bool,
+        face_unit: str | None,
+        year_percent_values: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Булева маска фильтров скринера (аналог MoexORM._select_bonds_query)"""
+        col = self.columns
+        if year_percent_values is None:
+            year_percent_values = col["year_percent"]
+        mask = (
+            (year_percent_values >= year_percent[0])
+            & (year_percent_values <= year_percent[1])
+            & (col["list_level"] >= list_level[0])
+            & (col["list_level"] <= list_level[1])
+            & ~col["highrisk"]
+            & (col["amortizations"] == amortizations)
+            & (col["floater"] == floater)
+            & (col["sum_coupon"] > 10)
+            & (col["days_to_redemption"] >= days_to_redemption[0])
+            & (col["days_to_redemption"] <= days_to_redemption[1])
+        )
+        if ofz_bonds:
+            mask &= col["type"] == "ofz_bond"
+        if face_unit and face_unit != "all":
+            mask &= col["face_unit"] == face_unit
+
+        return mask
+
+    def select(
+        self,
+        fields: list,
+        limit: int,
+        commission: float = COMMISSION,
+        tax: float = TAX,
+        **filters,
+    ) -> ColumnGroupModel:
+        """Фильтрация и top-k по year_percent"""
+        year_percent_values = self.year_percent(commission=commission, tax=tax)
+        index = np.flatnonzero(
+            self.mask(year_percent_values=year_percent_values, **filters)
+        )
+        values = year_percent_values[index]
+        if 0 < limit < len(index):
+            top = np.argpartition(-values, limit - 1)[:limit]
+            index, values = index[top], values[top]
+        index = index[np.argsort(-values, kind="stable")][:limit]
+
+        data = [
+            year_percent_values[index].tolist()
+            if name == "year_percent"
+            else self.columns[name][index].tolist()
+            for name in fields
+        ]
+        return ColumnGroupModel(columns=fields, data=[list(i) for i in zip(*data)])
+
+
+class MoexSnapshotORM(AbstractRepository):
+    """Класс работы со снимком таблицы bonds в памяти процесса.
+
+    Запись выполняется в PostgreSQL через MoexAsyncORM, чтение фильтров
+    скринера - из снимка, который перезагружается целиком при изменении
+    версии данных (проверка не чаще SCREENER_SNAPSHOT_VERSION_INTERVAL сек).
+    """
+
+    _snapshot: BondSnapshot | None = None
+    _version_checked: float | None = None
+    _lock: asyncio.Lock | None = None
+    version_interval = float(
+        os.getenv("SCREENER_SNAPSHOT_VERSION_INTERVAL", default=30)
+    )
+    log = logging.getLogger("MoexSnapshotORM")
+
+    @staticmethod
+    async def insert_data(bonds: list):
+        await MoexAsyncORM.insert_data(bonds=bonds)
+
+    @staticmethod
+    async def update_data(bonds: list):
+        await MoexAsyncORM.update_data(bonds=bonds)
+
+    @staticmethod
+    async def select_bonds(**filters):
+        snapshot = await MoexSnapshotORM.get_snapshot()
+        return snapshot.select(**filters)
+
+    @staticmethod
+    async def data_version():
+        """Версия данных снимка, перед ответом снимок сверяется с БД
+
+        Кэш скринера получает версию отсюда, а не из БД, иначе после сброса
+        кэша он заполнялся бы из еще не перезагруженного снимка.
+        """
+        snapshot = await MoexSnapshotORM.get_snapshot(force=True)
+        return snapshot.version
+
+    @staticmethod
+    async def get_snapshot(force: bool = False) -> BondSnapshot:
+        """Актуальный снимок, при смене версии данных загружается заново
+
+        force - сверка версии с БД без учета интервала проверки.
+        """
+        cls = MoexSnapshotORM
+        now = monotonic()
+        if (
+            not force
+            and cls._snapshot is not None
+            and now - cls._version_checked < cls.version_interval
+        ):
+            return cls._snapshot
+
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        async with cls._lock:
+            # Пока ждали блокировку, версию могла сверить другая корутина
+            if cls._snapshot is not None and (
+                cls._version_checked >= now
+                or not force
+                and now - cls._version_checked < cls.version_interval
+            ):
+                return cls._snapshot
+
+            version = await MoexAsyncORM.data_version()
+            if cls._snapshot is None or cls._snapshot.version != version:
+                snapshot = await cls._load(version=version)
+                # Замена ссылки атомарна для читающих корутин
+                cls._snapshot = snapshot
+                cls.log.info(
+                    "Загружен снимок облигаций: %d строк, версия %s",
+                    snapshot.size,
+                    version,
+                )
+            cls._version_checked = monotonic()
+
+        return cls._snapshot
+
+    @staticmethod
+    async def _load(version) -> BondSnapshot:
+        names = [
+            column.key
+            for column in MoexBonds.__table__.columns
+            if column.key not in ("id", "last_updated")
+        ]
+        query = select(*[getattr(MoexBonds, name) for name in names])
+        async with async_session_factory() as session:
+            rows = (await session.execute(query)).all()
+
+        return BondSnapshot.from_rows(names=names, rows=rows, version=version)
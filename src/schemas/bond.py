@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import date
 from pydantic import BaseModel, Field, field_validator
 
@@ -7,24 +8,6 @@ class ColumnGroupModel(BaseModel):
     data: list[list]
 
 
-class BondListModel(BaseModel):
-    securities: ColumnGroupModel
-
-
-class PrimaryRequestModel(BaseModel):
-    description: ColumnGroupModel
-
-
-class YieldRequestModel(BaseModel):
-    securities: ColumnGroupModel
-    marketdata: ColumnGroupModel
-
-
-class CouponRequestModel(BaseModel):
-    amortizations: ColumnGroupModel
-    coupons: ColumnGroupModel
-
-
 class PrimaryDataModel(BaseModel):
     short_name: str = Field(alias="SHORTNAME")
     secid: str = Field(alias="SECID")
@@ -35,12 +18,13 @@ class PrimaryDataModel(BaseModel):
     list_level: int = Field(alias="LISTLEVEL", default=3)
     days_to_redemption: int = Field(alias="DAYSTOREDEMPTION", default=0)
     face_value: float = Field(alias="FACEVALUE")
-    is_qualified_investors: bool = Field(alias="ISQUALIFIEDINVESTORS")
+    # None - признак неизвестен (сводные таблицы рынка), см. BondFlagsModel
+    is_qualified_investors: bool | None = Field(alias="ISQUALIFIEDINVESTORS")
     coupon_frequency: int = Field(alias="COUPONFREQUENCY", default=0)
     coupon_date: date = Field(alias="COUPONDATE", default=date(2000, 1, 1))
     coupon_percent: float = Field(alias="COUPONPERCENT", default=0.0)
     coupon_value: float = Field(alias="COUPONVALUE", default=0.0)
-    high_risk: bool = Field(alias="HIGHRISK", default=False)
+    high_risk: bool | None = Field(alias="HIGHRISK", default=False)
     type: str = Field(alias="TYPE")
     name: str = Field(alias="NAME")
     reg_number: str = Field(alias="REGNUMBER", default="None")
@@ -56,6 +40,13 @@ class PrimaryDataModel(BaseModel):
     emitter_id: str = Field(alias="EMITTER_ID")
 
 
+class BondFlagsModel(BaseModel):
+    """Признаки из описания бумаги, которых нет в сводных таблицах рынка"""
+
+    is_qualified_investors: bool = Field(alias="ISQUALIFIEDINVESTORS")
+    high_risk: bool = Field(alias="HIGHRISK", default=False)
+
+
 class YieldRawDataModel(BaseModel):
     accint: float | None = Field(alias="ACCRUEDINT", default=0)
     last_price: float | None = Field(alias="LAST")
@@ -78,39 +69,20 @@ class YieldRawDataModel(BaseModel):
         return v
 
 
-class YieldDataModel(BaseModel):
+# Внутренние записи конвейера загрузки: данные уже проверены на границе
+# с ISS (PrimaryDataModel, YieldRawDataModel), повторная проверка не нужна
+
+
+@dataclass(slots=True)
+class YieldData:
     price: float
     moex_yield: float
 
 
-class CouponDataModel(BaseModel):
+@dataclass(slots=True)
+class CouponData:
     amortizations: bool
     floater: bool
     sum_coupon: float
     sum_coupon_percent: float
     coupons: list[tuple[date, float | None, float | None]]  # [(date, value, valueprc), ...]
-
-
-class BondModel(BaseModel):
-    shortname: str
-    secid: str
-    matdate: date
-    face_unit: str
-    list_level: int
-    days_to_redemption: int
-    face_value: float
-    coupon_frequency: int
-    coupon_date: date
-    coupon_percent: float
-    coupon_value: float
-    highrisk: bool
-    type: str
-    accint: float
-    accint_percent: float
-    price: float
-    moex_yield: float
-    amortizations: bool
-    floater: bool
-    sum_coupon: float
-    sum_coupon_percent: float
-    year_percent: float
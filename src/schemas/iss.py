@@ -0,0 +1,75 @@
+from typing import Iterator, NamedTuple
+import orjson
+
+
+class IssTable:
+    """Блок ISS columns/data поверх разобранного JSON без копирования строк"""
+
+    __slots__ = ("columns", "data", "_index")
+
+    def __init__(self, columns: list[str], data: list[list]) -> None:
+        self.columns = columns
+        self.data = data
+        self._index = {name: i for i, name in enumerate(columns)}
+
+    @classmethod
+    def from_block(cls, raw: dict, name: str) -> "IssTable":
+        """Проверка структуры блока name ответа ISS"""
+        block = raw.get(name)
+        if not isinstance(block, dict):
+            raise ValueError(f"В ответе ISS нет блока {name}")
+        columns, data = block.get("columns"), block.get("data")
+        if not isinstance(columns, list) or not isinstance(data, list):
+            raise ValueError(f"Блок {name} ответа ISS не в формате columns/data")
+        return cls(columns=columns, data=data)
+
+    def index(self, column: str) -> int:
+        return self._index[column]
+
+    def column(self, column: str) -> list:
+        """Значения одной колонки"""
+        i = self._index[column]
+        return [row[i] for row in self.data]
+
+    def first(self) -> dict:
+        """Первая строка блока в виде словаря"""
+        return dict(zip(self.columns, self.data[0]))
+
+    def rows(self) -> Iterator[dict]:
+        for row in self.data:
+            yield dict(zip(self.columns, row))
+
+    def pairs(self) -> dict:
+        """Блок вида name-value (описание бумаги) в виде словаря"""
+        return {key: value for key, value in self.data}
+
+    def as_dict(self) -> dict:
+        return {"columns": self.columns, "data": self.data}
+
+
+class IssBondization(NamedTuple):
+    """Графики амортизаций и купонов из bondization"""
+
+    amortizations: IssTable
+    coupons: IssTable
+
+    @classmethod
+    def from_raw(cls, raw: dict) -> "IssBondization":
+        return cls(
+            amortizations=IssTable.from_block(raw, "amortizations"),
+            coupons=IssTable.from_block(raw, "coupons"),
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "amortizations": self.amortizations.as_dict(),
+            "coupons": self.coupons.as_dict(),
+        }
+
+
+def loads(body: bytes | str) -> dict:
+    """Разбор ответа ISS, orjson быстрее стандартного json в несколько раз"""
+    raw = orjson.loads(body)
+    if not isinstance(raw, dict):
+        raise ValueError("Ответ ISS не является объектом JSON")
+    return raw
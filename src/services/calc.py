@@ -0,0 +1,165 @@
+from datetime import date
+
+import numpy as np
+
+
+# Параметры расчета доходности по умолчанию
+COMMISSION = 0.3
+TAX = 13
+YEAR = 365
+# Длительность купонного периода, если предыдущий купон неизвестен
+DEFAULT_COUPON_PERIOD = 182
+
+
+def flatten_coupons(
+    schedules: list[list[tuple[date | str, float | None, float | None]]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Перевод графиков купонов в плоские массивы.
+
+    Возвращает: (владелец, дата, значение, годовой процент), неизвестные
+    значения и проценты - NaN.
+    """
+    sizes = [len(schedule) for schedule in schedules]
+    owner = np.repeat(np.arange(len(schedules)), sizes)
+    dates = np.array(
+        [coupon[0] for schedule in schedules for coupon in schedule],
+        dtype="datetime64[D]",
+    )
+    values = np.array(
+        [coupon[1] for schedule in schedules for coupon in schedule],
+        dtype=np.float64,
+    )
+    rates = np.array(
+        [coupon[2] for schedule in schedules for coupon in schedule],
+        dtype=np.float64,
+    )
+
+    return owner, dates, values, rates
+
+
+def calc_coupon_sums(
+    owner: np.ndarray,
+    dates: np.ndarray,
+    values: np.ndarray,
+    rates: np.ndarray,
+    coupon_frequency: np.ndarray,
+    valuation_date: date,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Сумма будущих купонов в валюте и в процентах, признак флоатера.
+
+    Купон без годового процента или будущий купон без значения считается
+    признаком плавающего купона и в сумму не входит.
+
+    Возвращает: (sum_coupon, sum_coupon_percent, floater)
+    """
+    coupon_frequency = np.asarray(coupon_frequency, dtype=np.float64)
+    size = len(coupon_frequency)
+    today = np.datetime64(valuation_date, "D")
+
+    has_rate = ~np.isnan(rates)
+    future = has_rate & (dates > today)
+    unknown = future & np.isnan(values)
+    counted = future & ~unknown
+
+    frequency = coupon_frequency[owner] if len(owner) else np.zeros(0)
+    coupon_percent = np.where(
+        counted, rates / np.where(frequency > 0, frequency, 1), 0.0
+    )
+    sum_coupon = np.bincount(
+        owner, weights=np.where(counted, values, 0.0), minlength=size
+    )
+    sum_coupon_percent = np.bincount(owner, weights=coupon_percent, minlength=size)
+    floater = np.bincount(owner, weights=~has_rate | unknown, minlength=size) > 0
+
+    return np.round(sum_coupon, 2), np.round(sum_coupon_percent, 2), floater
+
+
+def calc_accint(
+    owner: np.ndarray,
+    dates: np.ndarray,
+    values: np.ndarray,
+    face_value: np.ndarray,
+    valuation_date: date,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Расчет НКД в валюте и в процентах от номинала.
+
+    owner, dates, values - плоский график купонов (см. flatten_coupons),
+    значение NaN означает неизвестный купон. НКД считается пропорционально
+    дням от предыдущего купона до ближайшего будущего купона с известным
+    значением.
+
+    Возвращает: (accint_value, accint_percent)
+    """
+    face_value = np.asarray(face_value, dtype=np.float64)
+    size = len(face_value)
+    accint_value = np.zeros(size)
+    accint_percent = np.zeros(size)
+    if not len(owner):
+        return accint_value, accint_percent
+
+    today = np.datetime64(valuation_date, "D")
+    order = np.lexsort((dates, owner))
+    owner, dates, values = owner[order], dates[order], values[order]
+
+    # Ближайший будущий купон с известным значением для каждой облигации
+    eligible = np.flatnonzero((dates > today) & ~np.isnan(values))
+    if not len(eligible):
+        return accint_value, accint_percent
+    bonds, first = np.unique(owner[eligible], return_index=True)
+    position = eligible[first]
+
+    next_date = dates[position]
+    next_value = values[position]
+    group_start = np.searchsorted(owner, bonds, side="left")
+    last_date = np.where(
+        position > group_start,
+        dates[np.maximum(position - 1, 0)],
+        next_date - np.timedelta64(DEFAULT_COUPON_PERIOD, "D"),
+    )
+
+    days_in_period = (next_date - last_date).astype(np.int64)
+    days_accrued = np.minimum((today - last_date).astype(np.int64), days_in_period)
+    valid = days_in_period > 0
+
+    value = np.where(
+        valid, next_value * days_accrued / np.where(valid, days_in_period, 1), 0.0
+    )
+    face = face_value[bonds]
+    percent = np.where(face > 0, value / np.where(face > 0, face, 1) * 100, 0.0)
+
+    accint_value[bonds] = np.round(value, 2)
+    accint_percent[bonds] = np.round(percent, 4)
+
+    return accint_value, accint_percent
+
+
+def calc_year_percent(
+    price: np.ndarray,
+    accint_percent: np.ndarray,
+    days_to_redemption: np.ndarray,
+    sum_coupon_percent: np.ndarray,
+    commission: float = COMMISSION,
+    tax: float = TAX,
+) -> np.ndarray:
+    """Калькуляция реальной годовой доходности от процентной цены"""
+    price = np.asarray(price, dtype=np.float64)
+    accint_percent = np.asarray(accint_percent, dtype=np.float64)
+    days_to_redemption = np.asarray(days_to_redemption, dtype=np.float64)
+    sum_coupon_percent = np.asarray(sum_coupon_percent, dtype=np.float64)
+
+    # Расчет цены покупки (price в процентах от номинала)
+    buy_price = price + accint_percent
+    final_price = buy_price + buy_price * commission / 100
+
+    # Расчет налога при продаже (100% — погашение по номиналу)
+    sold_delta = 100 - final_price
+    sold_tax = np.maximum(0, sold_delta * tax / 100)
+
+    # Налог на купонный доход (сумма купонов в процентах)
+    coupon_tax = sum_coupon_percent * tax / 100
+
+    income = (sold_delta + sum_coupon_percent) - (sold_tax + coupon_tax)
+    profit = income / final_price * 100
+    day_percent = profit / days_to_redemption
+
+    return np.round(day_percent * YEAR, 2)
@@ -0,0 +1,194 @@
+import logging
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import monotonic, perf_counter
+
+from services.metrics import Histogram
+
+
+class ScreenerCache:
+    """LRU-кэш результатов скринера с TTL и версией данных.
+
+    Версия данных (например, max(last_updated) таблицы bonds) проверяется
+    не чаще одного раза в version_interval секунд, при ее изменении
+    кэш полностью сбрасывается.
+    """
+
+    def __init__(
+        self,
+        maxsize: int | None = None,
+        ttl: float | None = None,
+        version_interval: float | None = None,
+    ) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+        if maxsize is None:
+            maxsize = int(os.getenv("SCREENER_CACHE_SIZE", default=256))
+        if ttl is None:
+            ttl = float(os.getenv("SCREENER_CACHE_TTL", default=3600))
+        if version_interval is None:
+            version_interval = float(
+                os.getenv("SCREENER_CACHE_VERSION_INTERVAL", default=30)
+            )
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version_interval = version_interval
+        self._data: OrderedDict = OrderedDict()
+        self._version = None
+        self._version_checked = None
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, key: tuple, loader, version_loader):
+        """Получение результата из кэша или через loader"""
+        await self._check_version(version_loader)
+
+        now = monotonic()
+        cached = self._data.get(key)
+        if cached is not None and now - cached[0] < self.ttl:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        value = await loader()
+        self._data[key] = (now, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+        return value
+
+    async def _check_version(self, version_loader):
+        """Сброс кэша при изменении версии данных"""
+        now = monotonic()
+        if (
+            self._version_checked is not None
+            and now - self._version_checked < self.version_interval
+        ):
+            return
+
+        version = await version_loader()
+        self._version_checked = now
+        if version != self._version:
+            if self._version is not None:
+                self.log.info("Данные обновлены (%s), кэш сброшен", version)
+            self._version = version
+            self._data.clear()
+
+    def clear(self):
+        self._data.clear()
+        self._version = None
+        self._version_checked = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "version": str(self._version),
+        }
+
+
+class ApiMetrics:
+    """Метрики API скринера для /metrics в текстовом формате Prometheus"""
+
+    def __init__(self, slow_query: float | None = None) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+        # Порог записи запроса скринера в лог как медленного, сек
+        if slow_query is None:
+            slow_query = float(os.getenv("SCREENER_SLOW_QUERY_SECONDS", default=0.5))
+        self.slow_query = slow_query
+        # Время ответа по (метод, шаблон пути, код ответа)
+        self.requests: dict[tuple[str, str, int], Histogram] = {}
+        # Время этапов обработки: query, serialize, render
+        self.stages: dict[str, Histogram] = {}
+
+    def observe_request(self, method: str, path: str, status: int, seconds: float):
+        key = (method, path, status)
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram()
+        histogram.observe(seconds)
+
+    def observe_stage(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, perf_counter() - start)
+
+    def observe_query(self, seconds: float, filters: dict):
+        """Время запроса к источнику данных, медленные запросы пишутся в лог"""
+        self.observe_stage("query", seconds)
+        if seconds >= self.slow_query:
+            self.log.warning("Медленный запрос скринера %.3f сек: %s", seconds, filters)
+
+    def render(self, cache: ScreenerCache, pool=None) -> str:
+        """Текст метрик для /metrics"""
+        lines = [
+            "# HELP screener_http_request_duration_seconds Время ответа API",
+            "# TYPE screener_http_request_duration_seconds histogram",
+        ]
+        for (method, path, status), histogram in self.requests.items():
+            lines += histogram.prometheus(
+                "screener_http_request_duration_seconds",
+                {"method": method, "path": path, "status": status},
+            )
+        lines += [
+            "# HELP screener_stage_duration_seconds Время этапов обработки запроса",
+            "# TYPE screener_stage_duration_seconds histogram",
+        ]
+        for stage, histogram in self.stages.items():
+            lines += histogram.prometheus(
+                "screener_stage_duration_seconds", {"stage": stage}
+            )
+
+        stats = cache.stats()
+        lines += [
+            "# TYPE screener_cache_hits_total counter",
+            f"screener_cache_hits_total {stats['hits']}",
+            "# TYPE screener_cache_misses_total counter",
+            f"screener_cache_misses_total {stats['misses']}",
+            "# TYPE screener_cache_entries gauge",
+            f"screener_cache_entries {stats['size']}",
+        ]
+        if pool is not None:
+            # Заполнение пула соединений БД
+            lines += [
+                "# TYPE screener_db_pool_size gauge",
+                f"screener_db_pool_size {pool.size()}",
+                "# TYPE screener_db_pool_checked_out gauge",
+                f"screener_db_pool_checked_out {pool.checkedout()}",
+                "# TYPE screener_db_pool_checked_in gauge",
+                f"screener_db_pool_checked_in {pool.checkedin()}",
+                # overflow() отрицателен, пока открыто меньше pool_size соединений
+                "# TYPE screener_db_pool_overflow gauge",
+                f"screener_db_pool_overflow {max(pool.overflow(), 0)}",
+            ]
+
+        return "\n".join(lines) + "\n"
+
+
+screener_cache = ScreenerCache()
+api_metrics = ApiMetrics()
@@ -0,0 +1,51 @@
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+
+class HistoryMaintenance:
+    """Обслуживание истории облигаций: прореживание и срок хранения.
+
+    Снимки младше daily_days дней хранятся за каждый день, более старые
+    прореживаются до последнего снимка недели. Снимки старше
+    retention_days дней удаляются, 0 - история хранится без ограничения.
+    """
+
+    def __init__(
+        self,
+        repository,
+        daily_days: int | None = None,
+        retention_days: int | None = None,
+    ) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+        if daily_days is None:
+            daily_days = int(os.getenv("MOEX_HISTORY_DAILY_DAYS", default=90))
+        if retention_days is None:
+            retention_days = int(os.getenv("MOEX_HISTORY_RETENTION_DAYS", default=1825))
+        self.repository = repository
+        self.daily_days = daily_days
+        self.retention_days = retention_days
+
+    def execute(self, today: date | None = None) -> dict:
+        """Одно обслуживание истории, возвращает число удаленных строк и секций"""
+        if today is None:
+            today = datetime.now().date()
+
+        dropped = []
+        if self.retention_days > 0:
+            dropped = self.repository.drop_expired(
+                before=today - timedelta(days=self.retention_days)
+            )
+        compacted = self.repository.compact(
+            before=today - timedelta(days=self.daily_days)
+        )
+        self.log.info(
+            "История: прорежено строк %d, удалено секций %d", compacted, len(dropped)
+        )
+
+        return {"compacted": compacted, "dropped": dropped}
@@ -0,0 +1,130 @@
+from time import time
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+
+class ResponseCache:
+    """Кэш ответов ISS на диске (SQLite) с TTL по типу запроса"""
+
+    # Время жизни записей по типу запроса, сек
+    _DEFAULT_TTL = {
+        "bondization": 24 * 3600,
+        "description": 24 * 3600,
+        "listing": 3600,
+        "marketdata": 60,
+    }
+
+    def __init__(self, path: str, ttl: dict[str, int] | None = None) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+        self.ttl = dict(self._DEFAULT_TTL)
+        for kind in self.ttl:
+            value = os.getenv(f"MOEX_CACHE_TTL_{kind.upper()}")
+            if value is not None:
+                self.ttl[kind] = int(value)
+        if ttl:
+            self.ttl.update(ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, url TEXT, body BLOB, etag TEXT, "
+            "last_modified TEXT, stored_at REAL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache | None":
+        """Кэш включается заданием MOEX_CACHE_PATH"""
+        path = os.getenv("MOEX_CACHE_PATH")
+        if not path:
+            return None
+        return cls(path=path)
+
+    @staticmethod
+    def key(url: str, params: dict | None) -> str:
+        """Ключ записи по адресу и параметрам запроса"""
+        dump = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha1(dump.encode()).hexdigest()
+
+    @staticmethod
+    def kind(url: str) -> str:
+        """Тип запроса по адресу ISS"""
+        if "/bondization" in url:
+            return "bondization"
+        if "/engines/" in url:
+            return "marketdata"
+        if url.endswith("/iss/securities.json"):
+            return "listing"
+        return "description"
+
+    def get(self, key: str) -> tuple | None:
+        """Запись кэша: (тело, etag, last_modified, время сохранения)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT body, etag, last_modified, stored_at "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+    def is_fresh(self, url: str, stored_at: float) -> bool:
+        return time() - stored_at < self.ttl[self.kind(url)]
+
+    def put(
+        self,
+        key: str,
+        url: str,
+        body: bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, body, etag, last_modified, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, url, body, etag, last_modified, time()),
+            )
+            self._conn.commit()
+
+    def touch(self, key: str):
+        """Продление записи после ответа 304 Not Modified"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ? WHERE key = ?", (time(), key)
+            )
+            self._conn.commit()
+
+    def purge(self) -> int:
+        """Удаление записей старше максимального TTL"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE stored_at < ?",
+                (time() - max(self.ttl.values()),),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime, time
+
+from aiohttp import ClientError
+
+from services.moex import MOSCOW, MarketPrices, TradingCalendar
+from services.moex_client import MoexClient
+from services.recalc import BondRecalc
+
+
+class PriceRefresh:
+    """Внутридневное обновление цен и доходности облигаций.
+
+    Запрашивается только таблица marketdata рынка облигаций, описания и
+    графики купонов не загружаются: доходность пересчитывается по графикам
+    из БД, обновляются только облигации с изменившейся ценой.
+    """
+
+    def __init__(
+        self,
+        repository,
+        schedule_repository,
+        interval: float | None = None,
+        session_start: time | None = None,
+        session_end: time | None = None,
+        calendar: TradingCalendar | None = None,
+    ) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+        # Период опроса, сек
+        if interval is None:
+            interval = float(os.getenv("MOEX_INTRADAY_INTERVAL", default=60))
+        # Границы торговой сессии по Москве
+        if session_start is None:
+            session_start = time.fromisoformat(
+                os.getenv("MOEX_INTRADAY_START", default="10:00")
+            )
+        if session_end is None:
+            session_end = time.fromisoformat(
+                os.getenv("MOEX_INTRADAY_END", default="18:50")
+            )
+        self.repository = repository
+        self.schedule_repository = schedule_repository
+        self.interval = interval
+        self.session_start = session_start
+        self.session_end = session_end
+        self.strategy = MarketPrices()
+        # Календарь торгов ISS, тот же, что у планировщика задач
+        self.calendar = calendar or TradingCalendar()
+        # Графики купонов за день не меняются и загружаются раз в день
+        self._schedules: dict[str, dict] = {}
+        self._schedules_date: date | None = None
+
+    async def in_session(self, now: datetime | None = None) -> bool:
+        """Идет ли торговая сессия (торговый день по календарю, время по Москве)"""
+        if now is None:
+            now = datetime.now(MOSCOW)
+        return self.in_window(now) and await self.calendar.is_trading_day(
+            now.date()
+        )
+
+    def in_window(self, now: datetime | None = None) -> bool:
+        """Попадает ли время в границы сессии, торговый день проверяет вызывающий"""
+        if now is None:
+            now = datetime.now(MOSCOW)
+        return self.session_start <= now.time() <= self.session_end
+
+    async def execute(self, valuation_date: date | None = None) -> int:
+        """Один опрос цен, возвращает число обновленных облигаций"""
+        if valuation_date is None:
+            valuation_date = datetime.now(MOSCOW).date()
+        prices = await self.strategy.process_data()
+        return await asyncio.to_thread(self._apply, prices, valuation_date)
+
+    def _apply(self, prices: dict, valuation_date: date) -> int:
+        """Пересчет и запись облигаций с изменившейся ценой"""
+        changed = []
+        for bond in self.repository.select_calc_data():
+            moex_yield = prices.get(bond["secid"])
+            # Без сделок и котировок цена нулевая, сохраненная остается
+            if moex_yield is None or moex_yield.price == 0:
+                continue
+            if (
+                moex_yield.price == bond["price"]
+                and moex_yield.moex_yield == bond["moex_yield"]
+            ):
+                continue
+            bond["price"] = moex_yield.price
+            bond["moex_yield"] = moex_yield.moex_yield
+            changed.append(bond)
+        if not changed:
+            return 0
+
+        schedules = self._get_schedules(valuation_date)
+        changed = [bond for bond in changed if bond["secid"] in schedules]
+        if not changed:
+            return 0
+        rows = BondRecalc.calculate(
+            bonds=changed,
+            schedules=[schedules[bond["secid"]] for bond in changed],
+            valuation_date=valuation_date,
+        )
+        bonds = {bond["id"]: bond for bond in changed}
+        for row in rows:
+            row["price"] = bonds[row["id"]]["price"]
+            row["moex_yield"] = bonds[row["id"]]["moex_yield"]
+        self.repository.update_calculated(rows)
+
+        return len(rows)
+
+    def _get_schedules(self, valuation_date: date) -> dict[str, dict]:
+        if self._schedules_date != valuation_date:
+            self._schedules = self.schedule_repository.select_schedules()
+            self._schedules_date = valuation_date
+        return self._schedules
+
+    async def run(self):
+        """Опрос цен каждые interval секунд во время торговой сессии"""
+        self.log.info(
+            "Обновление цен каждые %s сек с %s до %s",
+            self.interval,
+            self.session_start,
+            self.session_end,
+        )
+        async with MoexClient() as client:
+            self.strategy.client = client
+            self.calendar.client = client
+            while True:
+                if await self.in_session():
+                    try:
+                        updated = await self.execute()
+                        self.log.info("Обновлено цен: %d", updated)
+                    except (ClientError, ValueError) as e:
+                        self.log.info("Ошибка при обновлении цен: %s", e)
+                await asyncio.sleep(self.interval)
@@ -0,0 +1,142 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+
+
+def format_labels(labels: dict) -> str:
+    """Метки Prometheus: {name="value",...}"""
+    if not labels:
+        return ""
+    items = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        items.append(f'{key}="{value}"')
+    return "{" + ",".join(items) + "}"
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus: накопительные корзины, сумма, число"""
+
+    # Границы корзин по умолчанию, сек
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram"):
+        """Добавление наблюдений гистограммы с теми же корзинами"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Пары (le, число наблюдений не больше le), последняя - +Inf"""
+        result = []
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+    def prometheus(self, name: str, labels: dict | None = None) -> list[str]:
+        """Строки гистограммы в текстовом формате Prometheus"""
+        labels = labels or {}
+        lines = []
+        for bound, count in self.cumulative():
+            bucket_labels = format_labels({**labels, "le": bound})
+            lines.append(f"{name}_bucket{bucket_labels} {count}")
+        lines.append(f"{name}_sum{format_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{format_labels(labels)} {self.count}")
+        return lines
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class RunMetrics:
+    """Метрики одного запуска загрузки: этапы, запросы ISS, пропуски облигаций"""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        # Суммарное время этапов, сек
+        self.stages: dict[str, float] = {}
+        # Время ответа ISS по типам запросов
+        self.http: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+        # Пропущенные облигации по причинам
+        self.skipped: dict[str, set] = {}
+        # Первая причина пропуска по secid, для контрольных точек
+        self.skip_reasons: dict[str, str] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Замер времени этапа, время повторных входов суммируется"""
+        if not self.enabled:
+            yield
+            return
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + perf_counter() - start
+
+    def observe_http(self, kind: str, seconds: float):
+        if not self.enabled:
+            return
+        histogram = self.http.get(kind)
+        if histogram is None:
+            histogram = self.http[kind] = Histogram()
+        histogram.observe(seconds)
+
+    def inc(self, name: str, value: int = 1):
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def skip(self, reason: str, secid: str):
+        """Облигация не попала в результат по причине reason"""
+        if not self.enabled:
+            return
+        self.skipped.setdefault(reason, set()).add(secid)
+        self.skip_reasons.setdefault(secid, reason)
+
+    def merge(self, other: "RunMetrics"):
+        """Добавление метрик процесса-обработчика, время этапов суммируется"""
+        if not self.enabled:
+            return
+        for name, value in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + value
+        for kind, histogram in other.http.items():
+            self.http.setdefault(kind, Histogram(histogram.buckets)).merge(histogram)
+        for name, value in other.counters.items():
+            self.inc(name, value)
+        for reason, secids in other.skipped.items():
+            self.skipped.setdefault(reason, set()).update(secids)
+        for secid, reason in other.skip_reasons.items():
+            self.skip_reasons.setdefault(secid, reason)
+
+    def report(self) -> dict:
+        skipped = set().union(*self.skipped.values()) if self.skipped else set()
+        return {
+            "stages": {key: round(value, 3) for key, value in self.stages.items()},
+            "http": {key: value.as_dict() for key, value in self.http.items()},
+            "counters": dict(self.counters),
+            "skipped": {key: len(value) for key, value in self.skipped.items()},
+            "skipped_total": len(skipped),
+        }
+
+
+# Заглушка для стратегий, запущенных без сбора метрик
+NULL_METRICS = RunMetrics(enabled=False)
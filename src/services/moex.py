@@ -1,37 +1,147 @@
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta, date
-from time import time
+from contextlib import asynccontextmanager
+from datetime import datetime, date, timedelta, timezone
+from time import perf_counter, time
+import asyncio
+import hashlib
+import json
 import logging
-from aiohttp import ClientSession, ClientError
+import multiprocessing
+import os
+import queue
+from aiohttp import ClientSession, ClientError, TCPConnector
+from zoneinfo import ZoneInfo
+import numpy as np
+
+from services import calc
+from services.http_cache import ResponseCache
+from services.metrics import NULL_METRICS, RunMetrics
+from services.moex_client import MoexClient
 
 from schemas.bond import (
-    BondListModel,
-    BondModel,
+    BondFlagsModel,
+    CouponData,
     PrimaryDataModel,
-    PrimaryRequestModel,
-    YieldDataModel,
+    YieldData,
     YieldRawDataModel,
-    YieldRequestModel,
-    CouponDataModel,
-    CouponRequestModel,
 )
+from schemas.iss import IssBondization, IssTable, loads
+
+
+# Торговые даты и время сессии считаются по Москве
+MOSCOW = ZoneInfo("Europe/Moscow")
+
+
+def content_hash(value) -> str:
+    """Хэш содержимого для отслеживания изменений данных"""
+    dump = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(dump.encode()).hexdigest()
 
 
 class MoexStrategy(ABC):
     """Общий интерфейс работы с API Московской биржи"""
 
-    _API_MOEX_URL: str = "https://iss.moex.com"
+    # Адрес ISS, для стендов и бенчмарков подменяется через MOEX_ISS_URL
+    _API_MOEX_URL: str = os.getenv("MOEX_ISS_URL", default="https://iss.moex.com")
     headers = {"Accept-Encoding": "gzip"}
+    # Кэш ответов ISS, по умолчанию запросы идут напрямую
+    response_cache: ResponseCache | None = None
+    # Общая сессия запуска, без нее стратегия открывает собственную
+    client: MoexClient | None = None
+    # Метрики запуска, без ContextStrategy не собираются
+    metrics: RunMetrics = NULL_METRICS
 
     @abstractmethod
     async def process_data(self):
         """Метод для обработки данных, должен быть реализован в подклассах."""
         raise NotImplementedError
 
+    @asynccontextmanager
+    async def _open_session(self, limit: int = 100):
+        """Сессия общего клиента или собственная сессия стратегии"""
+        if self.client is not None:
+            yield self.client.session
+            return
+        async with ClientSession(
+            trust_env=True, headers=self.headers, connector=TCPConnector(limit=limit)
+        ) as session:
+            yield session
+
+    async def _get_json(self, session: ClientSession, url: str, params: dict):
+        """GET-запрос к ISS через кэш ответов с условной перепроверкой"""
+        cache = self.response_cache
+        if cache is None:
+            _, _, body = await self._fetch(session, url, params, self.headers)
+            return self._decode(body)
+
+        key = cache.key(url, params)
+        cached = await asyncio.to_thread(cache.get, key)
+        headers = dict(self.headers)
+        if cached is not None:
+            body, etag, last_modified, stored_at = cached
+            if cache.is_fresh(url, stored_at):
+                cache.hits += 1
+                self.metrics.inc("cache_hits")
+                return self._decode(body)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        status, response_headers, response_body = await self._fetch(
+            session, url, params, headers
+        )
+        if status == 304 and cached is not None:
+            cache.revalidated += 1
+            await asyncio.to_thread(cache.touch, key)
+            return self._decode(body)
+        cache.misses += 1
+        await asyncio.to_thread(
+            cache.put,
+            key,
+            url,
+            response_body,
+            response_headers.get("ETag"),
+            response_headers.get("Last-Modified"),
+        )
+        return self._decode(response_body)
+
+    def _decode(self, body: bytes) -> dict:
+        with self.metrics.stage("decode"):
+            return loads(body)
+
+    async def _fetch(
+        self, session: ClientSession, url: str, params: dict, headers: dict
+    ) -> tuple:
+        """Запрос через общий клиент с повторами либо напрямую через сессию"""
+        start = perf_counter()
+        try:
+            if self.client is not None:
+                return await self.client.get(url=url, params=params, headers=headers)
+            async with session.get(
+                url=url, params=params, headers=headers
+            ) as response:
+                response.raise_for_status()
+                return response.status, response.headers, await response.read()
+        finally:
+            self.metrics.observe_http(ResponseCache.kind(url), perf_counter() - start)
+
+    @staticmethod
+    def _parse_yield(raw_yield: dict) -> YieldData:
+        """Выбор цены из строки рыночных данных"""
+        raw_yield = YieldRawDataModel.model_validate(raw_yield)
+        price = raw_yield.last_price
+        if raw_yield.last_price == 0 and raw_yield.marketprice != 0:
+            price = raw_yield.marketprice
+
+        return YieldData(price=price, moex_yield=raw_yield.moex_yield)
+
 
 class BondList(MoexStrategy):
     """Класс-стратегия работы со списком облигаций Московской биржи"""
 
+    columns: str = "secid"
+
     def __init__(self) -> None:
         logging.basicConfig(
             level=logging.INFO,
@@ -43,7 +153,7 @@ class BondList(MoexStrategy):
     async def process_data(self):
         """Обработка данных для заданной страницы"""
         try:
-            async with ClientSession(trust_env=True, headers=self.headers) as session:
+            async with self._open_session() as session:
                 method_url = "/iss/securities.json"
                 url = f"{self._API_MOEX_URL}{method_url}"
                 page = 0
@@ -54,125 +164,445 @@ class BondList(MoexStrategy):
                     start = 100 * page
                     params = {
                         "iss.meta": "off",
-                        "securities.columns": "secid",
+                        "securities.columns": self.columns,
                         "engine": "stock",
                         "market": "bonds",
                         "is_trading": 1,
                         "start": start,
                     }
                     page += 1
-                    async with session.get(url=url, params=params) as response:
-                        response_bonds = await response.json()
-                        response = BondListModel.model_validate(response_bonds)
-                        bond_list = response.securities.data
+                    response_bonds = await self._get_json(
+                        session=session, url=url, params=params
+                    )
+                    securities = IssTable.from_block(response_bonds, "securities")
 
-                        # Если список пустой, завершаем генерацию
-                        if not bond_list:
-                            return
-                        result = [i[0] for i in bond_list]
-                        yield result
+                    # Если список пустой, завершаем генерацию
+                    if not securities.data:
+                        return
+                    result = self._parse_page(securities)
+                    yield result
 
         except ClientError as e:
-            # Обработка ошибок при запросе
+            # Повторы исчерпаны: обрыв списка нельзя выдавать за его конец
             self.log.info(
                 "Ошибка при запросе сведений об списке облиг. для страницы %d: %s",
-                page + 1,
+                page,
                 e,
             )
-            yield []
+            raise
+
+    def _parse_page(self, securities: IssTable) -> list:
+        """Получение списка secid из страницы"""
+        return [i[0] for i in securities.data]
+
+
+class BondMarket(BondList):
+    """Класс-стратегия работы со сводными таблицами рынка облигаций
+
+    Описание и рыночные данные всех облигаций загружаются одним запросом
+    к таблицам рынка и дополняются полями постраничного списка бумаг.
+    Признаков квалифицированного инвестора и повышенного риска в сводных
+    таблицах нет, они остаются None и заполняются BulkBond по описанию.
+    """
+
+    columns: str = "secid, isin, name, type, group, emitent_id"
+    # Поля таблицы рынка, изменение которых требует обновить график купонов
+    _LISTING_HASH_FIELDS = (
+        "MATDATE",
+        "FACEVALUE",
+        "COUPONPERIOD",
+        "NEXTCOUPON",
+        "COUPONVALUE",
+        "COUPONPERCENT",
+    )
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.log = logging.getLogger(__class__.__name__)
+        self.primary: dict[str, PrimaryDataModel] = {}
+        self.yields: dict[str, YieldData] = {}
+        self.listing_hash: dict[str, str] = {}
+        self._market: dict[str, dict] = {}
+
+    async def process_data(self):
+        """Загрузка таблиц рынка и постраничная выдача secid"""
+        async with self._open_session() as session:
+            self._market = await self._get_market(session=session)
+
+        async for page in super().process_data():
+            yield page
+
+    async def _get_market(self, session: ClientSession) -> dict[str, dict]:
+        """Получение сводных таблиц securities и marketdata рынка облигаций"""
+
+        method_url = "/iss/engines/stock/markets/bonds/securities"
+        params = {
+            "iss.meta": "off",
+            "iss.only": "securities, marketdata",
+            "securities.columns": (
+                "SECID, SHORTNAME, LATNAME, REGNUMBER, MATDATE, FACEVALUE, "
+                "FACEUNIT, LISTLEVEL, COUPONPERIOD, NEXTCOUPON, COUPONPERCENT, "
+                "COUPONVALUE, ACCRUEDINT, ISSUESIZE"
+            ),
+            "marketdata.columns": "SECID, LAST, MARKETPRICE, YIELD",
+            "marketprice_board": 1,
+        }
+
+        try:
+            url = f"{self._API_MOEX_URL}{method_url}.json"
+            response_market = await self._get_json(
+                session=session, url=url, params=params
+            )
+            securities = IssTable.from_block(response_market, "securities")
+            marketdata = IssTable.from_block(response_market, "marketdata")
+        except ClientError as e:
+            # Обработка ошибок при запросе
+            self.log.info("Ошибка при запросе таблиц рынка облигаций: %s", e)
+            raise
+        except (TypeError, ValueError) as e:
+            # Без таблиц рынка запуск не должен считаться успешным
+            self.log.info("Ошибка при обработке таблиц рынка облигаций: %s", e)
+            raise
+
+        market = {}
+        for group in (securities, marketdata):
+            for row in group.rows():
+                market.setdefault(row["SECID"], {}).update(row)
+        if not market:
+            raise ValueError("Пустые таблицы рынка облигаций")
+
+        return market
+
+    def _parse_page(self, securities: IssTable) -> list:
+        """Сборка описаний и рыночных данных для secid страницы"""
+        result = []
+        today = datetime.now().date()
+        for row in securities.data:
+            listing = dict(zip(securities.columns, row))
+            secid = listing["secid"]
+            # Бумага остается на странице, чтобы попасть в контрольную точку,
+            # BulkBond не загружает бумаги без описания из таблиц рынка
+            result.append(secid)
+            market = self._market.get(secid)
+            if market is None:
+                self.metrics.skip("missing_market", secid)
+                continue
+
+            try:
+                primary = self._build_primary(
+                    listing=listing, market=market, today=today
+                )
+                moex_yield = self._parse_yield(market)
+                listing_hash = content_hash(
+                    [market.get(key) for key in self._LISTING_HASH_FIELDS]
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                self.log.info(
+                    "Ошибка при обработке сведений облиг. для %s: %s", secid, e
+                )
+                self.metrics.skip("invalid_market", secid)
+                continue
+
+            self.primary[secid] = primary
+            self.yields[secid] = moex_yield
+            self.listing_hash[secid] = listing_hash
+
+        return result
+
+    @staticmethod
+    def _build_primary(listing: dict, market: dict, today: date) -> PrimaryDataModel:
+        """Сборка PrimaryDataModel из строк списка бумаг и таблицы рынка"""
+        matdate = market.get("MATDATE")
+        days_to_redemption = 0
+        if matdate and matdate != "0000-00-00":
+            days_to_redemption = (date.fromisoformat(matdate) - today).days
+        else:
+            matdate = None
+
+        # Частота выплат по длительности купонного периода в днях
+        coupon_period = market.get("COUPONPERIOD")
+        coupon_frequency = round(365 / coupon_period) if coupon_period else 0
+
+        desc = {
+            "SHORTNAME": market.get("SHORTNAME"),
+            "SECID": market.get("SECID"),
+            "ISIN": listing.get("isin"),
+            "MATDATE": matdate,
+            "INITIALFACEVALUE": market.get("FACEVALUE"),
+            "FACEUNIT": market.get("FACEUNIT"),
+            "LISTLEVEL": market.get("LISTLEVEL"),
+            "DAYSTOREDEMPTION": max(days_to_redemption, 0),
+            "FACEVALUE": market.get("FACEVALUE"),
+            "COUPONFREQUENCY": coupon_frequency,
+            "COUPONDATE": market.get("NEXTCOUPON"),
+            "COUPONPERCENT": market.get("COUPONPERCENT"),
+            "COUPONVALUE": market.get("COUPONVALUE"),
+            "TYPE": listing.get("type"),
+            "NAME": listing.get("name"),
+            "REGNUMBER": market.get("REGNUMBER"),
+            "ISSUEDATE": "",
+            "LATNAME": market.get("LATNAME"),
+            "ISSUESIZE": str(market.get("ISSUESIZE")),
+            "TYPENAME": "",
+            "GROUP": listing.get("group"),
+            "GROUPNAME": "",
+            "EMITTER_ID": str(listing.get("emitent_id")),
+        }
+        # Пустые значения заменяются значениями по умолчанию модели
+        desc = {key: value for key, value in desc.items() if value is not None}
+        # Признаки неизвестны, False сделал бы бумагу доступной скринеру
+        desc["ISQUALIFIEDINVESTORS"] = desc["HIGHRISK"] = None
+
+        return PrimaryDataModel.model_validate(desc)
+
+
+class SecidList(BondList):
+    """Класс-стратегия постраничной выдачи заданного списка secid без запросов"""
+
+    def __init__(self, secids: list[str], page_size: int = 100) -> None:
+        super().__init__()
+        self.log = logging.getLogger(__class__.__name__)
+        self.secids = secids
+        self.page_size = page_size
+
+    async def process_data(self):
+        for start in range(0, len(self.secids), self.page_size):
+            yield self.secids[start : start + self.page_size]
+
+
+class MarketPrices(MoexStrategy):
+    """Класс-стратегия получения текущих цен всех облигаций одним запросом"""
+
+    def __init__(self) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+
+    async def process_data(self) -> dict[str, YieldData]:
+        """Цена и доходность по secid из таблицы marketdata рынка облигаций"""
+        method_url = "/iss/engines/stock/markets/bonds/securities"
+        params = {
+            "iss.meta": "off",
+            "iss.only": "marketdata",
+            "marketdata.columns": "SECID, LAST, MARKETPRICE, YIELD",
+            "marketprice_board": 1,
+        }
+        url = f"{self._API_MOEX_URL}{method_url}.json"
+        async with self._open_session() as session:
+            response = await self._get_json(session=session, url=url, params=params)
+        marketdata = IssTable.from_block(response, "marketdata")
+
+        prices = {}
+        for row in marketdata.rows():
+            try:
+                prices[row["SECID"]] = self._parse_yield(row)
+            except (KeyError, TypeError, ValueError):
+                # Бумаги без доходности в текущих торгах пропускаются
+                continue
+
+        return prices
+
+
+class TradingCalendar(MoexStrategy):
+    """Класс-стратегия календаря торгов фондового рынка
+
+    Регулярное расписание по дням недели берется из таблицы timetable,
+    праздники и рабочие выходные - из таблицы dailytable. Без ответа ISS
+    торговыми считаются будни.
+    """
+
+    def __init__(self) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+        # Признак рабочего дня по дню недели (1 - понедельник) и по датам
+        self.week: dict[int, bool] = {}
+        self.days: dict[date, bool] = {}
+        self._loaded: date | None = None
+
+    async def process_data(self):
+        """Загрузка расписания торгов фондового рынка"""
+        url = f"{self._API_MOEX_URL}/iss/engines/stock.json"
+        params = {"iss.meta": "off", "iss.only": "timetable, dailytable"}
+        async with self._open_session() as session:
+            response = await self._get_json(session=session, url=url, params=params)
+        timetable = IssTable.from_block(response, "timetable")
+        dailytable = IssTable.from_block(response, "dailytable")
+
+        self.week = {
+            int(row["week_day"]): bool(row["is_work_day"])
+            for row in timetable.rows()
+        }
+        self.days = {
+            date.fromisoformat(row["date"]): bool(row["is_work_day"])
+            for row in dailytable.rows()
+        }
+
+    async def is_trading_day(self, day: date) -> bool:
+        """Является ли день торговым, расписание обновляется раз в день"""
+        today = datetime.now().date()
+        if self._loaded != today:
+            try:
+                await self.process_data()
+                self._loaded = today
+            except (ClientError, KeyError, TypeError, ValueError) as e:
+                self.log.info("Ошибка при загрузке календаря торгов: %s", e)
+
+        if day in self.days:
+            return self.days[day]
+        return self.week.get(day.isoweekday(), day.weekday() < 5)
 
 
 class Bond(MoexStrategy):
     """Класс-стратегия работы с облигацией Московской биржи"""
 
-    def __init__(self) -> None:
+    def __init__(self, concurrency: int | None = None) -> None:
         logging.basicConfig(
             level=logging.INFO,
             format="%(asctime)s - %(name)s - %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S",
         )
         self.log = logging.getLogger(__class__.__name__)
+        # Количество облигаций, обрабатываемых одновременно
+        if concurrency is None:
+            concurrency = int(os.getenv("MOEX_CONCURRENCY", default=20))
+        self.concurrency = concurrency
+        # Общий лимит для всех одновременных вызовов process_data
+        self._semaphore = asyncio.Semaphore(concurrency)
 
     async def process_data(self, list_bond: list) -> list:
-        result = []
-        async with ClientSession(trust_env=True, headers=self.headers) as session:
-            for secid in list_bond:
-                bond_info = await self._get_detail_bond(session=session, secid=secid)
-                moex_yield = await self._get_moex_yield(session=session, secid=secid)
-                if not bond_info or not moex_yield:
-                    continue
-
-                coupons = await self._get_amortization(
-                    session=session,
-                    secid=secid,
-                    coupon_frequency=bond_info.coupon_frequency,
+        records = []
+        async for record in self.iter_data(list_bond=list_bond):
+            records.append(record)
+
+        with self.metrics.stage("calc"):
+            return self._calc_bonds(records=records)
+
+    async def iter_data(self, list_bond: list):
+        """Параллельная загрузка облигаций, результат отдается по мере готовности"""
+        # На каждую облигацию приходится по три одновременных запроса
+        async with self._open_session(limit=self.concurrency * 3) as session:
+            tasks = [
+                asyncio.create_task(
+                    self._fetch_bond(
+                        session=session, semaphore=self._semaphore, secid=secid
+                    )
                 )
-                if not bond_info or not moex_yield or not coupons:
-                    continue
+                for secid in list_bond
+            ]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    record = await task
+                    if record:
+                        yield record
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def _fetch_bond(
+        self, session: ClientSession, semaphore: asyncio.Semaphore, secid: str
+    ) -> (
+        tuple[PrimaryDataModel, YieldData, CouponData, IssBondization]
+        | None
+    ):
+        """Загрузка данных по одной облигации"""
+        async with semaphore:
+            bond_info, moex_yield, bondization = await asyncio.gather(
+                self._get_detail_bond(session=session, secid=secid),
+                self._get_moex_yield(session=session, secid=secid),
+                self._get_bondization(session=session, secid=secid),
+            )
+        if not bond_info or not moex_yield or not bondization:
+            return None
 
-                price = moex_yield.price
-                face_value = bond_info.face_value
-                days_to_redemption = bond_info.days_to_redemption
-                sum_coupon = coupons.sum_coupon
-                sum_coupon_percent = coupons.sum_coupon_percent
-                if price == 0 or days_to_redemption == 0:
-                    continue
+        coupons = self._get_amortization(
+            secid=secid,
+            response=bondization,
+            coupon_frequency=bond_info.coupon_frequency,
+        )
+        if not coupons:
+            return None
 
-                # Расчет НКД самостоятельно на основе дат купонов
-                accint, accint_percent = self._calc_accint(
-                    coupons=coupons.coupons,
-                    face_value=face_value,
-                )
+        if moex_yield.price == 0:
+            self.metrics.skip("missing_price", secid)
+            return None
+        if bond_info.days_to_redemption == 0:
+            self.metrics.skip("redeemed", secid)
+            return None
 
-                # self.log.info("[%s] Расчет доходности:", secid)
-                # self.log.info(
-                #     "  price=%s, accint=%s, accint_percent=%s", price, accint, accint_percent
-                # )
-                # self.log.info(
-                #     "  face_value=%s, days_to_redemption=%s", face_value, days_to_redemption
-                # )
-                # self.log.info(
-                #     "  sum_coupon=%s, sum_coupon_percent=%s", sum_coupon, sum_coupon_percent
-                # )
-
-                year_percent = await self._calc_bond(
-                    price=price,
-                    accint=accint_percent,
-                    days_to_redemption=days_to_redemption,
-                    sum_coupon_percent=sum_coupon_percent,
-                )
+        return bond_info, moex_yield, coupons, bondization
 
-                # self.log.info("[%s] Итоговая доходность: %s%%", secid, year_percent)
-
-                bond_data = {
-                    "shortname": bond_info.short_name,
-                    "secid": bond_info.secid,
-                    "matdate": bond_info.matdate,
-                    "face_unit": bond_info.face_unit,
-                    "list_level": bond_info.list_level,
-                    "days_to_redemption": days_to_redemption,
-                    "face_value": face_value,
-                    "is_qualified_investors": bond_info.is_qualified_investors,
-                    "coupon_frequency": bond_info.coupon_frequency,
-                    "coupon_date": bond_info.coupon_date,
-                    "coupon_percent": bond_info.coupon_percent,
-                    "coupon_value": bond_info.coupon_value,
-                    "highrisk": bond_info.high_risk,
-                    "type": bond_info.type,
-                    "accint": accint,
-                    "accint_percent": accint_percent,
-                    "price": price,
-                    "moex_yield": moex_yield.moex_yield,
-                    "amortizations": coupons.amortizations,
-                    "floater": coupons.floater,
-                    "sum_coupon": sum_coupon,
-                    "sum_coupon_percent": sum_coupon_percent,
-                    "year_percent": year_percent,
-                }
+    def _calc_bonds(
+        self,
+        records: list[
+            tuple[PrimaryDataModel, YieldData, CouponData, IssBondization]
+        ],
+    ) -> list:
+        """Пакетный расчет НКД и доходности для загруженных облигаций"""
+        if not records:
+            return []
+
+        valuation_date = datetime.now().date()
+        bond_infos, moex_yields, coupons_list, _ = zip(*records)
+        face_value = np.array([i.face_value for i in bond_infos])
+        price = np.array([i.price for i in moex_yields])
+        days_to_redemption = np.array([i.days_to_redemption for i in bond_infos])
+        sum_coupon_percent = np.array([i.sum_coupon_percent for i in coupons_list])
+
+        # Расчет НКД самостоятельно на основе дат купонов
+        owner, dates, values, _ = calc.flatten_coupons(
+            [i.coupons for i in coupons_list]
+        )
+        accint, accint_percent = calc.calc_accint(
+            owner=owner,
+            dates=dates,
+            values=values,
+            face_value=face_value,
+            valuation_date=valuation_date,
+        )
+        year_percent = calc.calc_year_percent(
+            price=price,
+            accint_percent=accint_percent,
+            days_to_redemption=days_to_redemption,
+            sum_coupon_percent=sum_coupon_percent,
+        )
 
-                bond_data = BondModel.model_validate(bond_data)
-                bond_data = bond_data.model_dump()
-                result.append(bond_data)
+        result = []
+        for i, (bond_info, moex_yield, coupons, bondization) in enumerate(records):
+            bond_data = {
+                "shortname": bond_info.short_name,
+                "secid": bond_info.secid,
+                "matdate": bond_info.matdate,
+                "face_unit": bond_info.face_unit,
+                "list_level": bond_info.list_level,
+                "days_to_redemption": bond_info.days_to_redemption,
+                "face_value": bond_info.face_value,
+                "coupon_frequency": bond_info.coupon_frequency,
+                "coupon_date": bond_info.coupon_date,
+                "coupon_percent": bond_info.coupon_percent,
+                "coupon_value": bond_info.coupon_value,
+                "highrisk": bond_info.high_risk,
+                "type": bond_info.type,
+                "accint": float(accint[i]),
+                "accint_percent": float(accint_percent[i]),
+                "price": moex_yield.price,
+                "moex_yield": moex_yield.moex_yield,
+                "amortizations": coupons.amortizations,
+                "floater": coupons.floater,
+                "sum_coupon": coupons.sum_coupon,
+                "sum_coupon_percent": coupons.sum_coupon_percent,
+                "year_percent": float(year_percent[i]),
+            }
+            # Полный график купонов и амортизации сохраняется в БД
+            bond_data["coupon_schedule"] = bondization.coupons.data
+            bond_data["amortization_schedule"] = bondization.amortizations.data
+            result.append(bond_data)
 
         return result
 
@@ -180,6 +610,30 @@ class Bond(MoexStrategy):
         self, session: ClientSession, secid: str
     ) -> PrimaryDataModel | None:
         """Получение общей детальной информации по облигации"""
+        desc = await self._get_description(session=session, secid=secid)
+        if desc is None:
+            return None
+
+        try:
+            with self.metrics.stage("validate"):
+                bond_info = PrimaryDataModel.model_validate(desc)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            # Обработка ошибок при обработке данных
+            self.log.info("Ошибка при обработке сведений облиг. для %s: %s", secid, e)
+            self.metrics.skip("invalid_description", secid)
+            return None
+
+        # Проверка на квалификацию инвестора
+        if bond_info.is_qualified_investors == 1:
+            self.metrics.skip("qualified_only", secid)
+            return None
+
+        return bond_info
+
+    async def _get_description(
+        self, session: ClientSession, secid: str
+    ) -> dict | None:
+        """Получение описания облигации в виде словаря name-value"""
 
         # Формирование URL для запроса информации об облигации
         method_url = f"/iss/securities/{secid}"
@@ -192,33 +646,25 @@ class Bond(MoexStrategy):
         try:
             # Запрос информации об облигации
             url = f"{self._API_MOEX_URL}{method_url}.json"
-            async with session.get(
-                url=url, params=params, headers=self.headers
-            ) as response:
-                response_bond = await response.json()
-                response = PrimaryRequestModel.model_validate(response_bond)
-                desc = response.description
-                desc = {key: value for key, value in desc.data}
-                bond_info = PrimaryDataModel.model_validate(desc)
-
-                # Проверка на квалификацию инвестора
-                if bond_info.is_qualified_investors == 1:
-                    return None
-
-                return bond_info
+            response_bond = await self._get_json(
+                session=session, url=url, params=params
+            )
+            return IssTable.from_block(response_bond, "description").pairs()
 
         except ClientError as e:
             # Обработка ошибок при запросе
             self.log.info("Ошибка при запросе сведений об облиг. для %s: %s", secid, e)
+            self.metrics.skip("http_error", secid)
             return None
         except (KeyError, IndexError, TypeError, ValueError) as e:
             # Обработка ошибок при обработке данных
             self.log.info("Ошибка при обработке сведений облиг. для %s: %s", secid, e)
+            self.metrics.skip("invalid_description", secid)
             return None
 
     async def _get_moex_yield(
         self, session: ClientSession, secid: str
-    ) -> YieldDataModel | None:
+    ) -> YieldData | None:
         """Получение доходности и цены"""
 
         # Формирование URL для запроса истории доходности
@@ -233,275 +679,905 @@ class Bond(MoexStrategy):
         try:
             # Запрос истории доходности
             url = f"{self._API_MOEX_URL}{method_url}.json"
-            async with session.get(
-                url=url, params=params, headers=self.headers
-            ) as response:
-                response_bond = await response.json()
-                response = YieldRequestModel.model_validate(response_bond)
-
-                securities = response.securities
-                securities = dict(zip(securities.columns, securities.data[0]))
-
-                marketdata = response.marketdata
-                marketdata = dict(zip(marketdata.columns, marketdata.data[0]))
-
-                raw_yield = securities | marketdata
-                raw_yield = YieldRawDataModel.model_validate(raw_yield)
-                price = raw_yield.last_price
-                if raw_yield.last_price == 0 and raw_yield.marketprice != 0:
-                    price = raw_yield.marketprice
-                moex_yield = {
-                    "price": price,
-                    "moex_yield": raw_yield.moex_yield,
-                }
-
-                moex_yield = YieldDataModel.model_validate(moex_yield)
+            response_bond = await self._get_json(
+                session=session, url=url, params=params
+            )
+            securities = IssTable.from_block(response_bond, "securities").first()
+            marketdata = IssTable.from_block(response_bond, "marketdata").first()
 
-                return moex_yield
+            return self._parse_yield(securities | marketdata)
 
         except ClientError as e:
             # Обработка ошибок при запросе
             self.log.info("Ошибка при запросе доходности MOEX для %s: %s", secid, e)
+            self.metrics.skip("http_error", secid)
             return None
         except (IndexError, TypeError, ValueError) as e:
             # Обработка ошибок при обработке данных
             self.log.info("Ошибка при обработке доходности MOEX для %s: %s", secid, e)
+            self.metrics.skip("invalid_marketdata", secid)
             return None
 
-    async def _get_amortization(
-        self,
-        session: ClientSession,
-        secid: str,
-        coupon_frequency: int,
-    ) -> CouponDataModel | None:
-        """Получение значений амортизации, плавающего купона и суммы купонов"""
+    async def _get_bondization(
+        self, session: ClientSession, secid: str
+    ) -> IssBondization | None:
+        """Получение графика купонов и амортизации"""
 
-        date_now = datetime.now()
         method_url = f"/iss/securities/{secid}/bondization"
         params = {
             "iss.meta": "off",
             "iss.only": "amortizations,coupons",
-            "amortizations.columns": "facevalue",
+            "amortizations.columns": "amortdate, facevalue, value, valueprc",
             "coupons.columns": "coupondate, value, valueprc",
             "limit": "unlimited",
         }
         try:
             url = f"{self._API_MOEX_URL}{method_url}.json"
-            async with session.get(
-                url=url, params=params, headers=self.headers
-            ) as response:
-                response_bond = await response.json()
-
-                response = CouponRequestModel.model_validate(response_bond)
-
-                amortizations = len(response.amortizations.data) > 1
-
-                sum_coupon = 0
-                sum_coupon_percent = 0
-                floater = False
-                coupons = response.coupons
-                # coupons.data - это список [coupondate, value, valueprc]
-                # valueprc - это годовой процент купона
-                # Сохраняем все купоны для расчета НКД
-                coupons_list: list[tuple[date, float, float]] = []
-
-                # self.log.info("[%s] Купонов найдено: %d", secid, len(coupons.data))
-                # self.log.info("[%s] Частота выплат: %s", secid, coupon_frequency)
-
-                # Проверка coupon_frequency на None
-                if coupon_frequency is None or coupon_frequency <= 0:
-                    self.log.warning("[%s] Неверная частота купонов, пропускаем", secid)
-                    return None
-
-                coupons_data = {
-                    datetime.strptime(item[0], "%Y-%m-%d").date(): (item[1], item[2])
-                    for item in coupons.data
-                }
-                for coupon_date, (
-                    coupon_value,
-                    coupon_rate_year,
-                ) in coupons_data.items():
-                    # Пропускаем купоны без значения процента (флоатеры)
-                    if coupon_rate_year is None:
-                        floater = True
-                        continue
-                        
-                    # Расчет процента за один купон: годовой процент / частоту выплат
-                    coupon_percent = coupon_rate_year / coupon_frequency
-
-                    # Сохраняем данные о купоне для расчета НКД
-                    coupons_list.append((coupon_date, coupon_value, coupon_rate_year))
-
-                    delta = coupon_date - date_now.date()
-                    if delta.days > 0:
-                        # self.log.info(
-                        #     "[%s] Купон %s: value=%s, rate_year=%s%%, coupon_percent=%.4f%%",
-                        #     secid, coupon_date, coupon_value, coupon_rate_year, coupon_percent
-                        # )
-
-                        if coupon_value is None:
-                            floater = True
-                            coupon_value = 0
-                            coupon_percent = 0
-
-                        sum_coupon += coupon_value
-                        sum_coupon_percent += coupon_percent
-
-                # self.log.info(
-                #     "[%s] Сумма купонов: валюта=%s, процент=%.4f",
-                #     secid, sum_coupon, sum_coupon_percent
-                # )
-                sum_coupon = round(sum_coupon, 2)
-                sum_coupon_percent = round(sum_coupon_percent, 2)
-
-                coupons_data_model = {
-                    "amortizations": amortizations,
-                    "floater": floater,
-                    "sum_coupon": sum_coupon,
-                    "sum_coupon_percent": sum_coupon_percent,
-                    "coupons": coupons_list,
-                }
-
-                coupons = CouponDataModel.model_validate(coupons_data_model)
+            response_bond = await self._get_json(
+                session=session, url=url, params=params
+            )
 
-                return coupons
+            return IssBondization.from_raw(response_bond)
         except ClientError as e:
             # Обработка ошибок при запросе
             self.log.info("Ошибка при запросе купонов MOEX для %s: %s", secid, e)
+            self.metrics.skip("http_error", secid)
             return None
-        except (IndexError, TypeError, ValueError) as e:
+        except (TypeError, ValueError) as e:
             # Обработка ошибок при обработке данных
             self.log.info("Ошибка при обработке купонов MOEX для %s: %s", secid, e)
+            self.metrics.skip("invalid_bondization", secid)
             return None
 
-    def _calc_accint(
+    def _get_amortization(
         self,
-        coupons: list[tuple[date, float | None, float | None]],
-        face_value: float,
-    ) -> tuple[float, float]:
-        """
-        Расчет НКД в валюте и в процентах от номинала.
+        secid: str,
+        response: IssBondization,
+        coupon_frequency: int,
+    ) -> CouponData | None:
+        """Получение значений амортизации, плавающего купона и суммы купонов"""
 
-        Возвращает: (accint_value, accint_percent)
-        """
         today = datetime.now().date()
+        try:
+            amortizations = len(response.amortizations.data) > 1
+
+            sum_coupon = 0
+            sum_coupon_percent = 0
+            floater = False
+            coupons = response.coupons
+            # coupons.data - это список [coupondate, value, valueprc]
+            # valueprc - это годовой процент купона
+            # Сохраняем все купоны для расчета НКД
+            coupons_list: list[tuple[date, float, float]] = []
+
+            # Проверка coupon_frequency на None
+            if coupon_frequency is None or coupon_frequency <= 0:
+                self.log.warning("[%s] Неверная частота купонов, пропускаем", secid)
+                self.metrics.skip("invalid_frequency", secid)
+                return None
+
+            coupons_data = {
+                date.fromisoformat(item[0]): (item[1], item[2]) for item in coupons.data
+            }
+            for coupon_date, (
+                coupon_value,
+                coupon_rate_year,
+            ) in coupons_data.items():
+                # Пропускаем купоны без значения процента (флоатеры)
+                if coupon_rate_year is None:
+                    floater = True
+                    continue
 
-        # Фильтруем будущие купоны с известными значениями (не флоатеры)
-        future_coupons = [(d, v, r) for d, v, r in coupons if d > today and v is not None]
+                # Расчет процента за один купон: годовой процент / частоту выплат
+                coupon_percent = coupon_rate_year / coupon_frequency
 
-        if not future_coupons:
-            # self.log.info("  [accint] Нет будущих купонов, НКД = 0")
-            return 0.0, 0.0
+                # Сохраняем данные о купоне для расчета НКД
+                coupons_list.append((coupon_date, coupon_value, coupon_rate_year))
 
-        # Находим последний прошедший и следующий купоны
-        all_coupons_sorted = sorted(coupons, key=lambda x: x[0])
+                delta = coupon_date - today
+                if delta.days > 0:
+                    if coupon_value is None:
+                        floater = True
+                        coupon_value = 0
+                        coupon_percent = 0
 
-        last_coupon_date = None
-        next_coupon_date = None
-        next_coupon_value = None
+                    sum_coupon += coupon_value
+                    sum_coupon_percent += coupon_percent
 
-        for i, (coupon_date, coupon_value, _) in enumerate(all_coupons_sorted):
-            if coupon_date > today and coupon_value is not None:
-                next_coupon_date = coupon_date
-                next_coupon_value = coupon_value
-                if i > 0:
-                    last_coupon_date = all_coupons_sorted[i - 1][0]
-                break
+            sum_coupon = round(sum_coupon, 2)
+            sum_coupon_percent = round(sum_coupon_percent, 2)
 
-        # Если нет предыдущего купона, используем дату выпуска (упрощенно)
-        if last_coupon_date is None:
-            # Берем предыдущую дату от следующего купона на основе частоты
-            # Упрощенно: отнимаем ~6 месяцев для полугодовых купонов
-            last_coupon_date = next_coupon_date - timedelta(days=182)
+            return CouponData(
+                amortizations=amortizations,
+                floater=floater,
+                sum_coupon=sum_coupon,
+                sum_coupon_percent=sum_coupon_percent,
+                coupons=coupons_list,
+            )
+        except (IndexError, TypeError, ValueError) as e:
+            # Обработка ошибок при обработке данных
+            self.log.info("Ошибка при обработке купонов MOEX для %s: %s", secid, e)
+            self.metrics.skip("invalid_bondization", secid)
+            return None
 
-        if next_coupon_date is None or next_coupon_value is None:
-            # self.log.info("  [accint] Не удалось найти следующий купон, НКД = 0")
-            return 0.0, 0.0
 
-        # Расчет дней
-        days_in_period = (next_coupon_date - last_coupon_date).days
-        days_accrued = (today - last_coupon_date).days
+class BulkBond(Bond):
+    """Класс-стратегия облигации на основе сводных таблиц рынка
 
-        if days_in_period <= 0:
-            # self.log.info("  [accint] Ошибка расчета дней, НКД = 0")
-            return 0.0, 0.0
+    Описание и рыночные данные берутся из заранее загруженных таблиц
+    BondMarket. Признаки квалифицированного инвестора и повышенного риска
+    берутся из описания бумаги: в инкрементальном режиме из сохраненного,
+    иначе запросом описания вместе с графиком купонов.
+    """
 
-        # НКД не может быть больше суммы купона
-        days_accrued = min(days_accrued, days_in_period)
+    def __init__(self, market: BondMarket, concurrency: int | None = None) -> None:
+        super().__init__(concurrency=concurrency)
+        self.log = logging.getLogger(__class__.__name__)
+        self.market = market
+
+    async def _fetch_bond(
+        self, session: ClientSession, semaphore: asyncio.Semaphore, secid: str
+    ) -> (
+        tuple[PrimaryDataModel, YieldData, CouponData, IssBondization]
+        | None
+    ):
+        # Причина пропуска бумаги без строки в таблицах рынка уже записана
+        if secid not in self.market.primary:
+            return None
+        return await super()._fetch_bond(
+            session=session, semaphore=semaphore, secid=secid
+        )
 
-        # Расчет НКД пропорционально дням
-        accint_value = next_coupon_value * (days_accrued / days_in_period)
-        accint_percent = (accint_value / face_value) * 100 if face_value > 0 else 0
+    async def _get_detail_bond(
+        self, session: ClientSession, secid: str
+    ) -> PrimaryDataModel | None:
+        bond_info = self.market.primary.get(secid)
+        if bond_info is None:
+            return None
+        desc = await self._get_description(session=session, secid=secid)
+        if desc is None:
+            return None
 
-        # self.log.info("  [accint] last_coupon=%s, next_coupon=%s", last_coupon_date, next_coupon_date)
-        # self.log.info("  [accint] days_in_period=%d, days_accrued=%d", days_in_period, days_accrued)
-        # self.log.info(
-        #     "  [accint] coupon_value=%s, accint_value=%s, accint_percent=%s",
-        #     next_coupon_value, round(accint_value, 2), round(accint_percent, 4)
-        # )
+        try:
+            with self.metrics.stage("validate"):
+                flags = BondFlagsModel.model_validate(desc)
+        except ValueError as e:
+            self.log.info("Ошибка при обработке сведений облиг. для %s: %s", secid, e)
+            self.metrics.skip("invalid_description", secid)
+            return None
 
-        return round(accint_value, 2), round(accint_percent, 4)
+        # Проверка на квалификацию инвестора
+        if flags.is_qualified_investors:
+            self.metrics.skip("qualified_only", secid)
+            return None
 
-    async def _calc_bond(
-        self,
-        price: float,
-        accint: float,
-        days_to_redemption: int,
-        sum_coupon_percent: float,
-        commission: float = 0.3,
-        tax: int = 13,
-    ) -> float:
-        """Калькуляция реальной годовой доходности от процентной цены"""
+        return bond_info.model_copy(
+            update={
+                "is_qualified_investors": flags.is_qualified_investors,
+                "high_risk": flags.high_risk,
+            }
+        )
 
-        year = 365
+    async def _get_moex_yield(
+        self, session: ClientSession, secid: str
+    ) -> YieldData | None:
+        return self.market.yields.get(secid)
+
+
+class IncrementalMixin:
+    """Повторное использование сохраненных описаний и графиков купонов
+
+    Описание и график купонов берутся из хранилища static_repository, если
+    они загружены не раньше MOEX_STATIC_TTL_DAYS дней назад, с момента
+    загрузки не прошла дата купона и (в режиме сводных таблиц) не изменились
+    параметры бумаги в таблице рынка. Рыночные данные запрашиваются всегда.
+    """
+
+    def __init__(
+        self, *args, static_repository, ttl_days: int | None = None, **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if ttl_days is None:
+            ttl_days = int(os.getenv("MOEX_STATIC_TTL_DAYS", default=7))
+        self.static_repository = static_repository
+        self.ttl = timedelta(days=ttl_days)
+        self._static: dict[str, dict] = {}
+        self._fetched: dict[str, dict] = {}
 
-        # Расчет цены покупки (price уже в процентах от номинала)
-        buy_price = price + accint
-        commission_buy = buy_price * commission / 100
-        final_price = buy_price + commission_buy
+    async def process_data(self, list_bond: list) -> list:
+        with self.metrics.stage("static_load"):
+            static = await asyncio.to_thread(
+                self.static_repository.select_static, list_bond
+            )
+        self._static.update(static)
+        try:
+            result = await super().process_data(list_bond=list_bond)
+        finally:
+            rows = [
+                self._fetched.pop(secid)
+                for secid in list_bond
+                if secid in self._fetched
+            ]
+            for secid in list_bond:
+                self._static.pop(secid, None)
+
+        self.log.info(
+            "Сохраненных данных: %d из %d, обновлено: %d",
+            len(static),
+            len(list_bond),
+            len(rows),
+        )
+        if rows:
+            with self.metrics.stage("static_save"):
+                await asyncio.to_thread(self.static_repository.update_static, rows)
+
+        return result
+
+    def _listing_hash(self, secid: str) -> str | None:
+        return None
+
+    def _is_fresh(self, fetched_at: datetime | None, now: datetime) -> bool:
+        return fetched_at is not None and now - fetched_at < self.ttl
 
-        # self.log.info("  [calc] buy_price=%s, commission=%s, final_price=%s", buy_price, commission_buy, final_price)
+    async def _get_description(
+        self, session: ClientSession, secid: str
+    ) -> dict | None:
+        cached = self._static.get(secid) or {}
+        desc = cached.get("description")
+        fetched_at = cached.get("description_fetched_at")
+        now = datetime.now()
+        today = now.date()
+        if desc and self._is_fresh(fetched_at, now):
+            coupon_date = desc.get("COUPONDATE")
+            passed = coupon_date and fetched_at.date().isoformat() < coupon_date
+            if not (passed and coupon_date <= today.isoformat()):
+                desc = dict(desc)
+                # Число дней до погашения в сохраненном описании устаревает
+                matdate = desc.get("MATDATE")
+                if matdate:
+                    matdate = date.fromisoformat(matdate)
+                    desc["DAYSTOREDEMPTION"] = str(max((matdate - today).days, 0))
+                return desc
+
+        desc = await super()._get_description(session=session, secid=secid)
+        if desc is not None:
+            self._remember(secid=secid, description=desc)
+
+        return desc
+
+    async def _get_bondization(
+        self, session: ClientSession, secid: str
+    ) -> IssBondization | None:
+        cached = self._static.get(secid) or {}
+        bondization = cached.get("bondization")
+        fetched_at = cached.get("bondization_fetched_at")
+        now = datetime.now()
+        listing_hash = self._listing_hash(secid=secid)
+        if (
+            bondization
+            and self._is_fresh(fetched_at, now)
+            and listing_hash == cached.get("listing_hash")
+        ):
+            response = IssBondization.from_raw(bondization)
+            # С момента загрузки прошла выплата купона - график мог измениться
+            fetched, today = fetched_at.date().isoformat(), now.date().isoformat()
+            if not any(fetched < row[0] <= today for row in response.coupons.data):
+                return response
+
+        response = await super()._get_bondization(session=session, secid=secid)
+        if response is not None:
+            self._remember(
+                secid=secid,
+                bondization=response.as_dict(),
+                listing_hash=listing_hash,
+            )
+
+        return response
 
-        # Расчет налога при продаже (100% — погашение по номиналу)
-        sold_delta = 100 - final_price
-        sold_tax = max(0, sold_delta * tax / 100)
+    def _remember(self, secid: str, **values):
+        """Запоминание загруженных данных для сохранения в хранилище"""
+        now = datetime.now()
+        row = self._fetched.get(secid)
+        if row is None:
+            cached = self._static.get(secid) or {}
+            row = {
+                "secid": secid,
+                "description": cached.get("description"),
+                "description_fetched_at": cached.get("description_fetched_at"),
+                "bondization": cached.get("bondization"),
+                "bondization_fetched_at": cached.get("bondization_fetched_at"),
+                "listing_hash": cached.get("listing_hash"),
+            }
+            self._fetched[secid] = row
 
-        # self.log.info("  [calc] sold_delta=%s, sold_tax=%s", sold_delta, sold_tax)
+        for key, value in values.items():
+            row[key] = value
+            if key in ("description", "bondization"):
+                row[f"{key}_fetched_at"] = now
+        row["content_hash"] = content_hash([row["description"], row["bondization"]])
 
-        # Расчет купонного дохода и налога на купоны (сумма купона в процентах)
-        coupon_tax = sum_coupon_percent * tax / 100
 
-        # self.log.info("  [calc] coupon_tax=%s", coupon_tax)
+class IncrementalBond(IncrementalMixin, Bond):
+    """Класс-стратегия облигации с повторным использованием статичных данных"""
 
-        # Расчет общего дохода и процента годовой доходности
-        income = (sold_delta + sum_coupon_percent) - (sold_tax + coupon_tax)
-        profit = income / final_price * 100
-        day_percent = profit / days_to_redemption
-        year_percent = round(day_percent * year, 2)
 
-        # self.log.info("  [calc] income=%s, profit=%s%%, day_percent=%s, year_percent=%s", income, profit, day_percent, year_percent)
+class IncrementalBulkBond(IncrementalMixin, BulkBond):
+    """Класс-стратегия облигации по таблицам рынка с сохраненными графиками купонов"""
 
-        return year_percent
+    def _listing_hash(self, secid: str) -> str | None:
+        return self.market.listing_hash.get(secid)
 
 
 class ContextStrategy:
     """Контекст работает с выполнением стратегий"""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        workers: int | None = None,
+        queue_size: int | None = None,
+        bulk: bool | None = None,
+        incremental: bool | None = None,
+        static_repository=None,
+        response_cache: ResponseCache | None = None,
+        client: MoexClient | None = None,
+        run_repository=None,
+        resume_hours: float | None = None,
+        processes: int | None = None,
+        history_repository=None,
+    ) -> None:
         logging.basicConfig(
             level=logging.INFO,
             format="%(asctime)s - %(name)s - %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S",
         )
         self.log = logging.getLogger(__class__.__name__)
+        # Количество обработчиков страниц, работающих параллельно
+        if workers is None:
+            workers = int(os.getenv("MOEX_PIPELINE_WORKERS", default=3))
+        # Размер очередей между этапами, при заполнении этапы ждут друг друга
+        if queue_size is None:
+            queue_size = int(os.getenv("MOEX_QUEUE_SIZE", default=4))
+        # Режим загрузки через сводные таблицы рынка
+        if bulk is None:
+            bulk = os.getenv("MOEX_BULK", default="0") == "1"
+        # Режим повторного использования описаний и графиков купонов
+        if incremental is None:
+            incremental = os.getenv("MOEX_INCREMENTAL", default="0") == "1"
+        if incremental and static_repository is None:
+            raise ValueError("Для инкрементального режима нужен static_repository")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.bulk = bulk
+        self.incremental = incremental
+        self.static_repository = static_repository
+        # Кэш ответов ISS на диске, включается через MOEX_CACHE_PATH
+        if response_cache is None:
+            response_cache = ResponseCache.from_env()
+        self.response_cache = response_cache
+        # Общая сессия ISS, переданный извне клиент не закрывается
+        self.client = client
+        # Хранилище отчетов о запусках, без него отчет только пишется в лог
+        self.run_repository = run_repository
+        # Незавершенный запуск не старше resume_hours часов продолжается
+        # с контрольной точки, 0 - каждый запуск начинается заново
+        if resume_hours is None:
+            resume_hours = float(os.getenv("MOEX_RESUME_HOURS", default=12))
+        self.resume_hours = resume_hours
+        # Число процессов обработки облигаций, 1 - обработка в текущем процессе
+        if processes is None:
+            processes = int(os.getenv("MOEX_PROCESSES", default=1))
+        self.processes = max(1, processes)
+        # Хранилище истории, снимок записывается после успешного запуска
+        self.history_repository = history_repository
+        self.metrics = NULL_METRICS
+        self._run_id: int | None = None
+        # Исходный запуск при повторной загрузке облигаций с ошибкой
+        self._parent_id: int | None = None
+        # Облигации, уже обработанные в продолжаемом запуске
+        self._completed: set[str] = set()
+
+    @property
+    def mode(self) -> str:
+        mode = "bulk" if self.bulk else "full"
+        if self.incremental:
+            mode = f"{mode}_incremental"
+        return mode
+
+    async def execute_strategy(self, update_data) -> dict:
+        """Конвейер: постраничная загрузка -> обработка облигаций -> запись в БД
+
+        Возвращает отчет о запуске: время этапов, время ответов ISS по типам
+        запросов, счетчики и число пропущенных облигаций по причинам.
+        Незавершенный запуск того же режима продолжается с контрольной точки.
+        """
+        run_id = None
+        started_at = datetime.utcnow()
+        if self.run_repository is not None:
+            if self.resume_hours > 0:
+                since = started_at - timedelta(hours=self.resume_hours)
+                run_id = await asyncio.to_thread(
+                    self.run_repository.select_resumable, self.mode, since
+                )
+            if run_id is None:
+                run_id = await asyncio.to_thread(
+                    self.run_repository.start_run, self.mode
+                )
+            else:
+                self.log.info("Продолжение запуска %d", run_id)
+                started_at = await asyncio.to_thread(
+                    self.run_repository.resume_run, run_id
+                )
+        if self.bulk:
+            bond_list = BondMarket()
+            if self.incremental:
+                bond = IncrementalBulkBond(
+                    market=bond_list, static_repository=self.static_repository
+                )
+            else:
+                bond = BulkBond(market=bond_list)
+        else:
+            bond_list = BondList()
+            bond = self._bond()
+
+        return await self._execute(update_data, bond_list, bond, run_id, started_at)
+
+    async def retry_failed(self, update_data, run_id: int | None = None) -> dict:
+        """Повторная загрузка облигаций с ошибкой запроса без полного обновления
+
+        По умолчанию берется последний запуск с такими облигациями. Описания
+        и графики запрашиваются по каждой облигации и в режиме сводных таблиц.
+        Повтор записывается отдельным запуском режима retry со ссылкой на
+        исходный, отчет исходного запуска не меняется, а статусы облигаций
+        в его контрольной точке обновляются.
+        """
+        if self.run_repository is None:
+            raise ValueError("Для повторной загрузки нужен run_repository")
+        parent_id, secids = await asyncio.to_thread(
+            self.run_repository.select_failed, run_id
+        )
+        if not secids:
+            self.log.info("Облигаций с ошибкой загрузки нет")
+            return {}
+        self.log.info(
+            "Повторная загрузка %d облигаций запуска %d", len(secids), parent_id
+        )
+        # Снимок истории дополняется за дату исходного запуска
+        started_at = await asyncio.to_thread(
+            self.run_repository.select_started_at, parent_id
+        )
+        run_id = await asyncio.to_thread(
+            self.run_repository.start_run, "retry", parent_id
+        )
 
-    async def execute_strategy(self, update_data):
+        return await self._execute(
+            update_data,
+            SecidList(secids),
+            self._bond(),
+            run_id,
+            started_at,
+            parent_id=parent_id,
+        )
+
+    def _bond(self) -> Bond:
+        if self.incremental:
+            return IncrementalBond(static_repository=self.static_repository)
+        return Bond()
+
+    async def _execute(
+        self,
+        update_data,
+        bond_list: BondList,
+        bond: Bond,
+        run_id: int | None,
+        started_at: datetime,
+        parent_id: int | None = None,
+    ) -> dict:
         start = time()
-        bond_list = BondList()
+        self.metrics = RunMetrics()
+        self._run_id = run_id
+        self._parent_id = parent_id
+        # Бумаги, записанные повтором, для снимка истории за дату исходного
+        self._written = set() if parent_id is not None else None
+        done = 0
+        self._completed = set()
+        if run_id is not None:
+            items = await asyncio.to_thread(self.run_repository.select_items, run_id)
+            done = sum(status == "done" for status in items.values())
+            self._completed = {
+                secid for secid, status in items.items() if status != "failed"
+            }
+        # Одна сессия с пулом соединений на все стратегии запуска
+        client = self.client or MoexClient()
+        await client.open()
+        for strategy in (bond_list, bond):
+            strategy.client = client
+            strategy.response_cache = self.response_cache
+            strategy.metrics = self.metrics
+        pages = asyncio.Queue(maxsize=self.queue_size)
+        results = asyncio.Queue(maxsize=self.queue_size)
+
+        producer = asyncio.create_task(self._produce_pages(bond_list, pages))
+        if self.processes > 1:
+            workers = [
+                asyncio.create_task(
+                    self._process_shards(bond_list, client, pages, results)
+                )
+            ]
+        else:
+            workers = [
+                asyncio.create_task(self._process_pages(bond, pages, results))
+                for _ in range(self.workers)
+            ]
+        writer = asyncio.create_task(self._write_bonds(update_data, results))
+        closer = asyncio.create_task(
+            self._close_stages(producer, workers, pages, results)
+        )
+        status = "failed"
+        try:
+            await self._supervise([producer, *workers, writer, closer])
+            if self.history_repository is not None:
+                await self._append_history(started_at, self._written)
+            status = "success"
+        finally:
+            if self.client is None:
+                await client.close()
+            report = self._report(status=status, elapsed=time() - start, client=client)
+            if run_id is not None:
+                report["run_id"] = run_id
+                await asyncio.to_thread(
+                    self.run_repository.finish_run,
+                    run_id,
+                    status,
+                    done + self.metrics.counters.get("bonds_written", 0),
+                    report,
+                )
+
+        self.log.info("Время выполнения - %s", report["elapsed"])
+        self.log.info("Этапы: %s", report["stages"])
+        self.log.info("Пропущено облигаций: %s", report["skipped"])
+        if self.response_cache is not None:
+            await asyncio.to_thread(self.response_cache.purge)
+
+        return report
+
+    @staticmethod
+    async def _supervise(tasks: list[asyncio.Task]):
+        """Ожидание задач конвейера до завершения всех или до первой ошибки
+
+        При ошибке или отмене остальные задачи отменяются, иначе этапы,
+        ждущие места в заполненной очереди, не завершатся никогда.
+        """
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception():
+                raise task.exception()
+
+    @staticmethod
+    async def _close_stages(
+        producer: asyncio.Task,
+        workers: list[asyncio.Task],
+        pages: asyncio.Queue,
+        results: asyncio.Queue,
+    ):
+        """Сигналы завершения этапам после окончания предыдущего этапа"""
+        await producer
+        # Сигнал завершения для каждого обработчика
+        for _ in workers:
+            await pages.put(None)
+        await asyncio.gather(*workers)
+        await results.put(None)
+
+    def _report(self, status: str, elapsed: float, client: MoexClient) -> dict:
+        """Отчет о запуске для лога и таблицы ingestion_runs"""
+        report = self.metrics.report()
+        report["status"] = status
+        report["mode"] = self.mode
+        if self._parent_id is not None:
+            report["mode"] = "retry"
+            report["parent_id"] = self._parent_id
+        report["elapsed"] = round(elapsed, 2)
+        report["client"] = {"concurrency_limit": client.limiter.limit}
+        if self.response_cache is not None:
+            report["response_cache"] = self.response_cache.stats()
+
+        return report
+
+    async def _append_history(self, started_at: datetime, secids: set | None = None):
+        """Снимок облигаций, записанных в запуске, в историю за дату запуска
+
+        Повтор дописывает снимок исходного запуска только своими бумагами:
+        иначе туда попали бы все обновления, сделанные после исходного запуска.
+        """
+        snapshot_date = started_at.replace(tzinfo=timezone.utc).astimezone(MOSCOW)
+        if secids is not None:
+            secids = sorted(secids)
+        with self.metrics.stage("history"):
+            rows = await asyncio.to_thread(
+                self.history_repository.append_snapshot,
+                snapshot_date.date(),
+                started_at,
+                secids,
+            )
+        self.metrics.inc("history_rows", rows)
+
+    async def _produce_pages(self, bond_list: BondList, pages: asyncio.Queue):
+        """Загрузка страниц со списком облигаций"""
+        iterator = bond_list.process_data()
+        page_number = 0
+        try:
+            while True:
+                # Время ожидания места в очереди в этап не входит
+                with self.metrics.stage("listing"):
+                    page = await anext(iterator, None)
+                if page is None:
+                    return
+                self.metrics.inc("pages")
+                page_number += 1
+                # Облигации, обработанные до сбоя, повторно не загружаются
+                secids = [secid for secid in page if secid not in self._completed]
+                if len(secids) < len(page):
+                    self.metrics.inc("resumed_secids", len(page) - len(secids))
+                if secids:
+                    await pages.put((page_number, secids))
+        finally:
+            # При отмене генератор закрывается здесь, пока сессия еще открыта
+            await iterator.aclose()
+
+    async def _process_pages(
+        self, bond: Bond, pages: asyncio.Queue, results: asyncio.Queue
+    ):
+        """Обработка облигаций из очереди страниц"""
+        while True:
+            item = await pages.get()
+            if item is None:
+                return
+            page_number, secids = item
+            bonds = await bond.process_data(list_bond=secids)
+            await results.put((page_number, secids, bonds))
+
+    async def _process_shards(
+        self,
+        bond_list: BondList,
+        client: MoexClient,
+        pages: asyncio.Queue,
+        results: asyncio.Queue,
+    ):
+        """Обработка страниц в процессах-обработчиках
+
+        Каждый процесс работает со своим циклом событий и сессией ISS, лимиты
+        соединений и частоты запросов делятся между процессами поровну.
+        Страницы раздаются из общей очереди, поэтому процесс, закончивший
+        свою страницу раньше, берет следующую. Запись в БД и контрольные
+        точки остаются в текущем процессе.
+        """
+        context = multiprocessing.get_context("spawn")
+        shard_tasks = context.Queue(maxsize=self.processes * self.queue_size)
+        shard_results = context.Queue()
+        options = {
+            "bulk": isinstance(bond_list, BondMarket),
+            "incremental": self.incremental,
+            "static_repository": self.static_repository,
+            "iss_url": bond_list._API_MOEX_URL,
+            "cache_path": self.response_cache.path if self.response_cache else None,
+            "workers": self.workers,
+            "limit": max(1, client.limit // self.processes),
+            "rate": client.bucket.rate / self.processes,
+        }
+        processes = [
+            context.Process(
+                target=_run_shard,
+                args=(options, shard_tasks, shard_results),
+                daemon=True,
+            )
+            for _ in range(self.processes)
+        ]
+        for process in processes:
+            process.start()
+        feeder = asyncio.create_task(
+            self._feed_shards(
+                bond_list,
+                pages,
+                shard_tasks,
+                processes,
+                self.processes * self.workers,
+            )
+        )
+        receiver = asyncio.create_task(
+            self._receive_shards(shard_results, processes, results)
+        )
+        try:
+            await self._supervise([feeder, receiver])
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                await asyncio.to_thread(process.join)
+            # Непрочитанные страницы не должны задерживать выход из процесса
+            shard_tasks.cancel_join_thread()
+
+    async def _feed_shards(
+        self,
+        bond_list: BondList,
+        pages: asyncio.Queue,
+        shard_tasks,
+        processes: list,
+        workers: int,
+    ):
+        """Передача страниц из очереди конвейера в очередь процессов"""
+        while True:
+            item = await pages.get()
+            if item is None:
+                break
+            page_number, secids = item
+            market = None
+            if isinstance(bond_list, BondMarket):
+                # Сводные таблицы загружены здесь, процессам передается их часть
+                market = {
+                    name: {
+                        secid: getattr(bond_list, name)[secid]
+                        for secid in secids
+                        if secid in getattr(bond_list, name)
+                    }
+                    for name in ("primary", "yields", "listing_hash")
+                }
+            await asyncio.to_thread(
+                self._shard_put,
+                shard_tasks,
+                (page_number, secids, market),
+                processes,
+            )
+        for _ in range(workers):
+            await asyncio.to_thread(self._shard_put, shard_tasks, None, processes)
+
+    async def _receive_shards(
+        self, shard_results, processes: list, results: asyncio.Queue
+    ):
+        """Передача результатов процессов в очередь записи"""
+        finished = 0
+        while finished < len(processes):
+            message = await asyncio.to_thread(
+                self._shard_message, shard_results, processes
+            )
+            if message[0] == "page":
+                _, page_number, secids, bonds, reasons = message
+                for secid, reason in reasons.items():
+                    self.metrics.skip(reason, secid)
+                await results.put((page_number, secids, bonds))
+            elif message[0] == "done":
+                self.metrics.merge(message[1])
+                finished += 1
+            else:
+                raise RuntimeError(f"Ошибка процесса загрузки: {message[1]}")
+
+    @staticmethod
+    def _check_shards(processes: list):
+        for process in processes:
+            if process.exitcode not in (None, 0):
+                raise RuntimeError(
+                    f"Процесс загрузки завершился с кодом {process.exitcode}"
+                )
+
+    @classmethod
+    def _shard_put(cls, shard_tasks, item, processes: list):
+        """Передача страницы процессам с проверкой, что процессы живы"""
+        while True:
+            try:
+                return shard_tasks.put(item, timeout=1)
+            except queue.Full:
+                cls._check_shards(processes)
+
+    @classmethod
+    def _shard_message(cls, shard_results, processes: list) -> tuple:
+        """Ожидание сообщения процесса с проверкой, что процессы живы"""
+        while True:
+            try:
+                return shard_results.get(timeout=1)
+            except queue.Empty:
+                cls._check_shards(processes)
+
+    async def _write_bonds(self, update_data, results: asyncio.Queue):
+        """Запись результатов и контрольной точки в БД в отдельном потоке"""
+        while True:
+            item = await results.get()
+            if item is None:
+                return
+            page_number, secids, bonds = item
+            if bonds:
+                with self.metrics.stage("db_write"):
+                    await asyncio.to_thread(update_data, bonds=bonds)
+                self.metrics.inc("bonds_written", len(bonds))
+                if self._written is not None:
+                    self._written.update(bond["secid"] for bond in bonds)
+            if self._run_id is not None:
+                items = self._checkpoint(page_number, secids, bonds)
+                with self.metrics.stage("checkpoint"):
+                    await asyncio.to_thread(
+                        self.run_repository.save_items, self._run_id, items
+                    )
+                    # Загруженные повтором облигации не загружаются снова
+                    if self._parent_id is not None:
+                        await asyncio.to_thread(
+                            self.run_repository.save_items, self._parent_id, items
+                        )
+
+    def _checkpoint(self, page_number: int, secids: list, bonds: list) -> list[dict]:
+        """Статусы облигаций страницы: записана, отброшена или ошибка запроса"""
+        written = {bond["secid"] for bond in bonds}
+        reasons = self.metrics.skip_reasons
+        items = []
+        for secid in secids:
+            status, reason = "done", None
+            if secid not in written:
+                reason = reasons.get(secid)
+                status = "failed" if reason == "http_error" else "skipped"
+            items.append(
+                {
+                    "secid": secid,
+                    "page": page_number,
+                    "status": status,
+                    "reason": reason,
+                }
+            )
+        return items
+
+
+def _run_shard(options: dict, shard_tasks, shard_results):
+    """Точка входа процесса-обработчика ContextStrategy"""
+    try:
+        asyncio.run(_process_shard(options, shard_tasks, shard_results))
+    except BaseException as e:
+        shard_results.put(("error", repr(e)))
+        raise
+
+
+async def _process_shard(options: dict, shard_tasks, shard_results):
+    """Обработка страниц из общей очереди в собственной сессии ISS"""
+    metrics = RunMetrics()
+    market = None
+    static_repository = options["static_repository"]
+    if options["bulk"]:
+        market = BondMarket()
+        if options["incremental"]:
+            bond = IncrementalBulkBond(
+                market=market, static_repository=static_repository
+            )
+        else:
+            bond = BulkBond(market=market)
+    elif options["incremental"]:
+        bond = IncrementalBond(static_repository=static_repository)
+    else:
         bond = Bond()
-        async for i in bond_list.process_data():
-            bonds = await bond.process_data(list_bond=i)
-            update_data(bonds=bonds)
+    bond._API_MOEX_URL = options["iss_url"]
+    bond.metrics = metrics
+    if options["cache_path"]:
+        bond.response_cache = ResponseCache(path=options["cache_path"])
+
+    async def work():
+        while True:
+            item = await asyncio.to_thread(shard_tasks.get)
+            if item is None:
+                return
+            page_number, secids, market_part = item
+            if market_part:
+                for name, values in market_part.items():
+                    getattr(market, name).update(values)
+            bonds = await bond.process_data(list_bond=secids)
+            # Причины пропуска облигаций страницы для контрольной точки
+            reasons = {
+                secid: metrics.skip_reasons[secid]
+                for secid in secids
+                if secid in metrics.skip_reasons
+            }
+            await asyncio.to_thread(
+                shard_results.put, ("page", page_number, secids, bonds, reasons)
+            )
 
-        time_result = round((time() - start), 2)
-        self.log.info("Время выполнения - %s", time_result)
+    async with MoexClient(limit=options["limit"], rate=options["rate"]) as client:
+        bond.client = client
+        await asyncio.gather(*(work() for _ in range(options["workers"])))
+    shard_results.put(("done", metrics))
@@ -0,0 +1,242 @@
+from time import monotonic
+import asyncio
+import logging
+import os
+import random
+from aiohttp import (
+    ClientConnectionError,
+    ClientResponseError,
+    ClientSession,
+    ClientTimeout,
+    ServerTimeoutError,
+    TCPConnector,
+)
+from multidict import CIMultiDictProxy
+
+# Ответы ISS, после которых запрос повторяется с паузой
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Ограничение частоты запросов: rate токенов в секунду, запас burst"""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveLimiter:
+    """Число одновременных запросов: снижается вдвое при перегрузке,
+    растет на единицу после серии успешных ответов"""
+
+    # Повторное снижение не раньше чем через cooldown сек, чтобы одна волна
+    # ошибок от параллельных запросов не обрушила лимит до минимума
+    cooldown = 1.0
+
+    def __init__(self, initial: int, minimum: int, maximum: int) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self._active = 0
+        self._successes = 0
+        self._decreased = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+
+    async def release(self):
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    async def on_success(self):
+        async with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    async def on_overload(self):
+        async with self._condition:
+            now = monotonic()
+            if now - self._decreased < self.cooldown:
+                return
+            self._decreased = now
+            self.limit = max(self.minimum, self.limit // 2)
+            self._successes = 0
+
+
+class MoexClient:
+    """Общая HTTP-сессия ISS на весь запуск загрузки"""
+
+    headers = {"Accept-Encoding": "gzip"}
+    # Верхняя граница паузы между повторами, сек
+    _MAX_BACKOFF = 30
+
+    def __init__(
+        self,
+        limit: int | None = None,
+        limit_per_host: int | None = None,
+        keepalive_timeout: float | None = None,
+        dns_cache_ttl: int | None = None,
+        timeout: float | None = None,
+        rate: float | None = None,
+        concurrency: int | None = None,
+        retries: int | None = None,
+        backoff: float | None = None,
+    ) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+        # Общее число соединений пула
+        if limit is None:
+            limit = int(os.getenv("MOEX_CONNECTION_LIMIT", default=60))
+        # Число соединений к одному хосту, 0 - без ограничения
+        if limit_per_host is None:
+            limit_per_host = int(os.getenv("MOEX_CONNECTION_LIMIT_PER_HOST", default=0))
+        # Время удержания простаивающего соединения, сек
+        if keepalive_timeout is None:
+            keepalive_timeout = float(os.getenv("MOEX_KEEPALIVE_TIMEOUT", default=30))
+        # Время кэширования DNS, сек
+        if dns_cache_ttl is None:
+            dns_cache_ttl = int(os.getenv("MOEX_DNS_CACHE_TTL", default=300))
+        # Общий таймаут запроса, сек
+        if timeout is None:
+            timeout = float(os.getenv("MOEX_REQUEST_TIMEOUT", default=30))
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+        # Частота запросов в секунду, 0 - без ограничения
+        if rate is None:
+            rate = float(os.getenv("MOEX_RATE_LIMIT", default=100))
+        # Начальное число одновременных запросов, подстраивается под ответы ISS
+        if concurrency is None:
+            concurrency = int(os.getenv("MOEX_CLIENT_CONCURRENCY", default=limit))
+        # Число повторов запроса и базовая пауза между ними, сек
+        if retries is None:
+            retries = int(os.getenv("MOEX_RETRIES", default=4))
+        if backoff is None:
+            backoff = float(os.getenv("MOEX_BACKOFF", default=0.5))
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate=rate, burst=max(1, int(rate)))
+        self.limiter = AdaptiveLimiter(
+            initial=concurrency, minimum=1, maximum=max(limit, concurrency)
+        )
+        self._session: ClientSession | None = None
+
+    @property
+    def session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("Сессия MoexClient не открыта")
+        return self._session
+
+    async def open(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+            )
+            self._session = ClientSession(
+                trust_env=True,
+                headers=self.headers,
+                connector=connector,
+                timeout=ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def get(
+        self, url: str, params: dict | None = None, headers: dict | None = None
+    ) -> tuple[int, CIMultiDictProxy, bytes]:
+        """GET-запрос с ограничением частоты и повтором при сбоях"""
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            await self.limiter.acquire()
+            try:
+                async with self.session.get(
+                    url=url, params=params, headers=headers
+                ) as response:
+                    if response.status not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        body = await response.read()
+                        await self.limiter.on_success()
+                        return response.status, response.headers, body
+                    error = ClientResponseError(
+                        response.request_info,
+                        response.history,
+                        status=response.status,
+                        message=response.reason,
+                        headers=response.headers,
+                    )
+                    retry_after = response.headers.get("Retry-After")
+            except (ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+                retry_after = None
+            finally:
+                await self.limiter.release()
+
+            await self.limiter.on_overload()
+            if attempt >= self.retries:
+                self.log.info("Запрос %s не выполнен: %s", url, error)
+                if isinstance(error, asyncio.TimeoutError):
+                    raise ServerTimeoutError(f"Таймаут запроса {url}") from error
+                raise error
+            delay = self._backoff_delay(attempt, retry_after)
+            attempt += 1
+            self.log.info(
+                "Повтор %d запроса %s через %.1f сек: %r", attempt, url, delay, error
+            )
+            await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt: int, retry_after: str | None) -> float:
+        """Экспоненциальная пауза со случайным разбросом
+
+        Retry-After из ответа ограничивается _MAX_BACKOFF, иначе один ответ
+        может остановить обработчик на любое время.
+        """
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), self._MAX_BACKOFF)
+        return random.uniform(0, min(self._MAX_BACKOFF, self.backoff * 2**attempt))
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "MoexClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,106 @@
+import logging
+from datetime import datetime, date
+
+import numpy as np
+
+from services import calc
+
+
+class BondRecalc:
+    """Пересчет расчетных полей облигаций по сохраненным данным.
+
+    Дни до погашения, НКД, сумма будущих купонов и доходность считаются
+    по графикам купонов из БД без запросов к MOEX.
+    """
+
+    def __init__(self, repository, schedule_repository) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+        self.repository = repository
+        self.schedule_repository = schedule_repository
+
+    def execute(self, valuation_date: date | None = None) -> int:
+        """Пересчет всех облигаций, возвращает число обновленных строк"""
+        if valuation_date is None:
+            valuation_date = datetime.now().date()
+
+        bonds = self.repository.select_calc_data()
+        schedules = self.schedule_repository.select_schedules()
+        bonds = [bond for bond in bonds if bond["secid"] in schedules]
+        if not bonds:
+            return 0
+
+        rows = self.calculate(
+            bonds=bonds,
+            schedules=[schedules[bond["secid"]] for bond in bonds],
+            valuation_date=valuation_date,
+        )
+        self.repository.update_calculated(rows)
+        self.log.info("Пересчитано облигаций: %d", len(rows))
+
+        return len(rows)
+
+    @staticmethod
+    def calculate(
+        bonds: list[dict], schedules: list[dict], valuation_date: date
+    ) -> list[dict]:
+        """Расчет полей для облигаций с графиками в формате bondization"""
+        matdate = np.array([bond["matdate"] for bond in bonds], dtype="datetime64[D]")
+        days_to_redemption = (matdate - np.datetime64(valuation_date, "D")).astype(
+            np.int64
+        )
+        face_value = np.array([bond["face_value"] for bond in bonds])
+        coupon_frequency = np.array([bond["coupon_frequency"] for bond in bonds])
+        price = np.array([bond["price"] for bond in bonds])
+
+        owner, dates, values, rates = calc.flatten_coupons(
+            [schedule["coupons"]["data"] for schedule in schedules]
+        )
+        sum_coupon, sum_coupon_percent, floater = calc.calc_coupon_sums(
+            owner=owner,
+            dates=dates,
+            values=values,
+            rates=rates,
+            coupon_frequency=coupon_frequency,
+            valuation_date=valuation_date,
+        )
+        # НКД считается по купонам с известным годовым процентом
+        known = ~np.isnan(rates)
+        accint, accint_percent = calc.calc_accint(
+            owner=owner[known],
+            dates=dates[known],
+            values=values[known],
+            face_value=face_value,
+            valuation_date=valuation_date,
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            year_percent = calc.calc_year_percent(
+                price=price,
+                accint_percent=accint_percent,
+                days_to_redemption=days_to_redemption,
+                sum_coupon_percent=sum_coupon_percent,
+            )
+
+        rows = []
+        for i, bond in enumerate(bonds):
+            # Погашенные облигации не пересчитываются
+            if days_to_redemption[i] <= 0:
+                continue
+            rows.append(
+                {
+                    "id": bond["id"],
+                    "days_to_redemption": int(days_to_redemption[i]),
+                    "accint": float(accint[i]),
+                    "accint_percent": float(accint_percent[i]),
+                    "sum_coupon": float(sum_coupon[i]),
+                    "sum_coupon_percent": float(sum_coupon_percent[i]),
+                    "floater": bool(floater[i]),
+                    "year_percent": float(year_percent[i]),
+                }
+            )
+
+        return rows
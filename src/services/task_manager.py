@@ -1,35 +1,274 @@
-import sched
-import time
+import asyncio
 import logging
-from datetime import datetime, timedelta
-
-
-def task_schedule(hour=0, minute=0):
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    log = logging.getLogger(__name__)
-    log.info("Запуск планировщика задач")
-
-    def decorator(func):
-        scheduler = sched.scheduler(time.time, time.sleep)
-
-        def wrapper():
-            now = datetime.now()
-            next_day = now + timedelta(days=1)
-            date = datetime(next_day.year, next_day.month, next_day.day, hour, minute)
-            backup_time = date.timestamp()
-
-            scheduler.enterabs(time=backup_time, priority=1, action=wrapper)
-            if now.weekday() < 5:
-                log.info("Запуск задачи")
-                func()
-            next_date_task = datetime.fromtimestamp(scheduler.queue[0].time)
-            log.info(f"Следующая задача запланирована на {next_date_task}")
-            scheduler.run()
-
-        return wrapper
-
-    return decorator
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+from zoneinfo import ZoneInfo
+
+from services.moex import TradingCalendar
+from services.moex_client import MoexClient
+
+
+class CronSchedule:
+    """Расписание в формате cron: минута, час, день месяца, месяц, день недели
+
+    Поддерживаются *, списки через запятую, диапазоны a-b и шаг */n, a-b/n.
+    День недели 0-6 начиная с воскресенья, 7 - тоже воскресенье.
+    """
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str) -> None:
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Ожидается 5 полей cron: {expression!r}")
+        self.expression = expression
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            weekdays,
+        ) = (self._parse(value, *bounds) for value, bounds in zip(fields, self._RANGES))
+        self.weekdays = {day % 7 for day in weekdays}
+        # По правилам cron при заданных дне месяца и дне недели достаточно одного
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(value: str, low: int, high: int) -> set[int]:
+        result = set()
+        for part in value.split(","):
+            part, _, step = part.partition("/")
+            if part == "*":
+                start, stop = low, high
+            elif "-" in part:
+                start, stop = (int(i) for i in part.split("-"))
+            else:
+                start = stop = int(part)
+                if step:
+                    stop = high
+            if not low <= start <= stop <= high:
+                raise ValueError(f"Значение {value!r} вне диапазона {low}-{high}")
+            result.update(range(start, stop + 1, int(step) if step else 1))
+        return result
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = moment.isoweekday() % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Ближайшее время запуска строго после moment"""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Календарь cron повторяется не реже раза в несколько лет
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                month = moment.month % 12 + 1
+                year = moment.year + (month == 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Расписание {self.expression!r} не срабатывает")
+
+    def last_before(self, moment: datetime, since: datetime) -> datetime | None:
+        """Последнее время запуска в интервале (since, moment]"""
+        result = None
+        fire = self.next_after(since)
+        while fire <= moment:
+            result = fire
+            fire = self.next_after(fire)
+        return result
+
+
+@dataclass
+class Job:
+    """Задача планировщика"""
+
+    name: str
+    # Корутина задачи, получает общий клиент ISS
+    func: Callable[[MoexClient], Awaitable]
+    schedule: CronSchedule
+    # Запуск только в торговые дни по календарю ISS
+    trading_days: bool = False
+    # Пропущенный за время простоя запуск выполняется при старте
+    catch_up: bool = False
+    next_run: datetime | None = None
+    running: bool = field(default=False, repr=False)
+
+
+class Scheduler:
+    """Планировщик задач на одном цикле событий с общей сессией ISS
+
+    Задачи не перекрываются: очередной запуск пропускается, пока идет
+    предыдущий. Время последнего запуска сохраняется в БД, по нему при
+    старте догоняются запуски, пропущенные за время простоя.
+    """
+
+    def __init__(
+        self,
+        run_repository=None,
+        calendar: TradingCalendar | None = None,
+        tz: str | None = None,
+    ) -> None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self.log = logging.getLogger(__class__.__name__)
+        # Часовой пояс расписаний, по умолчанию время биржи
+        if tz is None:
+            tz = os.getenv("SCHEDULER_TZ", default="Europe/Moscow")
+        self.tz = ZoneInfo(tz)
+        self.run_repository = run_repository
+        self.calendar = calendar or TradingCalendar()
+        self.jobs: dict[str, Job] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[MoexClient], Awaitable],
+        cron: str,
+        trading_days: bool = False,
+        catch_up: bool = False,
+    ) -> Job:
+        job = Job(
+            name=name,
+            func=func,
+            schedule=CronSchedule(cron),
+            trading_days=trading_days,
+            catch_up=catch_up,
+        )
+        self.jobs[name] = job
+        return job
+
+    def job(self, cron: str, trading_days: bool = False, catch_up: bool = False):
+        """Декоратор регистрации задачи под именем функции"""
+
+        def decorator(func):
+            self.add_job(func.__name__, func, cron, trading_days, catch_up)
+            return func
+
+        return decorator
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz)
+
+    async def run(self):
+        """Работа планировщика до отмены"""
+        async with MoexClient() as client:
+            self.calendar.client = client
+            now = self.now()
+            for job in self.jobs.values():
+                job.next_run = job.schedule.next_after(now)
+            self.log.info("Запуск планировщика задач")
+            for job in self.jobs.values():
+                self.log.info("Задача %s, первый запуск %s", job.name, job.next_run)
+            await self._catch_up(client, now)
+
+            try:
+                while True:
+                    now = self.now()
+                    for job in self.jobs.values():
+                        if job.next_run <= now:
+                            self._start(job, client, job.next_run)
+                            job.next_run = job.schedule.next_after(now)
+                    wake = min(job.next_run for job in self.jobs.values())
+                    # Сон ограничен минутой на случай перевода системных часов
+                    delay = (wake - self.now()).total_seconds()
+                    await asyncio.sleep(min(max(delay, 0), 60))
+            finally:
+                for task in self._tasks:
+                    task.cancel()
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _catch_up(self, client: MoexClient, now: datetime):
+        """Запуск задач, время которых наступило за время простоя"""
+        if self.run_repository is None:
+            return
+        runs = await asyncio.to_thread(self.run_repository.select_runs)
+        for job in self.jobs.values():
+            last = runs.get(job.name)
+            if not job.catch_up or last is None:
+                continue
+            since = last["scheduled_at"].replace(tzinfo=timezone.utc)
+            since = since.astimezone(self.tz)
+            missed = job.schedule.last_before(now, since)
+            # Запуск, прерванный остановкой процесса, повторяется
+            if missed is None and last["status"] == "running":
+                missed = since
+            if missed is not None:
+                self.log.info("Пропущенный запуск %s: %s", job.name, missed)
+                self._start(job, client, missed)
+
+    def _start(self, job: Job, client: MoexClient, scheduled_at: datetime):
+        task = asyncio.create_task(self._run_job(job, client, scheduled_at))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_job(self, job: Job, client: MoexClient, scheduled_at: datetime):
+        if job.running:
+            self.log.info("Задача %s еще выполняется, запуск пропущен", job.name)
+            return
+        # Флаг ставится до первого ожидания, иначе два запуска пройдут проверку
+        job.running = True
+        if job.trading_days and not await self.calendar.is_trading_day(
+            scheduled_at.date()
+        ):
+            job.running = False
+            return
+
+        started_at = self._utc(self.now())
+        values = {"scheduled_at": self._utc(scheduled_at), "started_at": started_at}
+        await self._save(
+            job.name, status="running", finished_at=None, error=None, **values
+        )
+        self.log.info("Запуск задачи %s", job.name)
+        status, error = "success", None
+        try:
+            await job.func(client)
+        except asyncio.CancelledError:
+            status, error = "failed", "Задача прервана"
+            raise
+        except Exception as e:
+            # Сбой задачи не должен останавливать планировщик
+            self.log.exception("Ошибка при выполнении задачи %s", job.name)
+            status, error = "failed", repr(e)
+        finally:
+            job.running = False
+            finished_at = self._utc(self.now())
+            await asyncio.shield(
+                self._save(
+                    job.name,
+                    status=status,
+                    finished_at=finished_at,
+                    error=error,
+                    **values,
+                )
+            )
+        self.log.info("Задача %s завершена за %s", job.name, finished_at - started_at)
+
+    async def _save(self, name: str, **values):
+        if self.run_repository is None:
+            return
+        try:
+            await asyncio.to_thread(self.run_repository.save_run, name, **values)
+        except Exception:
+            self.log.exception("Ошибка при сохранении запуска задачи %s", name)
+
+    @staticmethod
+    def _utc(moment: datetime) -> datetime:
+        """Время в UTC без часового пояса, как в остальных таблицах"""
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
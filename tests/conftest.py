@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database.base import engine
+
+
+@pytest.fixture(scope="session")
+def database():
+    """PostgreSQL из настроек database.base, без него тест пропускается"""
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL недоступен: {e.orig}")
+    return engine
+
+
+@pytest.fixture
+def api_path(monkeypatch):
+    """Приложение API импортирует соседние модули как в контейнере"""
+    path = Path(__file__).resolve().parents[1] / "src" / "bond_screener_api"
+    monkeypatch.syspath_prepend(str(path))
@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(api_path):
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    "name, value",
+    [
+        ("limit", "-1"),
+        ("limit", "0"),
+        ("limit", "1001"),
+        ("limit", "abc"),
+        ("commission", "-100"),
+        ("commission", "11"),
+        ("commission", "nan"),
+        ("commission", "inf"),
+        ("tax", "-1"),
+        ("tax", "101"),
+        ("tax", "nan"),
+    ],
+)
+def test_bonds_rejects_invalid_params(client, name, value):
+    response = client.get("/bonds", params={name: value})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["query", name]
+
+
+def test_bonds_accepts_boundary_params(database, client):
+    params = {"limit": 1000, "commission": 0, "tax": 100}
+    response = client.get("/bonds", params=params)
+    assert response.status_code == 200
+    assert response.json()["columns"]
@@ -0,0 +1,39 @@
+import pytest
+
+from repositories.bond import MoexORM
+from services.calc import COMMISSION, TAX
+
+
+# Параметры /bonds по умолчанию, как в dependencies.fastapi_service
+DEFAULT_FILTERS = dict(
+    fields=["shortname", "secid", "year_percent"],
+    year_percent=(5, 20),
+    list_level=(1, 3),
+    amortizations=False,
+    floater=False,
+    days_to_redemption=(500, 1500),
+    ofz_bonds=False,
+    face_unit=None,
+    limit=50,
+    commission=COMMISSION,
+    tax=TAX,
+)
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"year_percent": (10, 15), "list_level": (1, 1), "limit": 10},
+        {"amortizations": True, "floater": True},
+        {"days_to_redemption": (0, 365)},
+        {"ofz_bonds": True},
+        {"face_unit": "SUR"},
+        {"commission": 0.1, "tax": 0.0},
+    ],
+    ids=["default", "ranges", "flags", "short", "ofz", "face_unit", "commission"],
+)
+def test_screener_uses_index(database, filters):
+    filters = DEFAULT_FILTERS | filters
+    plan = "\n".join(MoexORM.explain_select_bonds(**filters))
+    assert MoexORM.uses_screener_index(**filters), plan
@@ -0,0 +1,276 @@
+import random
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from schemas.bond import YieldData
+from schemas.iss import IssBondization, IssTable
+from services import calc, moex
+
+
+TODAY = date(2026, 10, 16)
+# np.round и round могут разойтись на единицу последнего знака
+CENTS = 0.01 + 1e-9
+BASIS = 0.0001 + 1e-12
+
+
+def baseline_coupon_sums(
+    coupons: list[tuple], coupon_frequency: int, today: date
+) -> tuple[float, float, bool]:
+    """Суммы купонов по циклу Bond._get_amortization до векторизации"""
+    sum_coupon = 0
+    sum_coupon_percent = 0
+    floater = False
+    for coupon_date, coupon_value, coupon_rate_year in coupons:
+        if coupon_rate_year is None:
+            floater = True
+            continue
+        coupon_percent = coupon_rate_year / coupon_frequency
+        if (coupon_date - today).days > 0:
+            if coupon_value is None:
+                floater = True
+                coupon_value = 0
+                coupon_percent = 0
+            sum_coupon += coupon_value
+            sum_coupon_percent += coupon_percent
+
+    return round(sum_coupon, 2), round(sum_coupon_percent, 2), floater
+
+
+def baseline_accint(
+    coupons: list[tuple], face_value: float, today: date
+) -> tuple[float, float]:
+    """НКД по Bond._calc_accint до векторизации"""
+    future_coupons = [
+        (d, v, r) for d, v, r in coupons if d > today and v is not None
+    ]
+    if not future_coupons:
+        return 0.0, 0.0
+
+    all_coupons_sorted = sorted(coupons, key=lambda x: x[0])
+    last_coupon_date = None
+    next_coupon_date = None
+    next_coupon_value = None
+    for i, (coupon_date, coupon_value, _) in enumerate(all_coupons_sorted):
+        if coupon_date > today and coupon_value is not None:
+            next_coupon_date = coupon_date
+            next_coupon_value = coupon_value
+            if i > 0:
+                last_coupon_date = all_coupons_sorted[i - 1][0]
+            break
+    if last_coupon_date is None:
+        last_coupon_date = next_coupon_date - timedelta(days=182)
+
+    days_in_period = (next_coupon_date - last_coupon_date).days
+    days_accrued = (today - last_coupon_date).days
+    if days_in_period <= 0:
+        return 0.0, 0.0
+    days_accrued = min(days_accrued, days_in_period)
+
+    accint_value = next_coupon_value * (days_accrued / days_in_period)
+    accint_percent = (accint_value / face_value) * 100 if face_value > 0 else 0
+
+    return round(accint_value, 2), round(accint_percent, 4)
+
+
+def baseline_year_percent(
+    price: float,
+    accint: float,
+    days_to_redemption: int,
+    sum_coupon_percent: float,
+    commission: float = 0.3,
+    tax: int = 13,
+) -> float:
+    """Доходность по Bond._calc_bond до векторизации"""
+    buy_price = price + accint
+    final_price = buy_price + buy_price * commission / 100
+    sold_delta = 100 - final_price
+    sold_tax = max(0, sold_delta * tax / 100)
+    coupon_tax = sum_coupon_percent * tax / 100
+    income = (sold_delta + sum_coupon_percent) - (sold_tax + coupon_tax)
+    profit = income / final_price * 100
+    day_percent = profit / days_to_redemption
+
+    return round(day_percent * 365, 2)
+
+
+def _schedule(rng: random.Random) -> list[tuple]:
+    """Случайный график купонов: амортизация, неизвестные значения, флоатеры"""
+    start = TODAY - timedelta(days=rng.randint(0, 800))
+    period = rng.choice([30, 91, 182, 365])
+    value = rng.choice([10.0, 24.93, 41.14, 50.0])
+    rate = rng.choice([6.5, 12.0, 18.75])
+    # У флоатера часть купонов без годового процента
+    floating = rng.random() < 0.2
+    schedule = []
+    for i in range(rng.randint(0, 12)):
+        # Амортизация уменьшает купон по мере погашения номинала
+        if rng.random() < 0.2:
+            value = round(value * rng.uniform(0.3, 0.9), 2)
+        coupon_value = None if rng.random() < 0.1 else value
+        coupon_rate = None if floating and rng.random() < 0.5 else rate
+        coupon_date = start + timedelta(days=period * i)
+        schedule.append((coupon_date, coupon_value, coupon_rate))
+    return schedule
+
+
+# Отдельные случаи: нет купонов, все купоны прошли, нет предыдущего купона,
+# ближайший купон без значения, амортизация, купон в день оценки
+EDGE_SCHEDULES = [
+    [],
+    [
+        (TODAY - timedelta(days=200), 30.0, 6.0),
+        (TODAY - timedelta(days=18), 30.0, 6.0),
+    ],
+    [
+        (TODAY + timedelta(days=40), 30.0, 6.0),
+        (TODAY + timedelta(days=222), 30.0, 6.0),
+    ],
+    [
+        (TODAY - timedelta(days=50), 30.0, 6.0),
+        (TODAY + timedelta(days=132), None, 6.0),
+        (TODAY + timedelta(days=314), 30.0, 6.0),
+    ],
+    [
+        (TODAY - timedelta(days=91), 25.0, 10.0),
+        (TODAY + timedelta(days=1), 18.75, 10.0),
+        (TODAY + timedelta(days=92), 12.5, 10.0),
+        (TODAY + timedelta(days=183), 6.25, 10.0),
+    ],
+    [(TODAY, 30.0, 6.0), (TODAY + timedelta(days=182), 30.0, 6.0)],
+    [
+        (TODAY - timedelta(days=30), 15.0, None),
+        (TODAY + timedelta(days=60), None, None),
+    ],
+]
+
+
+def _schedules(size: int = 2000) -> list[list[tuple]]:
+    rng = random.Random(0)
+    return EDGE_SCHEDULES + [_schedule(rng) for _ in range(size)]
+
+
+def test_coupon_sums_match_baseline():
+    schedules = _schedules()
+    frequency = np.array([(1, 2, 4, 12)[i % 4] for i in range(len(schedules))])
+    owner, dates, values, rates = calc.flatten_coupons(schedules)
+    sum_coupon, sum_coupon_percent, floater = calc.calc_coupon_sums(
+        owner, dates, values, rates, frequency, TODAY
+    )
+
+    for i, schedule in enumerate(schedules):
+        expected = baseline_coupon_sums(schedule, int(frequency[i]), TODAY)
+        assert sum_coupon[i] == pytest.approx(expected[0], abs=CENTS), schedule
+        assert sum_coupon_percent[i] == pytest.approx(expected[1], abs=CENTS), schedule
+        assert floater[i] == expected[2], schedule
+
+
+def test_accint_matches_baseline():
+    # В расчет НКД попадают только купоны с годовым процентом, как в Bond
+    schedules = [
+        [coupon for coupon in schedule if coupon[2] is not None]
+        for schedule in _schedules()
+    ]
+    # Нулевой номинал: НКД в процентах не считается
+    face_value = np.array([(1000.0, 500.0, 0.0)[i % 3] for i in range(len(schedules))])
+    owner, dates, values, _ = calc.flatten_coupons(schedules)
+    accint, accint_percent = calc.calc_accint(owner, dates, values, face_value, TODAY)
+
+    for i, schedule in enumerate(schedules):
+        expected = baseline_accint(schedule, face_value[i], TODAY)
+        assert accint[i] == pytest.approx(expected[0], abs=CENTS), schedule
+        assert accint_percent[i] == pytest.approx(expected[1], abs=BASIS), schedule
+
+
+def test_year_percent_matches_baseline():
+    rng = random.Random(1)
+    rows = [
+        (
+            rng.choice([0.0, 0.01, rng.uniform(50, 120)]),
+            rng.choice([0.0, rng.uniform(0, 5)]),
+            rng.randint(1, 3000),
+            rng.choice([0.0, rng.uniform(0, 60)]),
+        )
+        for _ in range(2000)
+    ]
+    # Нулевые цена и НКД отбрасываются до расчета (missing_price)
+    rows = [row for row in rows if row[0] + row[1] > 0]
+    price, accint, days, coupon_percent = (np.array(i) for i in zip(*rows))
+
+    for commission, tax in [(calc.COMMISSION, calc.TAX), (0.0, 0.0), (1.5, 30)]:
+        year_percent = calc.calc_year_percent(
+            price, accint, days, coupon_percent, commission=commission, tax=tax
+        )
+        expected = [baseline_year_percent(*row, commission, tax) for row in rows]
+        assert year_percent == pytest.approx(expected, abs=CENTS)
+
+
+def test_calc_bonds_matches_baseline(monkeypatch):
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls.combine(TODAY, datetime.min.time())
+
+    monkeypatch.setattr(moex, "datetime", FixedDatetime)
+    bond = moex.Bond()
+    rng = random.Random(2)
+    records, expected = [], []
+    for i, schedule in enumerate(_schedules(500)):
+        frequency = (1, 2, 4, 12)[i % 4]
+        face_value = (1000.0, 500.0, 0.0)[i % 3]
+        # Нулевая цена отбрасывается до расчета (missing_price)
+        price = rng.choice([0.01, rng.uniform(50, 120)])
+        days = rng.randint(1, 3000)
+        bondization = IssBondization(
+            amortizations=IssTable(["amortdate", "value"], [["2030-01-01", 1000]]),
+            coupons=IssTable(
+                ["coupondate", "value", "valueprc"],
+                [[d.isoformat(), v, r] for d, v, r in schedule],
+            ),
+        )
+        coupons = bond._get_amortization(f"RU{i}", bondization, frequency)
+        bond_info = SimpleNamespace(
+            short_name=f"RU{i}",
+            secid=f"RU{i}",
+            matdate=TODAY,
+            face_unit="SUR",
+            list_level=1,
+            days_to_redemption=days,
+            face_value=face_value,
+            coupon_frequency=frequency,
+            coupon_date=TODAY,
+            coupon_percent=0.0,
+            coupon_value=0.0,
+            high_risk=False,
+            type="corporate_bond",
+        )
+        records.append((bond_info, YieldData(price, 0.0), coupons, bondization))
+
+        sum_coupon, sum_coupon_percent, floater = baseline_coupon_sums(
+            schedule, frequency, TODAY
+        )
+        accint, accint_percent = baseline_accint(
+            [c for c in schedule if c[2] is not None], face_value, TODAY
+        )
+        expected.append(
+            {
+                "accint": accint,
+                "accint_percent": accint_percent,
+                "floater": floater,
+                "sum_coupon": sum_coupon,
+                "sum_coupon_percent": sum_coupon_percent,
+                "year_percent": baseline_year_percent(
+                    price, accint_percent, days, sum_coupon_percent
+                ),
+            }
+        )
+
+    for result, values in zip(bond._calc_bonds(records), expected):
+        assert result["floater"] == values["floater"]
+        assert result["accint_percent"] == pytest.approx(
+            values["accint_percent"], abs=BASIS
+        )
+        for key in ("accint", "sum_coupon", "sum_coupon_percent", "year_percent"):
+            assert result[key] == pytest.approx(values[key], abs=CENTS), key
@@ -0,0 +1,42 @@
+from datetime import date, datetime
+import asyncio
+
+import pytest
+
+from services.intraday import PriceRefresh
+from services.moex import MOSCOW
+
+
+class Calendar:
+    """Календарь торгов без запросов к ISS"""
+
+    def __init__(self, holidays: set, workdays: set = frozenset()) -> None:
+        self.holidays = holidays
+        self.workdays = workdays
+
+    async def is_trading_day(self, day: date) -> bool:
+        if day in self.workdays:
+            return True
+        return day.weekday() < 5 and day not in self.holidays
+
+
+@pytest.mark.parametrize(
+    "now, expected",
+    [
+        (datetime(2026, 1, 12, 12, 0), True),
+        # Новогодние праздники в будний день
+        (datetime(2026, 1, 2, 12, 0), False),
+        # Рабочая суббота
+        (datetime(2026, 1, 3, 12, 0), True),
+        (datetime(2026, 1, 10, 12, 0), False),
+        (datetime(2026, 1, 12, 9, 0), False),
+    ],
+)
+def test_in_session_uses_calendar(now, expected):
+    refresh = PriceRefresh(
+        repository=None,
+        schedule_repository=None,
+        calendar=Calendar(holidays={date(2026, 1, 2)}, workdays={date(2026, 1, 3)}),
+    )
+    now = now.replace(tzinfo=MOSCOW)
+    assert asyncio.run(refresh.in_session(now)) is expected
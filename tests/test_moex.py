@@ -0,0 +1,239 @@
+import asyncio
+import os
+from datetime import date, datetime
+
+import pytest
+from aiohttp import web
+
+from benchmarks.fake_iss import FakeIss, start
+from services import moex
+from services.moex import ContextStrategy, MoexStrategy
+
+
+class MemoryRuns:
+    """Хранилище отчетов о запусках в памяти вместо MoexRunORM"""
+
+    def __init__(self) -> None:
+        self.runs: dict[int, dict] = {}
+        self.items: dict[int, dict] = {}
+
+    def start_run(self, mode: str, parent_id: int | None = None) -> int:
+        run_id = len(self.runs) + 1
+        self.runs[run_id] = {"mode": mode, "status": "running", "parent_id": parent_id}
+        self.items[run_id] = {}
+        return run_id
+
+    def select_started_at(self, run_id: int) -> datetime:
+        return datetime(2026, 10, 16, 7, 0)
+
+    def select_failed(self, run_id: int | None = None) -> tuple:
+        failed = {
+            key: sorted(s for s, i in items.items() if i["status"] == "failed")
+            for key, items in self.items.items()
+        }
+        if run_id is None:
+            run_id = max((key for key, value in failed.items() if value), default=None)
+        return run_id, failed.get(run_id, [])
+
+    def select_items(self, run_id: int) -> dict:
+        return {secid: item["status"] for secid, item in self.items[run_id].items()}
+
+    def save_items(self, run_id: int, items: list[dict]):
+        for item in items:
+            page = self.items[run_id].get(item["secid"], item)["page"]
+            self.items[run_id][item["secid"]] = item | {"page": page}
+
+    def finish_run(self, run_id: int, status: str, bonds: int, report: dict):
+        self.runs[run_id].update(status=status, bonds=bonds, report=report)
+
+
+class MemoryHistory:
+    """Запись вызовов MoexHistoryORM.append_snapshot"""
+
+    def __init__(self) -> None:
+        self.snapshots: list[tuple] = []
+
+    def append_snapshot(self, snapshot_date, since, secids=None) -> int:
+        self.snapshots.append((snapshot_date, since, secids))
+        return 0
+
+
+class FlakyIss(FakeIss):
+    """Замена ISS, отвечающая ошибкой на графики купонов бумаг failing"""
+
+    def __init__(self, failing: set, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.failing = failing
+
+    async def bondization(self, request: web.Request) -> web.StreamResponse:
+        if request.match_info["secid"] in self.failing:
+            return web.Response(status=500)
+        return await super().bondization(request)
+
+
+class PartialMarketIss(FakeIss):
+    """Замена ISS, в сводных таблицах рынка которой нет бумаг missing"""
+
+    def __init__(self, missing: set, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.missing = missing
+
+    async def market(self, request: web.Request) -> web.Response:
+        secids = self.secids
+        self.secids = [secid for secid in secids if secid not in self.missing]
+        try:
+            return await super().market(request)
+        finally:
+            self.secids = secids
+
+
+@pytest.fixture
+def iss_url(monkeypatch):
+    """Адрес локальной замены ISS, сервер запускается в цикле теста"""
+    monkeypatch.setenv("MOEX_RATE_LIMIT", "0")
+    monkeypatch.setenv("MOEX_RETRIES", "0")
+    monkeypatch.delenv("MOEX_CACHE_PATH", raising=False)
+
+    async def serve(fake: FakeIss, coro):
+        runner, url = await start(fake)
+        monkeypatch.setattr(MoexStrategy, "_API_MOEX_URL", url)
+        try:
+            # Зависание конвейера превращается в ошибку теста
+            return await asyncio.wait_for(coro(), timeout=60)
+        finally:
+            await runner.cleanup()
+
+    return serve
+
+
+def test_writer_error_fails_run(iss_url):
+    def update_data(bonds: list):
+        raise RuntimeError("БД недоступна")
+
+    context = ContextStrategy(bulk=True, queue_size=1, workers=1, resume_hours=0)
+    with pytest.raises(RuntimeError, match="БД недоступна"):
+        asyncio.run(
+            iss_url(
+                FakeIss(bonds=500),
+                lambda: context.execute_strategy(update_data=update_data),
+            )
+        )
+
+
+def _crash_shard(options: dict, shard_tasks, shard_results):
+    """Процесс-обработчик, завершающийся с ошибкой сразу после запуска"""
+    os._exit(3)
+
+
+def test_shard_exit_fails_run(iss_url, monkeypatch):
+    monkeypatch.setattr(moex, "_run_shard", _crash_shard)
+    runs = MemoryRuns()
+    context = ContextStrategy(
+        queue_size=1, workers=1, processes=2, run_repository=runs, resume_hours=0
+    )
+    with pytest.raises(RuntimeError, match="кодом 3"):
+        asyncio.run(
+            iss_url(
+                FakeIss(bonds=1000),
+                lambda: context.execute_strategy(update_data=lambda bonds: None),
+            )
+        )
+    assert runs.runs[1]["status"] == "failed"
+
+
+@pytest.mark.parametrize("bulk", [False, True], ids=["full", "bulk"])
+def test_bond_flags_from_description(iss_url, bulk):
+    fake = FakeIss(bonds=300)
+    written = []
+
+    def update_data(bonds: list):
+        written.extend(bonds)
+
+    context = ContextStrategy(bulk=bulk, resume_hours=0)
+    asyncio.run(iss_url(fake, lambda: context.execute_strategy(update_data)))
+
+    assert written
+    for bond in written:
+        source = fake.bonds[bond["secid"]]
+        assert not source["qualified"]
+        assert bond["highrisk"] is source["highrisk"]
+    assert any(bond["highrisk"] for bond in written)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_bond_missing_from_market_is_skipped(iss_url, processes):
+    missing = {"RU000003", "RU000150"}
+    fake = PartialMarketIss(missing=missing, bonds=200)
+    runs = MemoryRuns()
+    written = []
+
+    def update_data(bonds: list):
+        written.extend(bonds)
+
+    context = ContextStrategy(
+        bulk=True, run_repository=runs, resume_hours=0, processes=processes
+    )
+    report = asyncio.run(iss_url(fake, lambda: context.execute_strategy(update_data)))
+
+    assert report["skipped"]["missing_market"] == 2
+    assert missing.isdisjoint(bond["secid"] for bond in written)
+    for secid in missing:
+        assert runs.items[1][secid]["reason"] == "missing_market"
+        assert runs.items[1][secid]["status"] == "skipped"
+    assert len(runs.items[1]) == 200
+
+
+def test_empty_market_fails_run(iss_url):
+    fake = PartialMarketIss(missing=set(), bonds=200)
+    fake.missing = set(fake.secids)
+    runs = MemoryRuns()
+    context = ContextStrategy(bulk=True, run_repository=runs, resume_hours=0)
+    with pytest.raises(ValueError, match="Пустые таблицы"):
+        asyncio.run(
+            iss_url(fake, lambda: context.execute_strategy(lambda bonds: None))
+        )
+    assert runs.runs[1]["status"] == "failed"
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_retry_is_recorded_as_own_run(iss_url, processes):
+    fake = FlakyIss(failing={"RU000003", "RU000150"}, bonds=200)
+    runs = MemoryRuns()
+    history = MemoryHistory()
+    context = ContextStrategy(
+        run_repository=runs,
+        history_repository=history,
+        resume_hours=0,
+        processes=processes,
+    )
+
+    async def run_and_retry():
+        report = await context.execute_strategy(update_data=lambda bonds: None)
+        assert runs.select_failed() == (1, ["RU000003", "RU000150"])
+        fake.failing.clear()
+        retry = await context.retry_failed(update_data=lambda bonds: None)
+        return report, retry
+
+    report, retry = asyncio.run(iss_url(fake, run_and_retry))
+
+    parent = runs.runs[1]
+    assert parent["status"] == "success"
+    assert parent["report"] is report
+    assert report["skipped"]["http_error"] == 2
+    assert runs.runs[2] == {
+        "mode": "retry",
+        "status": "success",
+        "parent_id": 1,
+        "bonds": retry["counters"]["bonds_written"],
+        "report": retry,
+    }
+    assert retry["parent_id"] == 1
+    assert runs.select_failed() == (None, [])
+    assert {runs.items[1][secid]["page"] for secid in fake.bonds} == {1, 2}
+    # Повтор дописывает снимок за дату исходного запуска только своими бумагами
+    assert history.snapshots[0][2] is None
+    assert history.snapshots[1] == (
+        date(2026, 10, 16),
+        datetime(2026, 10, 16, 7, 0),
+        ["RU000003", "RU000150"],
+    )
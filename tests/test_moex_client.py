@@ -0,0 +1,20 @@
+import pytest
+
+from services.moex_client import MoexClient
+
+
+@pytest.mark.parametrize(
+    "retry_after, expected",
+    [("0", 0), ("5", 5), ("30", 30), ("86400", MoexClient._MAX_BACKOFF)],
+)
+def test_retry_after_is_capped(retry_after, expected):
+    client = MoexClient(backoff=1)
+    assert client._backoff_delay(attempt=0, retry_after=retry_after) == expected
+
+
+@pytest.mark.parametrize("retry_after", [None, "Wed, 21 Oct 2026 07:28:00 GMT"])
+def test_backoff_without_numeric_retry_after(retry_after):
+    client = MoexClient(backoff=1)
+    for attempt in range(10):
+        delay = client._backoff_delay(attempt=attempt, retry_after=retry_after)
+        assert 0 <= delay <= min(MoexClient._MAX_BACKOFF, 2**attempt)
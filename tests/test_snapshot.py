@@ -0,0 +1,87 @@
+from datetime import date
+import asyncio
+
+import pytest
+
+from models.bond import MoexBonds
+from repositories.bond import MoexAsyncORM
+from repositories.snapshot import BondSnapshot, MoexSnapshotORM
+from services.fastapi import ScreenerCache
+
+
+def _snapshot(version: int, year_percent: float) -> BondSnapshot:
+    """Снимок из одной облигации, проходящей фильтры скринера по умолчанию"""
+    row = {
+        "shortname": "Обл 1",
+        "secid": "RU000001",
+        "matdate": date(2030, 1, 1),
+        "face_unit": "SUR",
+        "list_level": 1,
+        "days_to_redemption": 1000,
+        "face_value": 1000.0,
+        "coupon_frequency": 2,
+        "coupon_date": date(2027, 1, 1),
+        "coupon_percent": 10.0,
+        "coupon_value": 50.0,
+        "highrisk": False,
+        "type": "corporate_bond",
+        "accint": 0.0,
+        "accint_percent": 0.0,
+        "price": 100.0,
+        "moex_yield": 10.0,
+        "amortizations": False,
+        "floater": False,
+        "sum_coupon": 300.0,
+        "sum_coupon_percent": 30.0,
+        "year_percent": year_percent,
+    }
+    names = [
+        column.key
+        for column in MoexBonds.__table__.columns
+        if column.key not in ("id", "last_updated")
+    ]
+    return BondSnapshot.from_rows(
+        names=names, rows=[tuple(row[name] for name in names)], version=version
+    )
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Версия и строки таблицы bonds без PostgreSQL"""
+    state = {"version": 1}
+
+    async def data_version():
+        return state["version"]
+
+    async def load(version):
+        return _snapshot(version, year_percent=10.0 + version)
+
+    monkeypatch.setattr(MoexAsyncORM, "data_version", data_version)
+    monkeypatch.setattr(MoexSnapshotORM, "_load", load)
+    monkeypatch.setattr(MoexSnapshotORM, "_snapshot", None)
+    monkeypatch.setattr(MoexSnapshotORM, "_lock", None)
+    return state
+
+
+def test_cache_reloads_snapshot_on_new_version(api_path, database, monkeypatch):
+    import dependencies
+
+    monkeypatch.setattr(dependencies, "repository", MoexSnapshotORM)
+    # Кэш сверяет версию при каждом запросе, снимок - раз в 30 сек
+    cache = ScreenerCache(version_interval=0)
+    monkeypatch.setattr(dependencies, "screener_cache", cache)
+    monkeypatch.setattr(MoexSnapshotORM, "version_interval", 30)
+
+    async def year_percent():
+        # Вне FastAPI параметры с Query передаются явно
+        result = await dependencies.fastapi_service(
+            fields="secid,year_percent", limit=None, commission=None, tax=None
+        )
+        return result.data[0][1]
+
+    async def scenario():
+        first = await year_percent()
+        database["version"] = 2
+        return first, await year_percent()
+
+    assert asyncio.run(scenario()) == (11.0, 12.0)